@@ -0,0 +1,81 @@
+"""重复文件查找基准：首次查找（冷缓存）与再次查找（哈希缓存命中）
+
+生成的文档库包含真正的重复文件、大小相同但内容不同的文件，以及首尾相同
+只有中间不同的文件（必须读到完整哈希才能区分）。
+
+用法: python -m benchmarks.bench_duplicates [--files 2000] [--mb 256] [--workers 4]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from core.duplicates import DuplicateFinder
+from core.file_index import FileIndex
+from core.walker import walk_documents
+
+
+def generate_library(root, file_count, total_mb, seed=0):
+    """生成带内容的文档库，已存在时直接复用"""
+    marker = os.path.join(root, f".library_{file_count}_{total_mb}_{seed}")
+    if os.path.exists(marker):
+        return
+    os.makedirs(root, exist_ok=True)
+    rng = random.Random(seed)
+    average = total_mb * 1024 * 1024 // file_count
+    originals = []
+    for i in range(file_count):
+        path = os.path.join(root, f"doc_{i}.docx")
+        kind = rng.random()
+        if originals and kind < 0.2:
+            # 真正的重复
+            with open(rng.choice(originals), "rb") as f:
+                data = f.read()
+        elif originals and kind < 0.3:
+            # 同样大小、首尾相同，只有中间一个字节不同
+            with open(rng.choice(originals), "rb") as f:
+                data = bytearray(f.read())
+            data[len(data) // 2] ^= 0xFF
+        else:
+            data = rng.randbytes(rng.randint(average // 4, average * 2))
+            originals.append(path)
+        with open(path, "wb") as f:
+            f.write(data)
+    with open(marker, "w"):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--mb", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "desktop-tools-bench"))
+    args = parser.parse_args()
+
+    library = os.path.join(args.root, f"library_{args.files}_{args.mb}")
+    generate_library(library, args.files, args.mb)
+    records = list(walk_documents(library))
+    total = sum(record["size"] for record in records)
+    print(f"{len(records)} 个文件, 共 {total / 1024 / 1024:.0f}MB")
+
+    db_path = os.path.join(args.root, "bench_duplicates.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    index = FileIndex(db_path)
+    finder = DuplicateFinder(index, workers=args.workers)
+    for name in ("首次", "再次"):
+        start = time.perf_counter()
+        groups = finder.find(records)
+        elapsed = time.perf_counter() - start
+        stats = finder.stats
+        print(f"{name}: {elapsed:.2f}s, {len(groups)} 组, 候选 {stats['candidates']}, "
+              f"首尾哈希 {stats['partial_hashed']}, 完整哈希 {stats['full_hashed']}, "
+              f"缓存命中 {stats['cache_hits']}, 读取 {stats['bytes_read'] / 1024 / 1024:.0f}MB "
+              f"({stats['bytes_read'] / 1024 / 1024 / max(elapsed, 1e-9):.0f}MB/s)")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
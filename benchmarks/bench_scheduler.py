@@ -0,0 +1,94 @@
+"""多根目录首次扫描：每个根目录一个线程 vs 有界线程池按子目录调度
+
+用法: python -m benchmarks.bench_scheduler [--files 200000] [--workers 8] [--per-device 4] [--latency 5]
+
+--latency 给每次目录读取加上固定延迟（毫秒），模拟 SMB 等网络共享的往返耗时。
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.treegen import generate_tree
+from core.file_index import FileIndex
+from core import incremental
+from core.incremental import IncrementalScanner
+from core.scheduler import ScanScheduler
+
+
+def thread_per_root(index, roots):
+    """旧方式：每个根目录一个线程，各自顺序遍历"""
+    counts = {}
+
+    def scan(root):
+        counts[root] = len(IncrementalScanner(index).scan(root).added)
+
+    threads = [threading.Thread(target=scan, args=(root,)) for root in roots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts.values())
+
+
+def scheduled(index, roots, workers, per_device):
+    """新方式：所有根目录共用线程池"""
+    scheduler = ScanScheduler(index, workers=workers, per_device=per_device)
+    done = threading.Semaphore(0)
+    counts = []
+
+    def callback(msg_type, data):
+        if msg_type == "file":
+            counts.append(1)
+        elif msg_type == "done":
+            done.release()
+
+    for root in roots:
+        scheduler.submit(root, callback)
+    for _ in roots:
+        done.acquire()
+    scheduler.shutdown()
+    return len(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "desktop-tools-bench"))
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-device", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    tree = os.path.join(args.root, f"tree_{args.files}")
+    generate_tree(tree, args.files)
+    # 一个大根目录加上若干小根目录，模拟大小悬殊的已选目录
+    roots = [os.path.join(tree, "d0_0")] + [os.path.join(tree, "d0_1", "d1_0", f"d2_{i}") for i in range(8)]
+    print(f"{len(roots)} 个根目录，目录树 {tree}，目录读取延迟 {args.latency}ms")
+    if args.latency:
+        scan_directory = incremental.scan_directory
+
+        def slow_scan_directory(directory, *rest):
+            time.sleep(args.latency / 1000)
+            return scan_directory(directory, *rest)
+
+        incremental.scan_directory = slow_scan_directory
+
+    for name, run in (
+        ("每个根目录一个线程", lambda index: thread_per_root(index, roots)),
+        (f"线程池 {args.workers} 线程/每设备 {args.per_device}",
+         lambda index: scheduled(index, roots, args.workers, args.per_device)),
+    ):
+        db_path = os.path.join(args.root, "bench_scheduler.db")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        index = FileIndex(db_path)
+        start = time.perf_counter()
+        count = run(index)
+        print(f"{name}: {time.perf_counter() - start:.2f}s, {count} 个文件")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
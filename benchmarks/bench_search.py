@@ -0,0 +1,51 @@
+"""搜索框延迟基准：逐字输入再逐字删除，对比 n-gram 索引与线性子串扫描
+
+用法: python -m benchmarks.bench_search [--rows 500000] [--query 项目报告_12]
+"""
+import argparse
+import time
+
+from benchmarks.bench_model import make_record
+from core.file_model import FileListModel
+
+
+def linear_scan(model, query):
+    """旧实现：逐个文件名转小写后做子串判断"""
+    query = query.lower()
+    return [row for row, name in enumerate(model.names) if query in name.lower()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--query", default="报告_123")
+    args = parser.parse_args()
+
+    model = FileListModel()
+    start = time.perf_counter()
+    for i in range(args.rows):
+        model.upsert(make_record(i))
+    print(f"{args.rows} 行，建模型 {time.perf_counter() - start:.2f}s")
+
+    index = model.search_index
+    start = time.perf_counter()
+    index.catch_up()
+    print(f"补建搜索索引 {time.perf_counter() - start:.2f}s")
+    typed = [args.query[:i] for i in range(1, len(args.query) + 1)]
+    keystrokes = typed + typed[-2::-1]
+    print(f"{'查询':<12}{'命中':>8}{'索引(ms)':>10}{'视图(ms)':>10}{'线性(ms)':>10}")
+    for query in keystrokes:
+        start = time.perf_counter()
+        hits = index.search(query)
+        lookup = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        model.set_query(query)
+        view = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        linear_scan(model, query)
+        linear = (time.perf_counter() - start) * 1000
+        print(f"{query:<12}{len(hits):>8}{lookup:>10.3f}{view:>10.2f}{linear:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
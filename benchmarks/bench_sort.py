@@ -0,0 +1,65 @@
+"""列排序基准：旧的解析显示字符串排序 vs 模型上的类型化排序键与缓存排列
+
+用法: python -m benchmarks.bench_sort [--rows 200000]
+"""
+import argparse
+import time
+from datetime import datetime
+
+from benchmarks.bench_model import make_record
+from core.file_model import FileListModel
+
+
+def format_size(size_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f}{unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f}TB"
+
+
+def legacy_sort(strings, field, reverse):
+    """旧实现：从显示字符串反解析出排序键"""
+    if field in ("ctime", "mtime"):
+        key = lambda value: datetime.strptime(value, "%Y-%m-%d %H:%M")
+    elif field == "size":
+        # 旧实现固定截取两位单位，遇到 "B" 结尾会抛出 KeyError，这里按实际单位解析
+        units = {'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3, 'TB': 1024**4}
+        key = lambda value: float(value.rstrip("KMGTB")) * units[value[len(value.rstrip("KMGTB")):]]
+    else:
+        key = str.lower
+    return sorted(strings, key=key, reverse=reverse)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    model = FileListModel()
+    for i in range(args.rows):
+        model.upsert(make_record(i))
+
+    displayed = {
+        "name": list(model.names),
+        "size": [format_size(size) for size in model.sizes],
+        "mtime": [datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M") for t in model.mtimes],
+    }
+    print(f"{args.rows} 行")
+    for field, strings in displayed.items():
+        legacy = timed(legacy_sort, strings, field, False)
+        first = timed(model.sort, field, False)
+        flipped = timed(model.sort, field, True)
+        again = timed(model.sort, field, False)
+        print(f"  {field:>5}: 旧实现 {legacy:8.1f}ms | 首次 {first:7.1f}ms | "
+              f"反向 {flipped:6.1f}ms | 再次 {again:6.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
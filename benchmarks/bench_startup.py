@@ -0,0 +1,120 @@
+"""启动基准：各模块在全新解释器中的导入耗时，以及界面的首次绘制时间
+
+用法: python -m benchmarks.bench_startup [--repeat 5] [--json]
+
+导入耗时用 -X importtime 统计（只含该模块及其依赖，不含解释器启动），取多次中的最小值。
+首次绘制需要图形环境和界面依赖（core.config、pywin32 等），不满足时跳过并说明原因。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# 无界面的扫描核心、命令行、界面入口
+MODULES = [
+    "core.walker", "core.scheduler", "core.file_index", "core.file_model", "core.pipeline",
+    "core.metrics", "core.cli", "file_organizer"
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在子进程中创建窗口，窗口映射后的第一个空闲回调视为首次绘制完成
+FIRST_PAINT_SCRIPT = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+from file_organizer import FileOrganizer
+imported = time.perf_counter()
+root = tk.Tk()
+app = FileOrganizer(root)
+built = time.perf_counter()
+
+def painted(event=None):
+    root.unbind("<Map>")
+    def done():
+        now = time.perf_counter()
+        print(f"{imported - start} {built - start} {now - start}")
+        app.on_closing()
+        root.destroy()
+    root.after_idle(done)
+
+root.bind("<Map>", painted)
+root.mainloop()
+"""
+
+
+def import_time(module):
+    """返回模块在全新解释器中的累计导入耗时（秒），无法导入时返回 (None, 错误)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1_000_000, None
+    return None, "无法解析 -X importtime 的输出"
+
+
+def first_paint():
+    """返回 (导入, 构造窗口, 首次绘制) 的耗时（秒），无法运行时返回 (None, 原因)"""
+    if sys.platform != "win32" and not os.environ.get("DISPLAY"):
+        return None, "没有图形环境（DISPLAY）"
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_PAINT_SCRIPT], capture_output=True, text=True, cwd=ROOT, timeout=60
+        )
+    except subprocess.TimeoutExpired:
+        return None, "超时"
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return tuple(float(value) for value in result.stdout.split()), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    report = {"imports": {}, "first_paint": None, "skipped": {}}
+    for module in MODULES:
+        times = []
+        for _ in range(args.repeat):
+            elapsed, error = import_time(module)
+            if elapsed is None:
+                report["skipped"][module] = error
+                break
+            times.append(elapsed)
+        if times:
+            report["imports"][module] = min(times)
+
+    paints = []
+    for _ in range(args.repeat):
+        timings, error = first_paint()
+        if timings is None:
+            report["skipped"]["first_paint"] = error
+            break
+        paints.append(timings)
+    if paints:
+        best = min(paints, key=lambda timings: timings[2])
+        report["first_paint"] = dict(zip(("import", "construct", "paint"), best))
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    for module, elapsed in report["imports"].items():
+        print(f"  import {module:<16} {elapsed * 1000:7.1f}ms")
+    if report["first_paint"]:
+        paint = report["first_paint"]
+        print(f"  首次绘制: 导入 {paint['import'] * 1000:.0f}ms, 构造 {paint['construct'] * 1000:.0f}ms, "
+              f"绘制 {paint['paint'] * 1000:.0f}ms")
+    for name, reason in report["skipped"].items():
+        print(f"  跳过 {name}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""对比旧的多次 rglob 搜索与单次 scandir 遍历
+
+用法: python -m benchmarks.bench_walker [--files 200000] [--root DIR]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.treegen import generate_tree
+from core.walker import walk_documents
+
+PATTERNS = ["doc", "docx", "xls", "xlsx", "ppt", "pptx"]
+
+
+def rglob_search(directory):
+    """旧实现：每个扩展名一次 rglob，再逐个 os.stat"""
+    found = []
+    for pattern in PATTERNS:
+        for file in Path(directory).rglob(f"*.{pattern}"):
+            file_path = str(file)
+            os.stat(file_path)
+            found.append(file_path)
+    return found
+
+
+def scandir_search(directory):
+    """新实现：单次遍历，复用 DirEntry 的 stat 数据"""
+    return list(walk_documents(directory))
+
+
+def measure(func, directory, repeat):
+    """返回 (最快耗时, 结果数量)"""
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(func(directory))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "desktop-tools-bench"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    root = os.path.join(args.root, f"tree_{args.files}")
+    start = time.perf_counter()
+    generate_tree(root, args.files)
+    print(f"目录树: {root} ({args.files} 个文件, 准备耗时 {time.perf_counter() - start:.1f}s)")
+
+    old_time, old_count = measure(rglob_search, root, args.repeat)
+    new_time, new_count = measure(scandir_search, root, args.repeat)
+    print(f"rglob x{len(PATTERNS)} + os.stat: {old_time:.3f}s, {old_count} 个文件")
+    print(f"scandir 单次遍历:      {new_time:.3f}s, {new_count} 个文件")
+    print(f"加速比: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""基准测试套件：在合成目录树上测量各个无界面环节，结果输出为 JSON，可与上次结果对比
+
+用法:
+    python -m benchmarks.suite [--files 100000] [--depth 4] [--fanout 8]
+                               [--ext-mix doc=1,docx=3,xls=1,xlsx=3,ppt=1,pptx=2]
+                               [-o 结果.json] [--compare 基线.json] [--threshold 0.2]
+
+测量的环节：walk（遍历 + stat + 构造记录）、list（只列目录）、stat、records（构造记录）、
+ingest（写入列表模型）、sort_*（首次排序）、type_filter、name_search、export_csv、export_jsonl。
+每个环节取 --repeat 次中的最快值。--compare 时任一环节比基线慢超过 threshold
+（且差值超过 5ms）即以退出码 1 结束，便于在提交之间发现热点退化。
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.treegen import generate_tree
+from core.export import open_writer
+from core.file_model import FileListModel
+from core.file_types import TYPE_ALIASES
+from core.walker import DOC_EXTENSIONS, make_record, walk_documents
+
+# 默认扩展名分布：只有六种文档类型
+DEFAULT_EXT_MIX = "doc=1,docx=3,xls=1,xlsx=3,ppt=1,pptx=2"
+SEARCH_QUERIES = ["file", "file_1", "file_12", "_123", "9"]
+# 小于该差值的变化视为噪声
+MIN_REGRESSION = 0.005
+
+
+def parse_ext_mix(text):
+    """解析 "doc=1,docx=3" 形式的扩展名权重"""
+    mix = {}
+    for item in text.split(","):
+        ext, _, weight = item.partition("=")
+        ext = ext.strip().lower()
+        mix[ext if ext.startswith(".") else "." + ext] = float(weight or 1)
+    return mix
+
+
+def list_tree(root):
+    """只列目录、不取 stat，返回文件路径列表"""
+    paths = []
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in DOC_EXTENSIONS:
+                    paths.append(entry.path)
+    return paths
+
+
+def stat_all(paths):
+    return [os.stat(path) for path in paths]
+
+
+def build_records(paths, stats):
+    records = []
+    for path, stat in zip(paths, stats):
+        name = os.path.basename(path)
+        records.append(make_record(path, name, os.path.splitext(name)[1], stat))
+    return records
+
+
+def build_model(records):
+    model = FileListModel()
+    for record in records:
+        model.upsert(record)
+    return model
+
+
+def search_names(model):
+    model.search_index.catch_up()
+    for query in SEARCH_QUERIES:
+        model.set_query(query)
+    model.set_query("")
+
+
+def filter_types(model):
+    for alias in TYPE_ALIASES:
+        model.set_type_filter(TYPE_ALIASES[alias])
+    model.set_type_filter(None)
+
+
+def export_view(model, path):
+    writer = open_writer(path)
+    try:
+        for row in model.view:
+            writer.write(model.record(row))
+    finally:
+        writer.close()
+
+
+def measure(func, repeat, setup=None):
+    """返回 {"best": 最快秒数, "mean": 平均秒数, "runs": 次数}，setup 的返回值作为参数且不计时
+
+    与 timeit 一样，计时期间关闭垃圾回收以减少抖动。
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func(*args)
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return {"best": min(times), "mean": sum(times) / len(times), "runs": repeat}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(root, repeat):
+    """在已生成的目录树上运行所有环节，返回 (结果, 数量)"""
+    results = {}
+    results["walk"] = measure(lambda: list(walk_documents(root)), repeat)
+    results["list"] = measure(list_tree, repeat, lambda: (root,))
+    paths = list_tree(root)
+    results["stat"] = measure(stat_all, repeat, lambda: (paths,))
+    stats = stat_all(paths)
+    results["records"] = measure(build_records, repeat, lambda: (paths, stats))
+    records = build_records(paths, stats)
+    results["ingest"] = measure(build_model, repeat, lambda: (records,))
+    for field in ("name", "size", "mtime"):
+        # 每次都用新模型，测的是没有缓存排列时的首次排序
+        results[f"sort_{field}"] = measure(lambda model: model.sort(field), repeat, lambda: (build_model(records),))
+    model = build_model(records)
+    results["type_filter"] = measure(filter_types, repeat, lambda: (model,))
+    results["name_search"] = measure(search_names, repeat, lambda: (build_model(records),))
+
+    directory = tempfile.mkdtemp()
+    try:
+        for fmt in ("csv", "jsonl"):
+            path = os.path.join(directory, f"export.{fmt}")
+            results[f"export_{fmt}"] = measure(export_view, repeat, lambda: (model, path))
+            os.remove(path)
+    finally:
+        os.rmdir(directory)
+    return results, {"files": len(paths)}
+
+
+def compare(results, baseline, threshold):
+    """打印与基线的对比，返回退化的环节列表"""
+    regressions = []
+    print(f"{'环节':<14}{'基线(ms)':>10}{'本次(ms)':>10}{'变化':>8}", file=sys.stderr)
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        ratio = result["best"] / old["best"] if old["best"] else 1.0
+        regressed = ratio > 1 + threshold and result["best"] - old["best"] > MIN_REGRESSION
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<14}{old['best'] * 1000:>10.1f}{result['best'] * 1000:>10.1f}{ratio - 1:>+8.0%}"
+              + ("  ← 退化" if regressed else ""), file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--ext-mix", default=DEFAULT_EXT_MIX, help="扩展名权重，如 doc=1,docx=3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "desktop-tools-bench"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，默认写到标准输出")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前保存的结果对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="视为退化的变慢比例")
+    args = parser.parse_args()
+
+    ext_mix = parse_ext_mix(args.ext_mix)
+    mix_name = "_".join(f"{ext.lstrip('.')}{weight:g}" for ext, weight in sorted(ext_mix.items()))
+    root = os.path.join(args.root, f"suite_{args.files}_{args.fanout}_{args.depth}_{args.seed}_{mix_name}")
+    start = time.perf_counter()
+    generate_tree(root, args.files, args.fanout, args.depth, ext_mix, args.seed)
+    print(f"目录树: {root}（准备耗时 {time.perf_counter() - start:.1f}s）", file=sys.stderr)
+
+    results, counts = run_suite(root, args.repeat)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "files": args.files, "depth": args.depth, "fanout": args.fanout,
+                "ext_mix": ext_mix, "seed": args.seed, "repeat": args.repeat
+            }
+        },
+        "counts": counts,
+        "results": results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("params") != report["meta"]["params"]:
+            print("警告: 基线的目录树参数与本次不同，对比结果仅供参考", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"退化环节: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""生成用于基准测试的合成目录树"""
+import os
+import random
+
+# 默认扩展名分布：文档为主，夹杂其它常见文件
+DEFAULT_EXT_MIX = {
+    ".doc": 8, ".docx": 20, ".xls": 8, ".xlsx": 20, ".ppt": 4, ".pptx": 10,
+    ".pdf": 10, ".txt": 10, ".jpg": 10
+}
+
+
+def generate_tree(root, file_count, fanout=8, depth=4, ext_mix=None, seed=0):
+    """在 root 下生成 file_count 个空文件，均匀分布到 fanout**depth 个叶目录
+
+    已存在且文件数一致的目录树会被直接复用，返回生成的目录列表。
+    """
+    ext_mix = ext_mix or DEFAULT_EXT_MIX
+    rng = random.Random(seed)
+    exts = list(ext_mix)
+    weights = [ext_mix[ext] for ext in exts]
+
+    dirs = [root]
+    for level in range(depth):
+        dirs = [os.path.join(parent, f"d{level}_{i}") for parent in dirs for i in range(fanout)]
+
+    marker = os.path.join(root, f".treegen_{file_count}_{fanout}_{depth}_{seed}")
+    if os.path.exists(marker):
+        return dirs
+
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+    for i in range(file_count):
+        directory = dirs[i % len(dirs)]
+        ext = rng.choices(exts, weights)[0]
+        with open(os.path.join(directory, f"file_{i}{ext}"), "wb"):
+            pass
+    with open(marker, "w"):
+        pass
+    return dirs
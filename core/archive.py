@@ -0,0 +1,253 @@
+"""把文件流式打包为 zip：大文件分块并行压缩，已压缩的格式直接存储"""
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 每个压缩任务处理的字节数
+CHUNK_SIZE = 1024 * 1024
+# 分块之间共享的字典长度（deflate 窗口大小），保证分块压缩率接近整体压缩
+DICT_SIZE = 32 * 1024
+# 本身已是压缩格式的扩展名，直接存储（OOXML 文档本身就是 zip）
+STORED_EXTENSIONS = frozenset({
+    ".docx", ".xlsx", ".pptx", ".docm", ".xlsm", ".pptm",
+    ".zip", ".7z", ".rar", ".gz", ".jpg", ".jpeg", ".png", ".mp4", ".mp3"
+})
+# 其它文件先试压开头一段，压缩率达不到该比例时存储
+SAMPLE_SIZE = 64 * 1024
+MIN_RATIO = 0.95
+
+_STORED = 0
+_DEFLATED = 8
+_UTF8_FLAG = 0x0800
+_ZIP64_VERSION = 45
+_ZIP64_LIMIT = 0xFFFFFFFF
+# 中央目录中的“创建系统”记为 Unix，外部属性为普通文件 0644；
+# 记为 MS-DOS 时部分解压工具会把文件名按 OEM 代码页转换
+_MADE_BY = (3 << 8) | _ZIP64_VERSION
+_EXTERNAL_ATTR = 0o100644 << 16
+# raw deflate 流的结束块（空的最终块）
+_FINAL_BLOCK = zlib.compressobj(6, zlib.DEFLATED, -15).flush()
+
+
+class PackCancelled(Exception):
+    """打包被取消"""
+
+
+def _dos_time(timestamp):
+    t = time.localtime(max(timestamp, 315532800))  # zip 时间从 1980 年开始
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 4) | t.tm_mday)
+
+
+def _compress_chunk(data, zdict, level):
+    """独立压缩一块，以同步刷新结束（字节对齐，可与下一块直接拼接）"""
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def archive_names(paths):
+    """为文件生成压缩包内的相对路径（相对于所有文件的公共上级目录），重名时加序号"""
+    directories = [os.path.dirname(os.path.abspath(path)) for path in paths]
+    try:
+        base = os.path.commonpath(directories) if directories else ""
+    except ValueError:
+        # 不同盘符，保留去掉盘符后的完整路径
+        base = ""
+    names = []
+    taken = set()
+    for path in paths:
+        absolute = os.path.abspath(path)
+        if base:
+            name = os.path.relpath(absolute, base)
+        else:
+            name = os.path.splitdrive(absolute)[1].lstrip("\\/")
+        name = name.replace(os.sep, "/")
+        candidate = name
+        number = 2
+        while candidate.lower() in taken:
+            stem, ext = os.path.splitext(name)
+            candidate = f"{stem} ({number}){ext}"
+            number += 1
+        taken.add(candidate.lower())
+        names.append(candidate)
+    return names
+
+
+class ZipPacker:
+    """边读边写的 zip64 打包器
+
+    每个文件先写本地文件头（CRC 和大小占位），数据写完后回到文件头补写，
+    不需要数据描述符，也不会在内存中缓存整个文件。压缩时把文件切成 CHUNK_SIZE 的块
+    交给线程池（zlib 压缩时释放 GIL），每块以前一块末尾 32KB 为字典独立压缩，
+    同时在途的块数有上限，内存占用与文件大小无关。
+    """
+
+    def __init__(self, path, workers=4, level=6):
+        self.path = path
+        self.workers = workers
+        self.level = level
+        self.cancelled = threading.Event()
+        self.entries = []  # (名称, 方法, CRC, 压缩后大小, 原始大小, 本地头偏移, DOS 时间, DOS 日期)
+        self.stats = {"files": 0, "stored": 0, "deflated": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0}
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def pack(self, paths, on_progress=None, on_error=None):
+        """把 paths 打包到 self.path，返回统计信息；取消时删除未完成的压缩包并抛出 PackCancelled
+
+        on_progress(已处理字节, 总字节) 每处理一块调用一次；读取失败的文件调用
+        on_error(path, error) 后跳过。
+        """
+        sizes = {}
+        for path in paths:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError as e:
+                self.stats["errors"] += 1
+                if on_error is not None:
+                    on_error(path, e)
+        paths = [path for path in paths if path in sizes]
+        total = sum(sizes.values())
+        self.done = 0
+
+        def progress(count):
+            self.done += count
+            if on_progress is not None:
+                on_progress(self.done, total)
+
+        try:
+            with open(self.path, "wb") as output, ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for path, name in zip(paths, archive_names(paths)):
+                    if self.cancelled.is_set():
+                        raise PackCancelled()
+                    start = output.tell()
+                    try:
+                        self._add(output, executor, path, name, progress)
+                    except OSError as e:
+                        # 丢弃写了一半的条目
+                        output.seek(start)
+                        output.truncate()
+                        self.stats["errors"] += 1
+                        if on_error is not None:
+                            on_error(path, e)
+                self._finish(output)
+        except BaseException:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            raise
+        return self.stats
+
+    def _choose_method(self, path, size):
+        if size == 0 or os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+            return _STORED
+        with open(path, "rb") as f:
+            sample = f.read(SAMPLE_SIZE)
+        return _DEFLATED if len(zlib.compress(sample, 1)) < len(sample) * MIN_RATIO else _STORED
+
+    def _add(self, output, executor, path, name, progress):
+        stat = os.stat(path)
+        method = self._choose_method(path, stat.st_size)
+        dos_time, dos_date = _dos_time(stat.st_mtime)
+        encoded = name.encode("utf-8")
+        offset = output.tell()
+        # 本地文件头：大小放在 zip64 扩展字段中，写完数据后补写
+        output.write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, _ZIP64_VERSION, _UTF8_FLAG, method, dos_time, dos_date,
+            0, _ZIP64_LIMIT, _ZIP64_LIMIT, len(encoded), 20
+        ))
+        output.write(encoded)
+        output.write(struct.pack("<HHQQ", 0x0001, 16, 0, 0))
+
+        crc = 0
+        size = 0
+        compressed = 0
+        with open(path, "rb") as source:
+            if method == _STORED:
+                while True:
+                    if self.cancelled.is_set():
+                        raise PackCancelled()
+                    data = source.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    crc = zlib.crc32(data, crc)
+                    size += len(data)
+                    output.write(data)
+                    progress(len(data))
+                compressed = size
+            else:
+                pending = deque()
+                zdict = b""
+                while True:
+                    if self.cancelled.is_set():
+                        raise PackCancelled()
+                    data = source.read(CHUNK_SIZE)
+                    if data:
+                        crc = zlib.crc32(data, crc)
+                        size += len(data)
+                        pending.append((len(data), executor.submit(_compress_chunk, data, zdict, self.level)))
+                        zdict = data[-DICT_SIZE:]
+                    # 在途块数达到上限或已读完时，按顺序写出最早的块
+                    while pending and (not data or len(pending) >= self.workers * 2):
+                        length, future = pending.popleft()
+                        block = future.result()
+                        output.write(block)
+                        compressed += len(block)
+                        progress(length)
+                    if not data:
+                        break
+                output.write(_FINAL_BLOCK)
+                compressed += len(_FINAL_BLOCK)
+
+        end = output.tell()
+        output.seek(offset + 14)
+        output.write(struct.pack("<I", crc))
+        output.seek(offset + 30 + len(encoded) + 4)
+        output.write(struct.pack("<QQ", size, compressed))
+        output.seek(end)
+
+        self.entries.append((encoded, method, crc, compressed, size, offset, dos_time, dos_date))
+        self.stats["files"] += 1
+        self.stats["stored" if method == _STORED else "deflated"] += 1
+        self.stats["bytes_in"] += size
+        self.stats["bytes_out"] += compressed
+
+    def _finish(self, output):
+        """写中央目录，需要时写 zip64 结束记录"""
+        directory_offset = output.tell()
+        for encoded, method, crc, compressed, size, offset, dos_time, dos_date in self.entries:
+            extra = b""
+            fields = []
+            for value in (size, compressed, offset):
+                if value >= _ZIP64_LIMIT:
+                    fields.append(value)
+            if fields:
+                extra = struct.pack("<HH", 0x0001, 8 * len(fields)) + struct.pack(f"<{len(fields)}Q", *fields)
+            output.write(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, _MADE_BY, _ZIP64_VERSION, _UTF8_FLAG, method,
+                dos_time, dos_date, crc, min(compressed, _ZIP64_LIMIT), min(size, _ZIP64_LIMIT),
+                len(encoded), len(extra), 0, 0, 0, _EXTERNAL_ATTR, min(offset, _ZIP64_LIMIT)
+            ))
+            output.write(encoded)
+            output.write(extra)
+        directory_size = output.tell() - directory_offset
+        count = len(self.entries)
+
+        if count >= 0xFFFF or directory_offset >= _ZIP64_LIMIT or directory_size >= _ZIP64_LIMIT:
+            zip64_offset = output.tell()
+            output.write(struct.pack(
+                "<IQHHIIQQQQ", 0x06064B50, 44, _ZIP64_VERSION, _ZIP64_VERSION, 0, 0,
+                count, count, directory_size, directory_offset
+            ))
+            output.write(struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1))
+        output.write(struct.pack(
+            "<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(directory_size, _ZIP64_LIMIT), min(directory_offset, _ZIP64_LIMIT), 0
+        ))
@@ -0,0 +1,194 @@
+"""基于 asyncio 的扫描引擎，面向每次列目录都是一次网络往返的 SMB 等共享目录
+
+Python 没有异步的目录读取接口，目录仍在有界线程池中读取（IncrementalScanner.visit），
+由事件循环决定同时在途的目录数：每个设备一个 AdaptiveLimit，按观测到的读取延迟
+自动增减并发，延迟不变时增加，排队导致延迟上升时减少。
+回调协议与 ScanScheduler 的 ScanJob 相同：("file", 记录)、("remove", 路径列表)、
+("error", 消息)、写检查点前的 ("checkpoint", 根目录)，每个根目录最后一条总是 ("done", 根目录)。
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.incremental import IncrementalScanner
+from core.walker import DOC_EXTENSIONS
+
+
+class AdaptiveLimit:
+    """按延迟梯度调整的并发上限
+
+    以观测到的最小延迟作为无排队时的基准，gradient = 基准 / 平滑后的延迟：
+    延迟接近基准时上限按 sqrt(上限) 增长，延迟上升时按比例收缩（每次至多减半）。
+    基准缓慢上浮，服务器整体变慢后不会一直停留在过低的上限。
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, smoothing=0.2, drift=1.001):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.smoothing = smoothing
+        self.drift = drift
+        self.limit = float(initial)
+        self.min_latency = None
+        self.latency = None
+
+    def update(self, latency):
+        """记录一次目录读取耗时（秒），返回新的并发上限"""
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        else:
+            self.min_latency *= self.drift
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += (latency - self.latency) * self.smoothing
+        gradient = max(0.5, min(1.0, self.min_latency / self.latency)) if self.latency > 0 else 1.0
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit += (target - self.limit) * self.smoothing
+        self.limit = max(self.minimum, min(self.maximum, self.limit))
+        return self.limit
+
+    def capacity(self):
+        return max(self.minimum, int(self.limit))
+
+
+class _DeviceGate:
+    """限制同一设备上在途的目录读取数（只在事件循环线程中使用）"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.inflight = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.inflight < self.limit.capacity())
+            self.inflight += 1
+
+    async def release(self, latency):
+        async with self.condition:
+            self.inflight -= 1
+            self.limit.update(latency)
+            self.condition.notify_all()
+
+
+class AsyncScanEngine:
+    """用事件循环驱动多个根目录的增量扫描，结果写回索引
+
+    max_workers 为读取目录的线程数上限，即所有设备在途目录数之和的上限；
+    每个设备的并发在 [1, max_per_device] 之间自适应。
+    """
+
+    def __init__(self, index, extensions=DOC_EXTENSIONS, max_workers=64, initial=4, max_per_device=64,
+                 on_error=None, metrics=None):
+        self.scanner = IncrementalScanner(index, extensions, on_error, metrics)
+        self.metrics = metrics
+        self.max_workers = max(1, max_workers)
+        self.initial = initial
+        self.max_per_device = max_per_device
+        self.limits = {}  # 设备号 -> AdaptiveLimit，多次 run 之间保留学到的并发
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """停止扫描：在途的目录读完后写下检查点，不再回调"""
+        self.cancelled.set()
+
+    def run(self, roots, callback, rules=None, resume=True):
+        """在当前线程中扫描所有根目录，全部完成（或取消）后返回
+
+        rules 为 core.scan_rules.RuleSet；resume 时从 ScanScheduler 或本引擎留下的检查点继续。
+        """
+        self.cancelled.clear()
+        asyncio.run(self._run(roots, callback, rules, resume))
+
+    async def _run(self, roots, callback, rules, resume):
+        loop = asyncio.get_running_loop()
+        gates = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            await asyncio.gather(*(
+                self._scan_root(loop, executor, gates, root, callback,
+                                rules.for_root(root) if rules is not None else None, resume)
+                for root in roots
+            ))
+
+    async def _scan_root(self, loop, executor, gates, root, callback, rules, resume):
+        try:
+            device = (await loop.run_in_executor(executor, os.stat, root)).st_dev
+        except OSError:
+            device = None
+        gate = gates.get(device)
+        if gate is None:
+            limit = self.limits.get(device)
+            if limit is None:
+                limit = self.limits[device] = AdaptiveLimit(self.initial, maximum=self.max_per_device)
+            gate = gates[device] = _DeviceGate(limit)
+
+        def on_change(kind, record):
+            # 与 ScanJob.on_change 一样在 state.lock 内调用
+            if not self.cancelled.is_set():
+                callback("file", record)
+
+        error = None
+        state = None
+        stack = []
+        running = {}  # 任务 -> 目录
+        try:
+            state = await loop.run_in_executor(executor, self.scanner.begin, root, on_change, (), rules, resume)
+            # 从检查点继续时不列出根目录
+            stack = list(reversed(state.frontier)) if state.frontier is not None else [root]
+            while stack or running:
+                if not self.cancelled.is_set():
+                    # 只为可能立即开始的目录创建任务，待访问目录再多也不会堆积协程
+                    while stack and len(running) < gate.limit.capacity():
+                        directory = stack.pop()
+                        running[asyncio.ensure_future(self._visit(loop, executor, gate, state, directory))] = directory
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del running[task]
+                    # 子目录之外的错误都是根目录或索引的错误，结束该根目录
+                    stack.extend(reversed(task.result()))
+        except Exception as e:
+            error = e
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+        if self.cancelled.is_set():
+            if error is None and state is not None:
+                # 在途目录都已读完，不会再有 "file" 回调；让消费者送出缓冲的结果再写检查点
+                callback("checkpoint", root)
+                await loop.run_in_executor(executor, self._save_checkpoint, state, stack[::-1])
+            return
+        if error is None:
+            try:
+                delta = await loop.run_in_executor(executor, self.scanner.finish, state)
+                if delta.removed:
+                    callback("remove", delta.removed)
+            except Exception as e:
+                error = e
+        if error is not None:
+            callback("error", f"搜索目录 {root} 时出错: {str(error)}")
+        callback("done", root)
+
+    async def _visit(self, loop, executor, gate, state, directory):
+        await gate.acquire()
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, self.scanner.visit, state, directory)
+        finally:
+            latency = time.perf_counter() - start
+            await gate.release(latency)
+            if self.metrics is not None:
+                self.metrics.observe("scan.latency", latency)
+                self.metrics.observe("scan.concurrency", gate.limit.capacity(), "count")
+
+    def _save_checkpoint(self, state, frontier):
+        """取消时所有在途目录都已读完，待访问的目录即为检查点"""
+        try:
+            self.scanner.save_checkpoint(state, frontier, self.scanner.snapshot(state))
+        except Exception as e:
+            print(f"保存扫描检查点 {state.root} 时出错: {e}")
@@ -0,0 +1,288 @@
+"""命令行入口（无界面），可用于服务器或定时任务
+
+用法:
+    python -m core scan [目录 ...] [--type word|excel|ppt] [--format jsonl|csv|xlsx] [-o 文件]
+    python -m core scan --index file_index.db      # 先增量刷新索引，再从索引导出
+    python -m core scan --metrics 指标.json        # 同时记录各阶段耗时
+    python -m core scan --exclude-dir node_modules --max-depth 3   # 追加排除规则
+    python -m core scan --index --engine async --workers 64       # 网络共享：按延迟自适应并发
+    python -m core organize 规则.json [--apply]     # 按规则整理，默认只显示计划
+    python -m core organize --resume 日志.jsonl | --rollback 日志.jsonl
+    python -m core pack 输出.zip [目录 ...] [--type word|excel|ppt]  # 把文档打包为 zip
+
+main.py 带参数运行时（python main.py scan ...，或打包后的 exe）同样进入本入口，不创建窗口；
+file_organizer.py 只是界面，直接运行它需要 Tk。
+
+未指定目录时使用界面中保存的目录（ConfigManager），扫描规则（core.scan_rules）同样取自配置，
+可用 --no-rules 忽略。出现任何读取错误时退出码为 1。
+"""
+import argparse
+import sys
+
+from core.export import FILE_FORMATS, create_writer, open_writer
+from core.file_index import DEFAULT_INDEX_PATH
+from core.file_types import FILE_TYPES, TYPE_ALIASES, extensions_for
+from core.walker import DOC_EXTENSIONS
+
+
+def configured_directories():
+    """读取界面保存的目录配置"""
+    from core.config import ConfigManager
+    return ConfigManager().get_directories()
+
+
+def saved_rules():
+    """读取界面保存的扫描规则；没有配置模块（或其中没有规则）时为空，即默认规则"""
+    try:
+        from core.config import ConfigManager
+    except ImportError:
+        return {}
+    return ConfigManager().config.get("scan_rules") or {}
+
+
+def configured_rules(args):
+    """读取界面保存的扫描规则，再把命令行给出的规则加到每个根目录上，返回 RuleSet"""
+    from core.scan_rules import RuleSet
+    config_rules = {} if args.no_rules else saved_rules()
+    config_rules = {root: dict(spec) for root, spec in config_rules.items()}
+    config_rules.setdefault("*", {})
+    for spec in config_rules.values():
+        if args.exclude_dir:
+            spec["exclude_dirs"] = list(spec.get("exclude_dirs", [])) + args.exclude_dir
+        if args.max_depth is not None:
+            spec["max_depth"] = args.max_depth
+    return RuleSet(config_rules)
+
+
+def resolve_types(names):
+    """把命令行给出的分类简称或分类名换成扩展名集合，未指定时为全部文档类型"""
+    if not names:
+        return DOC_EXTENSIONS
+    categories = []
+    for name in names:
+        category = TYPE_ALIASES.get(name.lower(), name)
+        if category not in FILE_TYPES:
+            raise ValueError(f"未知的文件类型: {name}（可选 {', '.join(TYPE_ALIASES)}）")
+        categories.append(category)
+    return extensions_for(categories, DOC_EXTENSIONS)
+
+
+def open_output(path, fmt):
+    """创建写入器：写到文件，或在未指定文件时写到标准输出"""
+    if path is not None and path != "-":
+        return open_writer(path, fmt)
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", newline="" if fmt == "csv" else None)
+    return create_writer(fmt, sys.stdout)
+
+
+def scan_command(args):
+    try:
+        extensions = resolve_types(args.type)
+        roots = args.directories or configured_directories()
+        rules = configured_rules(args)
+        if args.format == "xlsx" and args.output in (None, "-"):
+            raise ValueError("XLSX 格式需要用 -o 指定输出文件")
+    except (ValueError, ImportError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    if not roots:
+        print("错误: 没有要扫描的目录", file=sys.stderr)
+        return 2
+
+    errors = []
+
+    def on_error(path, e):
+        # 目录与单个文件的读取错误都计入退出码
+        errors.append(path)
+        print(f"读取 {path} 时出错: {e}", file=sys.stderr)
+
+    metrics = None
+    if args.metrics:
+        from core.metrics import Metrics
+        # 命令行明确要求指标时记录全部细节
+        metrics = Metrics(detailed=True)
+    if args.index:
+        from core.file_index import FileIndex
+        from core.inventory import refresh_index
+        index = FileIndex(args.index)
+        for message in refresh_index(index, roots, args.workers, args.per_device, on_error, metrics, rules,
+                                     args.engine):
+            errors.append(message)
+            print(message, file=sys.stderr)
+        records = (record for record in index.iter_records(roots) if record["type"].lower() in extensions)
+    else:
+        from core.inventory import iter_documents
+        index = None
+        records = iter_documents(roots, extensions, on_error, metrics, rules)
+
+    count = 0
+    try:
+        writer = open_output(args.output, args.format)
+        try:
+            for record in records:
+                writer.write(record)
+                count += 1
+        finally:
+            writer.close()
+    except BrokenPipeError:
+        # 下游（如 head）提前关闭管道
+        pass
+    except (OSError, ValueError) as e:
+        errors.append(args.output)
+        print(f"写入 {args.output} 时出错: {e}", file=sys.stderr)
+    finally:
+        if index is not None:
+            index.close()
+    print(f"共 {count} 个文件，{len(errors)} 个错误", file=sys.stderr)
+    if metrics is not None:
+        print(metrics.summary(), file=sys.stderr)
+        try:
+            metrics.dump(args.metrics)
+        except OSError as e:
+            print(f"写入 {args.metrics} 时出错: {e}", file=sys.stderr)
+            return 1
+    return 1 if errors else 0
+
+
+def organize_command(args):
+    from core.organize import Organizer, describe, load_rules, new_journal_path, plan_operations
+    from core.inventory import iter_documents
+
+    failures = []
+
+    def on_error(op, e):
+        failures.append(op)
+        print(f"{op['src']} -> {op['dst']} 失败: {e}", file=sys.stderr)
+
+    organizer = Organizer(args.workers, args.verify)
+    if args.resume or args.rollback:
+        journal = args.resume or args.rollback
+        try:
+            if args.resume:
+                done, failed = organizer.resume(journal, on_error=on_error)
+                print(f"续做完成 {done} 项，失败 {failed} 项，日志 {journal}", file=sys.stderr)
+            else:
+                done, failed = organizer.rollback(journal, on_error=on_error)
+                print(f"回滚 {done} 项，失败 {failed} 项，日志 {journal}", file=sys.stderr)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"错误: 无法读取日志 {journal}: {e}", file=sys.stderr)
+            return 2
+        return 1 if failed else 0
+
+    if not args.rules:
+        print("错误: 需要指定规则文件", file=sys.stderr)
+        return 2
+    try:
+        rules = load_rules(args.rules)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"错误: 无法读取规则 {args.rules}: {e}", file=sys.stderr)
+        return 2
+
+    errors = []
+
+    def on_scan_error(path, e):
+        errors.append(path)
+        print(f"读取 {path} 时出错: {e}", file=sys.stderr)
+
+    roots = sorted({rule.root for rule in rules})
+    plan = plan_operations(rules, iter_documents(roots, on_error=on_scan_error))
+    for op in plan:
+        print(f"{op['action']}\t{op['src']}\t{op['dst']}")
+    print(describe(plan), file=sys.stderr)
+    if not args.apply or not plan:
+        return 1 if errors else 0
+
+    journal = args.journal or new_journal_path()
+    done, failed = organizer.run(plan, journal, on_error=on_error)
+    print(f"完成 {done} 项，失败 {failed} 项，日志 {journal}", file=sys.stderr)
+    return 1 if failed or errors else 0
+
+
+def pack_command(args):
+    from core.archive import PackCancelled, ZipPacker
+    from core.inventory import iter_documents
+
+    try:
+        extensions = resolve_types(args.type)
+        roots = args.directories or configured_directories()
+        rules = configured_rules(args)
+    except (ValueError, ImportError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    if not roots:
+        print("错误: 没有要打包的目录", file=sys.stderr)
+        return 2
+
+    errors = []
+
+    def on_error(path, e):
+        errors.append(path)
+        print(f"读取 {path} 时出错: {e}", file=sys.stderr)
+
+    paths = [record["path"] for record in iter_documents(roots, extensions, on_error, rules=rules)]
+    packer = ZipPacker(args.output, args.workers, args.level)
+    try:
+        stats = packer.pack(paths, on_error=on_error)
+    except KeyboardInterrupt:
+        print("打包已取消", file=sys.stderr)
+        return 1
+    except (OSError, PackCancelled) as e:
+        print(f"写入 {args.output} 时出错: {e}", file=sys.stderr)
+        return 1
+    print(f"共 {stats['files']} 个文件（存储 {stats['stored']}，压缩 {stats['deflated']}），"
+          f"{stats['bytes_in'] / 1024 / 1024:.1f}MB → {stats['bytes_out'] / 1024 / 1024:.1f}MB，"
+          f"{len(errors)} 个错误", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def add_rule_arguments(parser):
+    parser.add_argument("--exclude-dir", action="append", metavar="GLOB",
+                        help="不下探的子目录（目录名或相对路径通配符），可重复")
+    parser.add_argument("--max-depth", type=int, help="最大下探层数，0 表示只列根目录")
+    parser.add_argument("--no-rules", action="store_true", help="忽略配置中的扫描规则")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core", description="文件整理小助手命令行")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="扫描目录并导出文档清单")
+    scan.add_argument("directories", nargs="*", help="要扫描的目录，默认使用界面中保存的目录")
+    scan.add_argument("--type", action="append", help="只导出某类文件（word/excel/ppt），可重复")
+    scan.add_argument("--format", choices=FILE_FORMATS, default="jsonl")
+    scan.add_argument("-o", "--output", help="输出文件，默认写到标准输出")
+    scan.add_argument("--index", nargs="?", const=DEFAULT_INDEX_PATH,
+                      help=f"先增量刷新持久化索引（默认 {DEFAULT_INDEX_PATH}），再从索引导出")
+    scan.add_argument("--workers", type=int, default=8, help="使用索引时的扫描线程数")
+    scan.add_argument("--per-device", type=int, default=4, help="使用索引时每个磁盘的并发数")
+    scan.add_argument("--engine", choices=("threads", "async"), default="threads",
+                      help="使用索引时的扫描引擎，async 按读取延迟自适应并发（适合网络共享）")
+    scan.add_argument("--metrics", metavar="JSON", help="把各阶段的计数与耗时分布写到 JSON 文件")
+    add_rule_arguments(scan)
+    scan.set_defaults(handler=scan_command)
+
+    organize = commands.add_parser("organize", help="按规则移动或复制文件")
+    organize.add_argument("rules", nargs="?", help="规则文件（JSON）")
+    organize.add_argument("--apply", action="store_true", help="实际执行（默认只列出计划）")
+    organize.add_argument("--journal", help="日志文件，默认写到 organize_journals/ 下")
+    organize.add_argument("--resume", metavar="JOURNAL", help="续做中断的整理")
+    organize.add_argument("--rollback", metavar="JOURNAL", help="撤销一次整理")
+    organize.add_argument("--workers", type=int, default=4, help="并行复制的线程数")
+    organize.add_argument("--verify", choices=("size", "hash"), default="size", help="复制后的校验方式")
+    organize.set_defaults(handler=organize_command)
+
+    pack = commands.add_parser("pack", help="把文档打包为 zip")
+    pack.add_argument("output", help="输出的 zip 文件")
+    pack.add_argument("directories", nargs="*", help="要打包的目录，默认使用界面中保存的目录")
+    pack.add_argument("--type", action="append", help="只打包某类文件（word/excel/ppt），可重复")
+    pack.add_argument("--workers", type=int, default=4, help="并行压缩的线程数")
+    pack.add_argument("--level", type=int, choices=range(1, 10), default=6, metavar="1-9", help="压缩级别")
+    add_rule_arguments(pack)
+    pack.set_defaults(handler=pack_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
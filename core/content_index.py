@@ -0,0 +1,173 @@
+"""文档内容全文索引：直接从 OOXML 压缩包中提取文本，不启动 Office"""
+import os
+import sqlite3
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import iterparse
+
+# 内容索引默认与文件索引放在同一工作目录下
+DEFAULT_CONTENT_PATH = "content_index.db"
+
+# 三元组分词至少需要 3 个字符，更短的查询只匹配文件名
+MIN_QUERY_LENGTH = 3
+
+# 每批提交给进程池并写入数据库的文件数
+BATCH_SIZE = 256
+
+# 各格式存放正文的压缩包成员；旧版二进制格式（.doc/.xls/.ppt）不提取
+_TEXT_PARTS = {
+    ".docx": lambda names: [name for name in names if name == "word/document.xml"],
+    ".xlsx": lambda names: [name for name in names if name == "xl/sharedStrings.xml"],
+    ".pptx": lambda names: sorted(
+        (name for name in names if name.startswith("ppt/slides/slide") and name.endswith(".xml")),
+        key=lambda name: int("".join(c for c in name if c.isdigit()) or 0)
+    ),
+}
+
+
+def is_indexable(path):
+    return os.path.splitext(path)[1].lower() in _TEXT_PARTS
+
+
+def extract_text(path):
+    """提取文档中所有文本节点（w:t / a:t / t）的内容，按段落换行"""
+    parts = _TEXT_PARTS.get(os.path.splitext(path)[1].lower())
+    if parts is None:
+        return ""
+    pieces = []
+    with zipfile.ZipFile(path) as archive:
+        for name in parts(archive.namelist()):
+            with archive.open(name) as stream:
+                # 流式解析：处理完的元素立即清空，大文档也不会整体载入内存
+                for _, element in iterparse(stream):
+                    tag = element.tag.rsplit("}", 1)[-1]
+                    if tag == "t":
+                        if element.text:
+                            pieces.append(element.text)
+                    elif tag in ("p", "si"):
+                        pieces.append("\n")
+                    element.clear()
+    return "".join(pieces)
+
+
+def _extract(path):
+    """进程池中执行的提取，出错时返回 None（不写入索引，下次更新时重试）"""
+    try:
+        return extract_text(path)
+    except Exception:
+        return None
+
+
+def trigram_supported():
+    """当前 SQLite 是否带有 FTS5 与三元组分词（SQLite 3.34 起提供）"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(text, tokenize='trigram')")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+class ContentIndex:
+    """基于 SQLite FTS5 三元组分词的倒排索引，支持任意子串（含中文）查询
+
+    docs 表记录每个文件索引时的修改时间，update 只提取新增或修改过的文件；
+    提取在进程池中进行，能利用多核。写入使用独立连接，界面线程查询不会被长时间阻塞。
+    SQLite 不支持三元组分词时抛出 RuntimeError。
+    """
+
+    def __init__(self, db_path=DEFAULT_CONTENT_PATH, workers=None):
+        if not trigram_supported():
+            raise RuntimeError(f"当前 SQLite {sqlite3.sqlite_version} 不支持 FTS5 三元组分词（需要 3.34 或更高版本）")
+        self.db_path = db_path
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.conn = self._connect()
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS docs (
+                    id    INTEGER PRIMARY KEY,
+                    path  TEXT NOT NULL UNIQUE,
+                    mtime REAL NOT NULL
+                )
+            """)
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(text, tokenize='trigram')"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL 模式下写入期间仍可查询
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def update(self, records, on_progress=None, cancelled=None):
+        """按 (路径, 修改时间) 增量更新索引，records 为当前全部文件记录
+
+        不在 records 中的文件从索引删除。on_progress(done, total) 每批调用一次；
+        cancelled() 返回 True 时在当前批次写入后停止。返回 (提取的文件数, 提取失败的文件数)，
+        提取失败的文件不写入索引（原有内容一并删除），下次更新时重试。
+        """
+        current = {record["path"]: record["mtime"] for record in records if is_indexable(record["path"])}
+        conn = self._connect()
+        try:
+            indexed = dict(conn.execute("SELECT path, mtime FROM docs"))
+            removed = [path for path in indexed if path not in current]
+            pending = [path for path, mtime in current.items() if indexed.get(path) != mtime]
+            with conn:
+                for path in removed:
+                    self._delete(conn, path)
+            if not pending:
+                return 0, 0
+
+            done = 0
+            failed = 0
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for start in range(0, len(pending), BATCH_SIZE):
+                    batch = pending[start:start + BATCH_SIZE]
+                    texts = list(executor.map(_extract, batch, chunksize=16))
+                    with conn:
+                        for path, text in zip(batch, texts):
+                            self._delete(conn, path)
+                            if text is None:
+                                failed += 1
+                                continue
+                            doc_id = conn.execute(
+                                "INSERT INTO docs (path, mtime) VALUES (?, ?)", (path, current[path])
+                            ).lastrowid
+                            conn.execute("INSERT INTO content (rowid, text) VALUES (?, ?)", (doc_id, text))
+                    done += len(batch)
+                    if on_progress is not None:
+                        on_progress(done, len(pending))
+                    if cancelled is not None and cancelled():
+                        break
+            return done - failed, failed
+        finally:
+            conn.close()
+
+    def _delete(self, conn, path):
+        row = conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM content WHERE rowid = ?", row)
+            conn.execute("DELETE FROM docs WHERE id = ?", row)
+
+    def search(self, query):
+        """返回内容包含 query 的文件路径列表（不区分大小写）；查询过短时返回 None"""
+        query = query.strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            return None
+        # 整体作为短语查询，即子串匹配
+        phrase = '"' + query.replace('"', '""') + '"'
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT docs.path FROM content JOIN docs ON docs.id = content.rowid WHERE content MATCH ?",
+                (phrase,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,138 @@
+"""按内容查找重复文档：先按大小分组，再比较首尾哈希，最后才计算完整哈希"""
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# 首尾哈希各读取的字节数
+PARTIAL_SIZE = 64 * 1024
+# 完整哈希每次读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+
+def partial_hash(path, size):
+    """文件开头和结尾各 PARTIAL_SIZE 字节的哈希；小文件即为完整内容的哈希"""
+    digest = _new_hash()
+    with open(path, "rb") as f:
+        digest.update(f.read(PARTIAL_SIZE))
+        if size > PARTIAL_SIZE:
+            f.seek(max(PARTIAL_SIZE, size - PARTIAL_SIZE))
+            digest.update(f.read(PARTIAL_SIZE))
+    return digest.digest()
+
+
+def full_hash(path):
+    """流式计算完整内容的哈希"""
+    digest = _new_hash()
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            # 文件读取和超过 2KB 的 update 都会释放 GIL，多个线程可以并行读盘和计算
+            digest.update(view[:count])
+    return digest.digest()
+
+
+class DuplicateFinder:
+    """在扫描结果中查找内容完全相同的文件
+
+    大小不同的文件不可能重复，绝大多数文件在第一步就被排除；大小相同的再比较首尾
+    各 64KB，只有首尾也相同的才读取全文。哈希按 (路径, 大小, 修改时间) 缓存在
+    文件索引中，再次查找时未变化的文件不会重新读取。
+    """
+
+    def __init__(self, index=None, workers=4, min_size=1):
+        self.index = index
+        self.workers = workers
+        self.min_size = min_size  # 小于该大小的文件不参与比较（默认跳过空文件）
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"files": 0, "candidates": 0, "partial_hashed": 0, "full_hashed": 0,
+                      "cache_hits": 0, "bytes_read": 0, "errors": 0}
+
+    def find(self, records, on_progress=None):
+        """返回重复文件分组（每组为记录列表），按可节省的空间从大到小排列
+
+        on_progress(stage, done, total) 在调用 find 的线程中调用，stage 为 "partial" 或 "full"。
+        """
+        self.reset_stats()
+        by_path = {record["path"]: record for record in records}
+        self.stats["files"] = len(by_path)
+
+        by_size = {}
+        for record in by_path.values():
+            if record["size"] >= self.min_size:
+                by_size.setdefault(record["size"], []).append(record)
+        candidates = [record for group in by_size.values() if len(group) > 1 for record in group]
+        self.stats["candidates"] = len(candidates)
+        if not candidates:
+            return []
+
+        cache = self.index.load_hashes() if self.index is not None else {}
+        hashes = {}  # 路径 -> [首尾哈希, 完整哈希或 None]
+        for record in candidates:
+            cached = cache.get(record["path"])
+            if cached is not None and cached[0] == record["size"] and cached[1] == record["mtime"]:
+                hashes[record["path"]] = [cached[2], cached[3]]
+        self.stats["cache_hits"] = len(hashes)
+        changed = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # 第二步：首尾哈希
+            pending = [record for record in candidates if record["path"] not in hashes]
+            for record, digest in self._run(executor, pending, "partial", on_progress):
+                self.stats["partial_hashed"] += 1
+                self.stats["bytes_read"] += min(record["size"], 2 * PARTIAL_SIZE)
+                # 不超过两段读取长度的小文件，首尾哈希已覆盖全部内容
+                full = digest if record["size"] <= 2 * PARTIAL_SIZE else None
+                hashes[record["path"]] = [digest, full]
+                changed.add(record["path"])
+            groups = self._group(candidates, hashes, 0)
+
+            # 第三步：完整哈希
+            pending = [record for group in groups for record in group if hashes[record["path"]][1] is None]
+            for record, digest in self._run(executor, pending, "full", on_progress):
+                self.stats["full_hashed"] += 1
+                self.stats["bytes_read"] += record["size"]
+                hashes[record["path"]][1] = digest
+                changed.add(record["path"])
+            groups = self._group([record for group in groups for record in group], hashes, 1)
+
+        if self.index is not None and changed:
+            self.index.save_hashes([
+                (path, by_path[path]["size"], by_path[path]["mtime"]) + tuple(hashes[path])
+                for path in changed
+            ])
+        groups.sort(key=lambda group: group[0]["size"] * (len(group) - 1), reverse=True)
+        return groups
+
+    def _run(self, executor, records, stage, on_progress):
+        """并行计算哈希，按提交顺序逐个产出 (记录, 哈希)；读取失败的文件被跳过"""
+        if stage == "partial":
+            futures = [(record, executor.submit(partial_hash, record["path"], record["size"]))
+                       for record in records]
+        else:
+            futures = [(record, executor.submit(full_hash, record["path"])) for record in records]
+        for done, (record, future) in enumerate(futures, 1):
+            try:
+                yield record, future.result()
+            except OSError as e:
+                self.stats["errors"] += 1
+                print(f"读取文件 {record['path']} 时出错: {e}")
+            if on_progress is not None:
+                on_progress(stage, done, len(futures))
+
+    def _group(self, records, hashes, slot):
+        """按 (大小, 哈希) 分组，只保留有多个文件的组；没有哈希的文件（读取失败）被丢弃"""
+        groups = {}
+        for record in records:
+            digest = hashes.get(record["path"])
+            if digest is not None and digest[slot] is not None:
+                groups.setdefault((record["size"], digest[slot]), []).append(record)
+        return [group for group in groups.values() if len(group) > 1]
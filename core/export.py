@@ -0,0 +1,188 @@
+"""文件记录的流式导出：逐条写出，不在内存中积累"""
+import csv
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from core.file_index import RECORD_FIELDS
+
+# 可写到任意文本流的格式；XLSX 只能写到文件
+FORMATS = ("jsonl", "csv")
+FILE_FORMATS = FORMATS + ("xlsx",)
+
+# 工作表最多 1048576 行（含表头）
+XLSX_MAX_ROWS = 1048575
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class JsonLinesWriter:
+    """每条记录一行 JSON"""
+
+    def __init__(self, stream, fields=RECORD_FIELDS, headers=None):
+        self.stream = stream
+        self.fields = fields
+        self.keys = headers or fields
+
+    def write(self, record):
+        self.stream.write(json.dumps(
+            {key: record[field] for key, field in zip(self.keys, self.fields)}, ensure_ascii=False
+        ))
+        self.stream.write("\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class CsvWriter:
+    """带表头的 CSV"""
+
+    def __init__(self, stream, fields=RECORD_FIELDS, headers=None):
+        self.stream = stream
+        self.fields = fields
+        self.writer = csv.writer(stream)
+        self.writer.writerow(headers or fields)
+
+    def write(self, record):
+        self.writer.writerow([record[field] for field in self.fields])
+
+    def close(self):
+        self.stream.flush()
+
+
+class XlsxWriter:
+    """只写的最小 XLSX：工作表 XML 边生成边压缩写入，内存占用与行数无关
+
+    文本使用内联字符串（不建共享字符串表），数值原样写出。
+    """
+
+    def __init__(self, path, fields=RECORD_FIELDS, headers=None, flush_rows=1000):
+        self.fields = fields
+        self.flush_rows = flush_rows
+        self.rows = 0
+        self.pending = []
+        self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+        try:
+            for name, content in _XLSX_PARTS.items():
+                self.archive.writestr(name, content)
+            self.sheet = self.archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+            self.sheet.write(_SHEET_HEAD.encode("utf-8"))
+            self._append(headers or fields)
+        except Exception:
+            self.archive.close()
+            raise
+
+    def write(self, record):
+        if self.rows >= XLSX_MAX_ROWS:
+            raise ValueError(f"XLSX 最多只能导出 {XLSX_MAX_ROWS} 行")
+        self._append([record[field] for field in self.fields])
+        self.rows += 1
+
+    def _append(self, values):
+        cells = []
+        for value in values:
+            if value is None:
+                cells.append("<c/>")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f"<c><v>{value!r}</v></c>")
+            else:
+                text = escape(_INVALID_XML.sub("", str(value)))
+                cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        self.pending.append("<row>" + "".join(cells) + "</row>")
+        if len(self.pending) >= self.flush_rows:
+            self._flush()
+
+    def _flush(self):
+        self.sheet.write("".join(self.pending).encode("utf-8"))
+        self.pending = []
+
+    def close(self):
+        self._flush()
+        self.sheet.write(_SHEET_TAIL.encode("utf-8"))
+        self.sheet.close()
+        self.archive.close()
+
+
+class _ClosingWriter:
+    """包装文本写入器，关闭时同时关闭文件"""
+
+    def __init__(self, writer, stream):
+        self.writer = writer
+        self.stream = stream
+        self.write = writer.write
+
+    def close(self):
+        try:
+            self.writer.close()
+        finally:
+            self.stream.close()
+
+
+def create_writer(fmt, stream, fields=RECORD_FIELDS, headers=None):
+    """按格式名创建写入器，stream 为文本流（CSV 需以 newline='' 打开）"""
+    if fmt == "jsonl":
+        return JsonLinesWriter(stream, fields, headers)
+    if fmt == "csv":
+        return CsvWriter(stream, fields, headers)
+    raise ValueError(f"不支持的导出格式: {fmt}")
+
+
+def open_writer(path, fmt=None, fields=RECORD_FIELDS, headers=None):
+    """创建写入到文件的写入器，fmt 省略时按扩展名判断（.csv/.xlsx/.jsonl）"""
+    if fmt is None:
+        fmt = path.rsplit(".", 1)[-1].lower() if "." in path else "csv"
+    if fmt == "xlsx":
+        return XlsxWriter(path, fields, headers)
+    # CSV 带 BOM，方便 Excel 直接打开
+    stream = open(path, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="")
+    try:
+        return _ClosingWriter(create_writer(fmt, stream, fields, headers), stream)
+    except Exception:
+        stream.close()
+        raise
+
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="文件列表" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
@@ -0,0 +1,272 @@
+"""基于 SQLite 的持久化文件索引，启动时无需重新扫描即可显示文件列表"""
+import sqlite3
+import threading
+
+from core.walker import FileRecord
+
+# 索引文件默认与配置文件放在同一工作目录下
+DEFAULT_INDEX_PATH = "file_index.db"
+
+RECORD_FIELDS = ("path", "name", "type", "size", "ctime", "mtime")
+
+# 表结构版本，不一致时重建索引（索引只是扫描结果的缓存，可随时重建）
+SCHEMA_VERSION = 1
+
+# 子目录列表在 dirs 表中的分隔符（路径中不可能出现 NUL）
+_SUBDIR_SEP = "\0"
+
+
+class FileIndex:
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        # 扫描线程与界面线程共用同一连接，由 self.lock 串行化
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS files")
+                self.conn.execute("DROP TABLE IF EXISTS dirs")
+                self.conn.execute("DROP TABLE IF EXISTS roots")
+                self.conn.execute("DROP TABLE IF EXISTS checkpoints")
+                self.conn.execute("DROP TABLE IF EXISTS hashes")
+                self.conn.execute("DROP TABLE IF EXISTS metadata")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    root  TEXT NOT NULL,
+                    path  TEXT NOT NULL,
+                    name  TEXT NOT NULL,
+                    type  TEXT NOT NULL,
+                    size  INTEGER NOT NULL,
+                    ctime REAL NOT NULL,
+                    mtime REAL NOT NULL,
+                    PRIMARY KEY (root, path)
+                ) WITHOUT ROWID
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_path ON files (path)")
+            # 每个目录上次列出时的状态，用于增量扫描
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS dirs (
+                    root    TEXT NOT NULL,
+                    path    TEXT NOT NULL,
+                    mtime   REAL NOT NULL,
+                    entries INTEGER NOT NULL,
+                    scanned REAL NOT NULL,
+                    subdirs TEXT NOT NULL,
+                    PRIMARY KEY (root, path)
+                ) WITHOUT ROWID
+            """)
+            # 每个根目录扫描时使用的排除规则（core.scan_rules），没有记录等同于没有规则
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS roots (
+                    root  TEXT PRIMARY KEY,
+                    rules TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            # 未完成扫描的检查点：扫描开始时间与尚待访问的目录，已完成目录的结果已写入 files/dirs
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    root     TEXT PRIMARY KEY,
+                    scanned  REAL NOT NULL,
+                    rules    TEXT NOT NULL,
+                    frontier TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            # 文件内容哈希缓存（查找重复文件用），大小或修改时间变化即失效
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS hashes (
+                    path    TEXT PRIMARY KEY,
+                    size    INTEGER NOT NULL,
+                    mtime   REAL NOT NULL,
+                    partial BLOB NOT NULL,
+                    full    BLOB
+                ) WITHOUT ROWID
+            """)
+            # 文档属性缓存，修改时间变化即失效
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS metadata (
+                    path             TEXT PRIMARY KEY,
+                    mtime            REAL NOT NULL,
+                    title            TEXT,
+                    author           TEXT,
+                    last_modified_by TEXT,
+                    pages            INTEGER
+                ) WITHOUT ROWID
+            """)
+
+    def load(self, roots):
+        """读取指定根目录下的全部文件记录"""
+        roots = list(roots)
+        if not roots:
+            return []
+        placeholders = ",".join("?" * len(roots))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM files WHERE root IN ({placeholders})",
+                roots
+            ).fetchall()
+        return [FileRecord(*row) for row in rows]
+
+    def iter_records(self, roots, chunk_size=1000):
+        """逐批读取指定根目录下的文件记录（同一路径只产出一次），不会一次性载入内存"""
+        roots = list(roots)
+        if not roots:
+            return
+        placeholders = ",".join("?" * len(roots))
+        with self.lock:
+            cursor = self.conn.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM files WHERE root IN ({placeholders}) GROUP BY path",
+                roots
+            )
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield FileRecord(*row)
+
+    def root_paths(self, root):
+        """返回某个根目录下已索引的路径集合"""
+        with self.lock:
+            rows = self.conn.execute("SELECT path FROM files WHERE root = ?", (root,)).fetchall()
+        return {row[0] for row in rows}
+
+    def replace_root(self, root, records):
+        """用一次完整扫描的结果替换某个根目录的索引（同时清除目录状态）"""
+        rows = [(root,) + tuple(record[field] for field in RECORD_FIELDS) for record in records]
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM files WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM dirs WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM checkpoints WHERE root = ?", (root,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (root, path, name, type, size, ctime, mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def load_dir_states(self, root):
+        """读取某个根目录下各目录的状态 {路径: (mtime, 条目数, 列出时间, 子目录列表)}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT path, mtime, entries, scanned, subdirs FROM dirs WHERE root = ?", (root,)
+            ).fetchall()
+        return {
+            path: (mtime, entries, scanned, subdirs.split(_SUBDIR_SEP) if subdirs else [])
+            for path, mtime, entries, scanned, subdirs in rows
+        }
+
+    def load_rules(self, root):
+        """读取根目录上次扫描时的规则标识"""
+        with self.lock:
+            row = self.conn.execute("SELECT rules FROM roots WHERE root = ?", (root,)).fetchone()
+        return row[0] if row else ""
+
+    def load_checkpoint(self, root):
+        """读取未完成扫描的检查点 (扫描开始时间, 规则标识, 待访问目录列表)，没有时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT scanned, rules, frontier FROM checkpoints WHERE root = ?", (root,)
+            ).fetchone()
+        if row is None:
+            return None
+        scanned, rules, frontier = row
+        return scanned, rules, frontier.split(_SUBDIR_SEP) if frontier else []
+
+    def save_checkpoint(self, root, scanned, rules, frontier, changed, removed, dir_states):
+        """写入扫描中途的结果：新增或修改的记录、删除的路径、已完成目录的状态，以及待访问的目录"""
+        rows = [(root,) + tuple(record[field] for field in RECORD_FIELDS) for record in changed]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM files WHERE root = ? AND path = ?",
+                [(root, path) for path in removed]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (root, path, name, type, size, ctime, mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO dirs (root, path, mtime, entries, scanned, subdirs) VALUES (?, ?, ?, ?, ?, ?)",
+                [(root, path, mtime, entries, scanned_at, _SUBDIR_SEP.join(subdirs))
+                 for path, (mtime, entries, scanned_at, subdirs) in dir_states]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (root, scanned, rules, frontier) VALUES (?, ?, ?, ?)",
+                (root, scanned, rules, _SUBDIR_SEP.join(frontier))
+            )
+
+    def apply_delta(self, root, delta, dir_states, rules=""):
+        """把增量扫描结果写回索引，替换该根目录的目录状态与规则标识，并清除检查点"""
+        changed = [(root,) + tuple(record[field] for field in RECORD_FIELDS)
+                   for record in delta.added + delta.modified]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM files WHERE root = ? AND path = ?",
+                [(root, path) for path in delta.removed]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (root, path, name, type, size, ctime, mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                changed
+            )
+            self.conn.execute("DELETE FROM dirs WHERE root = ?", (root,))
+            self.conn.executemany(
+                "INSERT INTO dirs (root, path, mtime, entries, scanned, subdirs) VALUES (?, ?, ?, ?, ?, ?)",
+                [(root, path, mtime, entries, scanned, _SUBDIR_SEP.join(subdirs))
+                 for path, (mtime, entries, scanned, subdirs) in dir_states.items()]
+            )
+            self.conn.execute("INSERT OR REPLACE INTO roots (root, rules) VALUES (?, ?)", (root, rules))
+            self.conn.execute("DELETE FROM checkpoints WHERE root = ?", (root,))
+
+    def remove_root(self, root):
+        """删除某个根目录的全部索引记录，返回不再被其它根目录收录的路径"""
+        with self.lock, self.conn:
+            rows = self.conn.execute("""
+                SELECT path FROM files AS f WHERE root = ? AND NOT EXISTS (
+                    SELECT 1 FROM files WHERE path = f.path AND root != f.root
+                )
+            """, (root,)).fetchall()
+            self.conn.execute("DELETE FROM files WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM dirs WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM roots WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM checkpoints WHERE root = ?", (root,))
+            self.conn.execute("DELETE FROM hashes WHERE path NOT IN (SELECT path FROM files)")
+            self.conn.execute("DELETE FROM metadata WHERE path NOT IN (SELECT path FROM files)")
+        return [row[0] for row in rows]
+
+    def load_hashes(self):
+        """读取哈希缓存 {路径: (大小, 修改时间, 首尾哈希, 完整哈希或 None)}"""
+        with self.lock:
+            rows = self.conn.execute("SELECT path, size, mtime, partial, full FROM hashes").fetchall()
+        return {path: (size, mtime, partial, full) for path, size, mtime, partial, full in rows}
+
+    def save_hashes(self, rows):
+        """写入哈希缓存，rows 为 (路径, 大小, 修改时间, 首尾哈希, 完整哈希或 None)"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime, partial, full) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def load_metadata(self):
+        """读取文档属性缓存 {路径: (修改时间, 标题, 作者, 最后修改者, 页数)}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT path, mtime, title, author, last_modified_by, pages FROM metadata"
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def save_metadata(self, rows):
+        """写入文档属性缓存，rows 为 (路径, 修改时间, 标题, 作者, 最后修改者, 页数)"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metadata (path, mtime, title, author, last_modified_by, pages) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,234 @@
+"""列式存储的文件列表模型，排序、筛选和搜索都在模型上完成，不依赖 Tk 条目"""
+from array import array
+from datetime import datetime
+from functools import lru_cache
+
+from core.file_types import FILE_TYPES, TypeBuckets
+from core.name_search import NameSearchIndex
+from core.walker import FileRecord
+
+
+def fold(text):
+    """casefold 后的排序/搜索键；没有变化时返回原字符串本身，不再另占一份内存"""
+    key = text.casefold()
+    return text if key == text else key
+
+
+def format_size(size_bytes):
+    """将文件大小转换为人类可读格式"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f}{unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f}TB"
+
+
+@lru_cache(maxsize=4096)
+def _format_minute(minute):
+    return datetime.fromtimestamp(minute * 60).strftime("%Y-%m-%d %H:%M")
+
+
+def format_time(timestamp):
+    """把时间戳格式化为 "年-月-日 时:分"，同一分钟内的结果会被缓存"""
+    return _format_minute(int(timestamp // 60))
+
+
+class FileListModel:
+    """按列保存文件记录，行号在模型生命周期内保持不变
+
+    文本列为列表（扩展名字符串全局共享），大小与时间为定长数组，只保存原始数值，
+    显示用的字符串在行可见时才生成（format_size/format_time）。
+    删除的行只做标记，不移动其它行；view 是当前排序、筛选后要显示的行号列表。
+    """
+
+    # 可排序的列
+    SORT_FIELDS = ("name", "type", "size", "ctime", "mtime", "path")
+    # 按 casefold 后的字符串排序的文本列，其余列直接按原始数值排序
+    TEXT_FIELDS = ("name", "type", "path")
+
+    def __init__(self, file_types=FILE_TYPES):
+        self.file_types = file_types
+        # 可选的内容搜索：query -> 命中的路径列表，返回 None 表示不参与本次查询
+        self.content_search = None
+        self.clear()
+
+    def clear(self):
+        self.paths = []
+        self.names = []
+        self.types = []
+        self.sizes = array("q")
+        self.ctimes = array("d")
+        self.mtimes = array("d")
+        self.alive = bytearray()
+        self.dead = 0  # 已删除（标记）的行数
+        self.rows = {}  # 路径 -> 行号
+        # 文本列的排序键，名称键始终维护（搜索也要用），其它列首次排序时生成
+        self.text_keys = {"name": []}
+        # 各列升序排列的行号缓存，数据变化时失效；降序直接反转
+        self.permutations = {}
+        # 文件名与目录的 n-gram 搜索索引
+        self.search_index = NameSearchIndex(self.text_keys["name"], self.paths)
+        # 各文件类型分类的行号集合
+        self.type_buckets = TypeBuckets(self.file_types)
+        self.view = []
+        self.sort_field = None
+        self.sort_reverse = False
+        self.type_filter = None  # 文件类型分类名称，None 表示全部
+        self.query = ""
+
+    def __len__(self):
+        return len(self.rows)
+
+    def upsert(self, record):
+        """添加或更新一条记录（FileRecord 或同字段的字典），返回 (行号, 是否新增)"""
+        if type(record) is not FileRecord:
+            record = FileRecord(**record)
+        path = record.path
+        row = self.rows.get(path)
+        self.permutations.clear()
+        if row is not None:
+            self.names[row] = record.name
+            self.types[row] = record.type
+            self.sizes[row] = record.size
+            self.ctimes[row] = record.ctime
+            self.mtimes[row] = record.mtime
+            for field, keys in self.text_keys.items():
+                keys[row] = fold(getattr(record, field))
+            return row, False
+
+        paths = self.paths
+        row = len(paths)
+        paths.append(path)
+        name = record.name
+        self.names.append(name)
+        self.types.append(record.type)
+        self.sizes.append(record.size)
+        self.ctimes.append(record.ctime)
+        self.mtimes.append(record.mtime)
+        self.alive.append(1)
+        self.rows[path] = row
+        text_keys = self.text_keys
+        if len(text_keys) == 1:
+            # 常见情况只有名称键，内联 fold 省去函数调用
+            key = name.casefold()
+            text_keys["name"].append(name if key == name else key)
+        else:
+            for field, keys in text_keys.items():
+                keys.append(fold(getattr(record, field)))
+        self.type_buckets.add(row, record.type)
+        # 新行直接追加到视图末尾，下次排序时再归位
+        if self.matches(row):
+            self.view.append(row)
+        return row, True
+
+    def remove(self, paths):
+        """删除指定路径的记录，返回实际删除的行数"""
+        removed = 0
+        for path in paths:
+            row = self.rows.pop(path, None)
+            if row is not None:
+                self.alive[row] = 0
+                self.type_buckets.discard(row, self.types[row])
+                removed += 1
+        if removed:
+            # 排序缓存仍然有效，生成视图时跳过已删除的行
+            self.dead += removed
+            alive = self.alive
+            self.view = [row for row in self.view if alive[row]]
+        return removed
+
+    def record(self, row):
+        """返回某一行的记录"""
+        return {
+            "path": self.paths[row],
+            "name": self.names[row],
+            "type": self.types[row],
+            "size": self.sizes[row],
+            "ctime": self.ctimes[row],
+            "mtime": self.mtimes[row]
+        }
+
+    def matches(self, row):
+        """判断某一行是否满足当前的类型筛选和名称搜索"""
+        if self.type_filter is not None and row not in self.type_buckets.buckets[self.type_filter]:
+            return False
+        return not self.query or self.search_index.row_matches(row, self.query)
+
+    def sort(self, field, reverse=False):
+        self.sort_field = field
+        self.sort_reverse = reverse
+        self.rebuild_view()
+
+    def set_type_filter(self, category):
+        """按文件类型分类筛选，category 为 None 或未知分类时显示全部类型"""
+        self.type_filter = category if category in self.type_buckets.buckets else None
+        self.rebuild_view()
+
+    def set_query(self, text):
+        """按文件名、所在目录或文档内容（不区分大小写）搜索"""
+        self.query = text.casefold()
+        self.rebuild_view()
+
+    def sort_keys(self, field):
+        """返回某列的排序键：文本列为预先 casefold 的字符串，数值列为原始值"""
+        if field not in self.TEXT_FIELDS:
+            return getattr(self, field + "s")
+        keys = self.text_keys.get(field)
+        if keys is None:
+            keys = [fold(value) for value in getattr(self, field + "s")]
+            self.text_keys[field] = keys
+        return keys
+
+    def permutation(self, field):
+        """返回按某列升序排列的全部行号（含已删除的行），结果会被缓存"""
+        permutation = self.permutations.get(field)
+        if permutation is None:
+            keys = self.sort_keys(field)
+            if isinstance(keys, array):
+                # 数组按下标取值每次都要装箱，排序时临时转成列表更快
+                keys = keys.tolist()
+            permutation = sorted(range(len(keys)), key=keys.__getitem__)
+            self.permutations[field] = permutation
+        return permutation
+
+    def rebuild_view(self):
+        """按当前排序和筛选条件重新计算视图"""
+        alive = self.alive
+        if self.sort_field is None:
+            order = range(len(alive))
+        else:
+            permutation = self.permutation(self.sort_field)
+            order = reversed(permutation) if self.sort_reverse else permutation
+        # 名称搜索与类型筛选都得到行号集合，组合时求交
+        selected = None
+        if self.query:
+            selected = self.search_index.search(self.query)
+            content_paths = self.content_search(self.query) if self.content_search else None
+            if content_paths:
+                rows = self.rows
+                # search 返回的是缓存中的集合，合并时生成新集合
+                selected = selected | {rows[path] for path in content_paths if path in rows}
+        if self.type_filter is not None:
+            bucket = self.type_buckets.buckets[self.type_filter]
+            selected = bucket if selected is None else selected & bucket
+
+        if selected is not None:
+            self.view = [row for row in self.ordered(selected, order) if alive[row]]
+        elif self.dead:
+            self.view = [row for row in order if alive[row]]
+        else:
+            self.view = list(order)
+
+    def ordered(self, rows, order):
+        """把行号集合按当前排序排列"""
+        if len(rows) * 8 < len(self.alive):
+            # 集合较小时直接对其排序，避免遍历全部行
+            if self.sort_field is None:
+                return sorted(rows)
+            keys = self.sort_keys(self.sort_field)
+            # 与 permutation 一样按 (键, 行号) 升序，降序时整体反转，两条路径上并列行的顺序一致
+            ordered = sorted(sorted(rows), key=keys.__getitem__)
+            if self.sort_reverse:
+                ordered.reverse()
+            return ordered
+        return [row for row in order if row in rows]
@@ -0,0 +1,59 @@
+"""支持的文件类型分类，以及入库时按分类维护的行号集合"""
+from fnmatch import fnmatchcase
+
+# 文件类型分类：显示名称 -> 文件名通配符
+FILE_TYPES = {
+    "📝 Word文件": "*.doc*",
+    "📊 Excel文件": "*.xls*",
+    "📑 PPT文件": "*.ppt*"
+}
+
+# 命令行中使用的分类简称
+TYPE_ALIASES = {
+    "word": "📝 Word文件",
+    "excel": "📊 Excel文件",
+    "ppt": "📑 PPT文件"
+}
+
+
+def extensions_for(categories, extensions, file_types=FILE_TYPES):
+    """返回 extensions 中属于任一分类的扩展名"""
+    patterns = [file_types[category].lower() for category in categories]
+    return frozenset(
+        ext for ext in extensions
+        if any(fnmatchcase("_" + ext.lower(), pattern) for pattern in patterns)
+    )
+
+
+class TypeBuckets:
+    """每个分类一个行号集合，类型筛选与名称搜索组合时只需集合求交"""
+
+    def __init__(self, file_types=FILE_TYPES):
+        self.patterns = {category: pattern.lower() for category, pattern in file_types.items()}
+        self.buckets = {category: set() for category in file_types}
+        self.ext_categories = {}  # 小写扩展名 -> 所属分类的集合列表（每种扩展名只匹配一次）
+
+    def categories(self, ext):
+        """返回扩展名所属分类的行号集合列表"""
+        ext = ext.lower()
+        buckets = self.ext_categories.get(ext)
+        if buckets is None:
+            buckets = [
+                self.buckets[category]
+                for category, pattern in self.patterns.items()
+                if fnmatchcase("_" + ext, pattern)
+            ]
+            self.ext_categories[ext] = buckets
+        return buckets
+
+    def add(self, row, ext):
+        for bucket in self.categories(ext):
+            bucket.add(row)
+
+    def discard(self, row, ext):
+        for bucket in self.categories(ext):
+            bucket.discard(row)
+
+    def counts(self):
+        """各分类的文件数"""
+        return {category: len(bucket) for category, bucket in self.buckets.items()}
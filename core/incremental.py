@@ -0,0 +1,231 @@
+"""基于目录修改时间的增量扫描"""
+import os
+import threading
+import time
+from itertools import islice
+
+from core.walker import DOC_EXTENSIONS, VisitedDirectories, scan_directory
+
+# 文件系统时间戳精度（FAT/SMB 最粗为 2 秒），在此窗口内变化过的目录总是重新列出
+MTIME_GRANULARITY = 2.0
+
+
+class ScanDelta:
+    """一次增量扫描相对于索引的变化"""
+
+    def __init__(self):
+        self.added = []      # 新增的文件记录
+        self.modified = []   # 大小或时间变化的文件记录
+        self.removed = []    # 已删除文件的路径
+        self.dirs_listed = 0
+        self.dirs_skipped = 0
+
+    def __bool__(self):
+        return bool(self.added or self.modified or self.removed)
+
+
+class ScanState:
+    """一次根目录扫描的中间状态"""
+
+    def __init__(self, root, dir_states, known_files, on_change=None, force_dirs=(), rules=None):
+        self.root = root
+        self.dir_states = dir_states  # 索引中记录的目录状态
+        self.known_files = known_files  # 目录 -> {文件名: 已索引的记录}，访问过的目录会被取空
+        self.on_change = on_change
+        self.force_dirs = force_dirs
+        self.rules = rules  # core.scan_rules.ScanRules 或 None
+        self.delta = ScanDelta()
+        self.new_states = {}
+        self.visited = set()
+        # 按 (st_dev, st_ino) 识别经由链接重复到达的目录，可限制在根目录所在的文件系统
+        self.directories = VisitedDirectories(rules is not None and rules.one_filesystem)
+        self.scan_time = time.time()
+        self.lock = threading.Lock()
+        self.frontier = None  # 从检查点继续时为待访问的目录，根目录不再重新列出
+        self.saved_states = 0  # new_states 中已写入检查点的条目数（按插入顺序）
+
+
+class ScanProgress:
+    """上次检查点之后的扫描结果快照"""
+
+    def __init__(self, state):
+        delta = state.delta
+        self.added = list(delta.added)
+        self.modified = list(delta.modified)
+        self.removed = list(delta.removed)
+        self.dir_states = list(islice(state.new_states.items(), state.saved_states, None))
+
+
+def is_modified(old, new):
+    """判断同一路径的两条记录是否有变化"""
+    return old["size"] != new["size"] or old["mtime"] != new["mtime"] or old["ctime"] != new["ctime"]
+
+
+def fingerprint(rules):
+    """写入索引的规则标识，没有规则时为空字符串"""
+    return rules.fingerprint if rules is not None else ""
+
+
+class IncrementalScanner:
+    """只重新列出修改时间变化过的目录，并输出相对于索引的增量
+
+    目录修改时间只在其直接条目增删或重命名时变化。Office 保存文档时先写临时文件
+    再重命名，因此会更新所在目录的修改时间；原地改写文件内容则不会被发现，
+    需要时可对该根目录执行一次完整扫描（FileIndex.replace_root）。
+    """
+
+    def __init__(self, index, extensions=DOC_EXTENSIONS, on_error=None, metrics=None):
+        self.index = index
+        self.extensions = extensions
+        self.on_error = on_error
+        self.metrics = metrics
+
+    def scan(self, root, on_change=None, force_dirs=(), rules=None):
+        """扫描根目录，返回 ScanDelta 并写回索引
+
+        on_change(kind, record) 在发现新增或修改时立即调用，kind 为 "added" 或 "modified"。
+        force_dirs 中的目录无论修改时间是否变化都会重新列出（如文件监控报告的目录）。
+        rules 排除的目录和文件不进入索引，已索引的视为删除。
+        """
+        state = self.begin(root, on_change, force_dirs, rules)
+        stack = [root]
+        while stack:
+            stack.extend(reversed(self.visit(state, stack.pop())))
+        return self.finish(state)
+
+    def begin(self, root, on_change=None, force_dirs=(), rules=None, resume=False):
+        """读取根目录已有的索引，返回供 visit/finish 使用的扫描状态
+
+        resume 时若有同一规则下未完成扫描的检查点，则沿用其扫描时间与已完成的目录，
+        state.frontier 为需要继续访问的目录。
+        """
+        # 按文件名归到所在目录下，同一目录的记录共用目录前缀，不再为每条记录拼出路径
+        known_files = {}
+        for record in self.index.load([root]):
+            known_files.setdefault(os.path.dirname(record.prefix), {})[record.name] = record
+        dir_states = self.index.load_dir_states(root)
+        checkpoint = self.index.load_checkpoint(root) if resume else None
+        if checkpoint is not None and checkpoint[1] != fingerprint(rules):
+            checkpoint = None
+        done = {}
+        if checkpoint is not None:
+            # 已完成的目录在检查点中以本次扫描时间写入
+            frontier = set(checkpoint[2])
+            done = {path: state for path, state in dir_states.items()
+                    if state[2] == checkpoint[0] and path not in frontier}
+        # 记录的子目录列表是按旧规则剪枝的，规则变化后所有目录都要重新列出
+        if self.index.load_rules(root) != fingerprint(rules):
+            dir_states = dict(done)
+        state = ScanState(root, dir_states, known_files, on_change, force_dirs, rules)
+        if checkpoint is not None:
+            state.scan_time, _, state.frontier = checkpoint
+            state.new_states.update(done)
+            state.saved_states = len(done)
+            for directory in done:
+                key = os.path.dirname(os.path.join(directory, "_"))
+                state.visited.add(key)
+                # 这些目录的增删已写入索引
+                known_files.pop(key, None)
+            # 根目录不再列出，设备边界按根目录所在设备判断
+            state.directories.device = os.stat(root).st_dev
+        return state
+
+    def visit(self, state, directory):
+        """处理一个目录，返回需要继续访问的子目录
+
+        可由多个线程对同一状态并发调用：目录读取不持锁，合并结果时持 state.lock。
+        """
+        # 根目录可能以分隔符结尾，按其下文件路径的 dirname 归组
+        key = os.path.dirname(os.path.join(directory, "_"))
+        prior = state.dir_states.get(directory)
+        try:
+            stats = os.stat(directory)
+            if not state.directories.enter(stats, self.metrics):
+                # 环路或设备边界之外的目录不列出，其下已索引的文件在最后记为删除
+                return []
+            mtime = stats.st_mtime
+            if (prior is not None and prior[0] == mtime and mtime < prior[2] - MTIME_GRANULARITY
+                    and directory not in state.force_dirs):
+                # 目录未变化：沿用已索引的文件，按记录的子目录继续下探
+                # （记为本次扫描时间，检查点据此识别已完成的目录）
+                with state.lock:
+                    state.new_states[directory] = (prior[0], prior[1], state.scan_time, prior[3])
+                    state.visited.add(key)
+                    state.delta.dirs_skipped += 1
+                if self.metrics is not None:
+                    self.metrics.count("scan.skipped")
+                return prior[3]
+            records, subdirs = scan_directory(directory, self.extensions, self.metrics, state.rules, self.on_error)
+        except FileNotFoundError:
+            if directory == state.root:
+                raise
+            # 目录已被删除，其下文件在最后统一记为删除
+            return []
+        except OSError as e:
+            if directory == state.root:
+                raise
+            if self.metrics is not None:
+                self.metrics.count("scan.errors")
+            if self.on_error is not None:
+                self.on_error(directory, e)
+            # 暂时无法读取的目录保留原有索引，避免误删
+            if prior is None:
+                return []
+            with state.lock:
+                state.new_states[directory] = (prior[0], prior[1], state.scan_time, prior[3])
+                state.visited.add(key)
+            return prior[3]
+
+        with state.lock:
+            delta = state.delta
+            delta.dirs_listed += 1
+            state.visited.add(key)
+            state.new_states[directory] = (mtime, len(records) + len(subdirs), state.scan_time, subdirs)
+            known = state.known_files.get(key, {})
+            for record in records:
+                old = known.pop(record.name, None)
+                if old is None:
+                    delta.added.append(record)
+                    kind = "added"
+                elif is_modified(old, record):
+                    delta.modified.append(record)
+                    kind = "modified"
+                else:
+                    continue
+                if state.on_change is not None:
+                    state.on_change(kind, record)
+            delta.removed.extend(record.path for record in known.values())
+            known.clear()
+        return subdirs
+
+    def snapshot(self, state):
+        """取得上次检查点之后的结果；调用方须保证此时没有已访问完、但子目录尚未排队的目录"""
+        with state.lock:
+            return ScanProgress(state)
+
+    def save_checkpoint(self, state, frontier, progress):
+        """把快照与待访问的目录写入索引，成功后从内存中的增量里去掉已写入的部分
+
+        写入期间其它线程可继续访问目录（增量只会在末尾追加）。
+        """
+        self.index.save_checkpoint(
+            state.root, state.scan_time, fingerprint(state.rules), frontier,
+            progress.added + progress.modified, progress.removed, progress.dir_states
+        )
+        with state.lock:
+            delta = state.delta
+            del delta.added[:len(progress.added)]
+            del delta.modified[:len(progress.modified)]
+            del delta.removed[:len(progress.removed)]
+            state.saved_states += len(progress.dir_states)
+
+    def finish(self, state):
+        """汇总未再访问到的目录，把增量写回索引"""
+        delta = state.delta
+        # 未再访问到的目录已被删除或移走，其下文件全部视为删除
+        for key, files in state.known_files.items():
+            if key not in state.visited:
+                delta.removed.extend(record.path for record in files.values())
+
+        self.index.apply_delta(state.root, delta, state.new_states, fingerprint(state.rules))
+        return delta
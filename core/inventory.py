@@ -0,0 +1,71 @@
+"""文档清单：不依赖界面的扫描入口，供命令行与其它脚本调用"""
+import threading
+
+from core.scheduler import ScanScheduler
+from core.walker import DOC_EXTENSIONS, collapse_roots, walk_documents
+
+
+def iter_documents(roots, extensions=DOC_EXTENSIONS, on_error=None, metrics=None, rules=None):
+    """依次遍历各根目录，逐个产出文件记录（内存占用与文件数无关）
+
+    目录无法读取时调用 on_error(path, error) 后继续。rules 为 core.scan_rules.RuleSet。
+    重叠的根目录只遍历一次（外层根目录的规则会排除的根目录除外）。
+    """
+    for root in collapse_roots(roots, rules)[0]:
+        try:
+            yield from walk_documents(
+                root, extensions, on_error, metrics, rules.for_root(root) if rules is not None else None
+            )
+        except OSError as e:
+            if on_error is None:
+                raise
+            on_error(root, e)
+
+
+def refresh_index(index, roots, workers=8, per_device=4, on_error=None, metrics=None, rules=None, engine="threads"):
+    """用与界面相同的调度器增量刷新持久化索引，返回出错信息列表
+
+    engine 为 "async" 时改用 core.async_scan.AsyncScanEngine：workers 为读取目录的线程数上限，
+    每个设备的并发按延迟自适应（per_device 不起作用），适合高延迟的网络共享。
+
+    索引中保存的是全部文档类型，类型筛选应在读取索引时进行，
+    否则其它类型的文件会被当作已删除。位于其它根目录之下的根目录由外层根目录收录，
+    其自己的索引记录被删除；外层根目录的规则会排除它、或它有自己的规则时仍单独刷新。
+    """
+    roots, nested = collapse_roots(roots, rules)
+    for root in nested:
+        index.remove_root(root)
+    if engine == "async":
+        return _refresh_async(index, roots, workers, on_error, metrics, rules)
+    scheduler = ScanScheduler(index, DOC_EXTENSIONS, workers, per_device, on_error, metrics)
+    errors = []
+    finished = threading.Semaphore(0)
+
+    def callback(msg_type, data):
+        if msg_type == "error":
+            errors.append(data)
+        elif msg_type == "done":
+            finished.release()
+
+    try:
+        for root in roots:
+            scheduler.submit(root, callback, rules=rules.for_root(root) if rules is not None else None)
+        for _ in roots:
+            finished.acquire()
+    finally:
+        scheduler.shutdown()
+    return errors
+
+
+def _refresh_async(index, roots, workers, on_error, metrics, rules):
+    from core.async_scan import AsyncScanEngine
+    errors = []
+
+    def callback(msg_type, data):
+        if msg_type == "error":
+            errors.append(data)
+
+    engine = AsyncScanEngine(index, DOC_EXTENSIONS, max_workers=workers, max_per_device=workers,
+                             on_error=on_error, metrics=metrics)
+    engine.run(roots, callback, rules)
+    return errors
@@ -0,0 +1,158 @@
+"""按需读取 OOXML 文档属性（标题、作者、最后修改者、页数/幻灯片数）"""
+import threading
+import zipfile
+from collections import deque
+from xml.etree.ElementTree import fromstring
+
+# 属性字段，缓存与数据库中均按此顺序保存
+METADATA_FIELDS = ("title", "author", "last_modified_by", "pages")
+
+_EMPTY = (None, None, None, None)
+
+# docProps/core.xml 与 docProps/app.xml 中对应的元素（忽略命名空间）
+_CORE_TAGS = {"title": "title", "creator": "author", "lastModifiedBy": "last_modified_by"}
+_COUNT_TAGS = ("Pages", "Slides")
+
+
+def read_metadata(path):
+    """读取文档属性，返回按 METADATA_FIELDS 排列的元组；非 OOXML 文件各项均为 None"""
+    values = dict.fromkeys(METADATA_FIELDS)
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        # 旧版二进制格式（.doc/.xls/.ppt）
+        return _EMPTY
+    with archive:
+        names = set(archive.namelist())
+        if "docProps/core.xml" in names:
+            for element in fromstring(archive.read("docProps/core.xml")):
+                field = _CORE_TAGS.get(element.tag.rsplit("}", 1)[-1])
+                if field is not None and element.text:
+                    values[field] = element.text.strip()
+        if "docProps/app.xml" in names:
+            for element in fromstring(archive.read("docProps/app.xml")):
+                if element.tag.rsplit("}", 1)[-1] in _COUNT_TAGS and element.text:
+                    try:
+                        values["pages"] = int(element.text)
+                    except ValueError:
+                        pass
+    return tuple(values[field] for field in METADATA_FIELDS)
+
+
+class MetadataEnricher:
+    """在后台线程读取文档属性，可见行优先，其余文件慢慢补齐
+
+    get 只查内存缓存，从不打开文件；未缓存的文件通过 request 排队，最近请求的
+    （即当前可见的）最先处理。backfill 的文件优先级最低。结果按 (路径, 修改时间)
+    缓存并写入文件索引，滚动或重启后都不会再次打开同一个压缩包。
+    """
+
+    def __init__(self, index=None, on_ready=None, batch_size=32):
+        self.index = index
+        self.on_ready = on_ready  # 每处理完一批后在后台线程调用，参数为本批的路径列表
+        self.batch_size = batch_size
+        self.cache = {}  # 路径 -> (修改时间, 属性元组)
+        self.condition = threading.Condition()
+        self.visible = deque()  # 可见行的 (路径, 修改时间)，新请求在左侧
+        self.backlog = deque()  # 后台补齐的 (路径, 修改时间)
+        self.queued = set()
+        self.thread = None
+        self.stopped = False
+        self.loaded = index is None
+
+    def start(self):
+        with self.condition:
+            self.stopped = False
+            # 停止后尚未退出的线程（还在处理最后一批）直接继续使用，不会同时有两个线程
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def stop(self, timeout=2.0):
+        """停止后台线程，最多等待 timeout 秒让它处理完当前一批"""
+        with self.condition:
+            self.stopped = True
+            self.visible.clear()
+            self.backlog.clear()
+            self.queued.clear()
+            self.condition.notify_all()
+            thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def get(self, path, mtime):
+        """返回已缓存的属性元组，未缓存或已过期时返回 None"""
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        return None
+
+    def request(self, path, mtime):
+        """请求尽快读取某个文件（通常是刚显示到屏幕上的行）"""
+        with self.condition:
+            key = (path, mtime)
+            if key in self.queued:
+                return
+            self.queued.add(key)
+            self.visible.appendleft(key)
+            self.condition.notify()
+
+    def backfill(self, records):
+        """把尚未缓存的文件加入低优先级队列"""
+        with self.condition:
+            for record in records:
+                key = (record["path"], record["mtime"])
+                if key not in self.queued and self.get(*key) is None:
+                    self.queued.add(key)
+                    self.backlog.append(key)
+            self.condition.notify()
+
+    def _next(self):
+        """取出下一个仍需读取的文件（须持有 self.condition）"""
+        for queue in (self.visible, self.backlog):
+            while queue:
+                key = queue.popleft()
+                self.queued.discard(key)
+                if self.get(*key) is None:
+                    return key
+        return None
+
+    def _run(self):
+        if not self.loaded:
+            for path, (mtime, *values) in self.index.load_metadata().items():
+                self.cache.setdefault(path, (mtime, tuple(values)))
+            self.loaded = True
+            if self.on_ready is not None:
+                self.on_ready([])
+        while True:
+            batch = []
+            with self.condition:
+                while not self.stopped:
+                    key = self._next()
+                    if key is not None:
+                        batch.append(key)
+                        if len(batch) >= self.batch_size:
+                            break
+                    elif batch:
+                        break
+                    else:
+                        self.condition.wait()
+                if self.stopped:
+                    # 在锁内退出并清除 self.thread，start 据此决定复用还是新建线程
+                    self.thread = None
+                    return
+
+            results = []
+            for path, mtime in batch:
+                try:
+                    values = read_metadata(path)
+                except Exception as e:
+                    print(f"读取文档属性 {path} 时出错: {e}")
+                    values = _EMPTY
+                self.cache[path] = (mtime, values)
+                results.append((path, mtime) + values)
+            if self.index is not None:
+                self.index.save_metadata(results)
+            if self.on_ready is not None:
+                self.on_ready([path for path, _ in batch])
@@ -0,0 +1,251 @@
+"""扫描与界面投递的性能指标：计数器、对数分桶直方图，以及可选的 cProfile/tracemalloc 采集
+
+性能分析相关的模块只在开始采集时导入，不影响启动。
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# 性能采集结果的默认目录
+DEFAULT_PROFILE_DIR = "profiles"
+
+
+class Histogram:
+    """按 2 的幂分桶的直方图，内存固定，分位数精确到所在桶的上界
+
+    unit 为 "s" 时以微秒为最小粒度记录耗时，为 "count" 时记录整数（如队列深度）。
+    """
+
+    def __init__(self, unit="s"):
+        self.unit = unit
+        self.scale = 1_000_000 if unit == "s" else 1
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.buckets[min(int(value * self.scale).bit_length(), 63)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                return min((1 << index) / self.scale, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "unit": self.unit,
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max
+        }
+
+
+class Metrics:
+    """线程安全的指标集合，各阶段按名称记录
+
+    扫描：scan.dirs / scan.files / scan.skipped / scan.pruned（按规则不下探）/ scan.errors 计数，
+    scan.links（未跟随的链接）/ scan.loops（重复到达的目录）/ scan.boundary（其它文件系统）计数，
+    scan.list（列目录，记录 scan.stat 时不含 stat）、scan.stat（单个文件 stat）耗时，scan.queue 排队目录数，
+    scan.latency（异步引擎中一次目录读取）耗时，scan.concurrency 异步引擎的并发上限。
+    界面：ui.rows 计数，ui.tick（一次投递周期）、ui.insert（平均每行插入）耗时，ui.queue 消息积压。
+
+    scan.stat 要给每个文件计时，只在 detailed 为真时记录（命令行 --metrics、界面的“逐文件计时”），
+    与性能分析互不相关；其余扫描指标每个目录只记录一次，总是记录。
+    """
+
+    def __init__(self, detailed=False):
+        self.detailed = detailed
+        self.lock = threading.Lock()
+        self.profile_condition = threading.Condition()
+        self.profiles = None  # 采集中时为 {线程号: cProfile.Profile}
+        self.profiling_sections = 0  # 正在 profile() 范围内的线程数
+        self.reset()
+
+    def reset(self):
+        """清空指标（每次搜索开始时调用）"""
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.perf_counter()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _histogram(self, name, unit):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(unit)
+        return histogram
+
+    def observe(self, name, value, unit="s"):
+        with self.lock:
+            self._histogram(name, unit).add(value)
+
+    def record_directory(self, elapsed, stat_times, files):
+        """记录一次目录列出：一次加锁写入该目录下所有 stat 耗时（stat_times 为 None 时只记列目录）"""
+        with self.lock:
+            counters = self.counters
+            counters["scan.dirs"] = counters.get("scan.dirs", 0) + 1
+            counters["scan.files"] = counters.get("scan.files", 0) + files
+            if stat_times is None:
+                self._histogram("scan.list", "s").add(elapsed)
+                return
+            self._histogram("scan.list", "s").add(max(elapsed - sum(stat_times), 0.0))
+            stat = self._histogram("scan.stat", "s")
+            for value in stat_times:
+                stat.add(value)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """返回可序列化为 JSON 的指标快照，计数器同时给出每秒速率"""
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            counters = dict(self.counters)
+            histograms = {name: histogram.snapshot() for name, histogram in self.histograms.items()}
+        return {
+            "elapsed": elapsed,
+            "counters": counters,
+            "rates": {name: value / elapsed if elapsed > 0 else 0.0 for name, value in counters.items()},
+            "histograms": histograms
+        }
+
+    def summary(self):
+        """状态栏用的一行摘要"""
+        snapshot = self.snapshot()
+        counters, rates, histograms = snapshot["counters"], snapshot["rates"], snapshot["histograms"]
+        parts = []
+        for name, label in (("scan.dirs", "目录"), ("scan.files", "文件"), ("ui.rows", "投递行")):
+            if name in counters:
+                parts.append(f"{label} {counters[name]}（{rates[name]:.0f}/秒）")
+        if "scan.skipped" in counters:
+            parts.append(f"未变化目录 {counters['scan.skipped']}")
+        for name, label in (("scan.pruned", "排除目录"), ("scan.links", "未跟随链接"),
+                            ("scan.loops", "重复目录"), ("scan.boundary", "跨设备目录")):
+            if name in counters:
+                parts.append(f"{label} {counters[name]}")
+        for name, label in (("scan.list", "列目录"), ("scan.stat", "stat"), ("ui.insert", "插入")):
+            if name in histograms:
+                parts.append(f"{label} p95 {_format_seconds(histograms[name]['p95'])}")
+        for name, label in (("scan.queue", "待扫目录"), ("ui.queue", "消息积压")):
+            if name in histograms:
+                parts.append(f"{label}峰值 {histograms[name]['max']}")
+        if "ui.tick" in histograms:
+            parts.append(f"主线程耗时 {_format_seconds(histograms['ui.tick']['total'])}")
+        return "，".join(parts)
+
+    def dump(self, path):
+        """把指标快照写为 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    @property
+    def profiling(self):
+        return self.profiles is not None
+
+    def start_profiling(self):
+        """开始采集：各线程在 profile() 范围内的调用，以及所有内存分配"""
+        import tracemalloc
+        with self.profile_condition:
+            if self.profiles is None:
+                self.profiles = {}
+                tracemalloc.start(10)
+
+    def profile(self):
+        """在当前线程中对一段代码做 cProfile（未采集时开销可忽略）"""
+        if self.profiles is None:
+            return nullcontext()
+        return self._profile()
+
+    @contextmanager
+    def _profile(self):
+        import cProfile
+        with self.profile_condition:
+            if self.profiles is None:
+                profiler = None
+            else:
+                profiler = self.profiles.setdefault(threading.get_ident(), cProfile.Profile())
+                self.profiling_sections += 1
+        if profiler is None:
+            yield
+            return
+        profiler.enable()
+        try:
+            yield
+        finally:
+            # cProfile 只能在启用它的线程中停用
+            profiler.disable()
+            with self.profile_condition:
+                self.profiling_sections -= 1
+                self.profile_condition.notify_all()
+
+    def stop_profiling(self, directory=DEFAULT_PROFILE_DIR):
+        """结束采集，写出合并后的 .prof 与文本报告，返回报告路径（未在采集时返回 None）"""
+        import io
+        import pstats
+        import tracemalloc
+        with self.profile_condition:
+            profiles, self.profiles = self.profiles, None
+            if profiles is None:
+                return None
+            # 等待其它线程中正在进行的 profile() 结束
+            self.profile_condition.wait_for(lambda: not self.profiling_sections, timeout=5)
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, datetime.now().strftime("profile_%Y%m%d_%H%M%S"))
+        report = io.StringIO()
+        if profiles:
+            profiles = list(profiles.values())
+            stats = pstats.Stats(profiles[0], stream=report)
+            for profiler in profiles[1:]:
+                stats.add(profiler)
+            stats.dump_stats(base + ".prof")
+            report.write(f"== cProfile（{len(profiles)} 个线程，按累计耗时）==\n")
+            stats.sort_stats("cumulative").print_stats(30)
+        report.write("\n== tracemalloc（按分配位置，前 20）==\n")
+        for stat in snapshot.statistics("lineno")[:20]:
+            report.write(f"{stat}\n")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        return base + ".txt"
+
+
+def _format_seconds(value):
+    if value is None:
+        return "-"
+    if value < 0.001:
+        return f"{value * 1_000_000:.0f}µs"
+    if value < 1:
+        return f"{value * 1000:.1f}ms"
+    return f"{value:.2f}s"
@@ -0,0 +1,141 @@
+"""文件名与目录路径的 n-gram 索引，用于搜索框的即时子串搜索"""
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+# 后台补建索引时每次持锁处理的行数
+CATCH_UP_CHUNK = 20000
+
+
+class NameSearchIndex:
+    """按 n-gram 建立倒排表，查询时取最稀有的 n-gram 作为候选再校验子串
+
+    默认使用二元组（中文文件名两个字就是一个常见的查询词）。目录路径单独建索引，
+    命中目录下的所有文件都算匹配；目录数远少于文件数，索引开销很小。
+
+    索引不在添加文件时同步建立（那会让扫描入库慢数倍），而是由 catch_up 在后台
+    线程分块补建；查询时若仍有未建索引的行，会先补齐再查询。
+    """
+
+    def __init__(self, name_keys, paths, n=2, match_paths=True, cache_size=32):
+        self.name_keys = name_keys  # 行号 -> casefold 后的文件名（由模型维护，只追加）
+        self.paths = paths  # 行号 -> 文件路径（由模型维护，只追加）
+        self.n = n
+        self.match_paths = match_paths
+        self.lock = threading.Lock()
+        self.indexed = 0  # 已建索引的行数
+        self.name_postings = {}  # n-gram -> 行号数组（递增）
+        self.dir_keys = []  # 目录号 -> casefold 后的目录路径
+        self.dir_ids = {}
+        self.dir_postings = {}  # n-gram -> 目录号数组
+        self.dir_rows = []  # 目录号 -> 该目录下的行号数组
+        self.row_dirs = array("i")  # 行号 -> 目录号
+        self.cache = OrderedDict()  # 最近查询 -> 命中行号集合
+        self.cache_size = cache_size
+        self.last_query = ""
+
+    def grams(self, text):
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def catch_up(self):
+        """为尚未建索引的行分块补建索引，可在后台线程调用"""
+        while True:
+            with self.lock:
+                end = min(len(self.name_keys), self.indexed + CATCH_UP_CHUNK)
+                if self.indexed >= end:
+                    return
+                self._index_rows(end)
+
+    def _index_rows(self, end):
+        """为 [indexed, end) 行建立索引（须持有 self.lock）"""
+        name_postings = self.name_postings
+        name_keys = self.name_keys
+        paths = self.paths
+        for row in range(self.indexed, end):
+            for gram in self.grams(name_keys[row]):
+                postings = name_postings.get(gram)
+                if postings is None:
+                    postings = name_postings[gram] = array("i")
+                postings.append(row)
+
+            directory = os.path.dirname(paths[row]).casefold()
+            dir_id = self.dir_ids.get(directory)
+            if dir_id is None:
+                dir_id = self.dir_ids[directory] = len(self.dir_keys)
+                self.dir_keys.append(directory)
+                self.dir_rows.append(array("i"))
+                for gram in self.grams(directory):
+                    postings = self.dir_postings.get(gram)
+                    if postings is None:
+                        postings = self.dir_postings[gram] = array("i")
+                    postings.append(dir_id)
+            self.row_dirs.append(dir_id)
+            self.dir_rows[dir_id].append(row)
+        self.indexed = end
+        # 新行可能匹配已缓存的查询
+        self.cache.clear()
+
+    def row_matches(self, row, query):
+        """单行校验（query 须已 casefold），对尚未建索引的行同样有效"""
+        if query in self.name_keys[row]:
+            return True
+        if not self.match_paths:
+            return False
+        if row < len(self.row_dirs):
+            return query in self.dir_keys[self.row_dirs[row]]
+        return query in os.path.dirname(self.paths[row]).casefold()
+
+    def rarest(self, query, postings):
+        """返回 query 中最稀有 n-gram 的倒排表；query 比 n 短时返回 None，不可能命中时返回空数组"""
+        if len(query) < self.n:
+            return None
+        best = None
+        for gram in self.grams(query):
+            candidates = postings.get(gram)
+            if candidates is None:
+                return array("i")
+            if best is None or len(candidates) < len(best):
+                best = candidates
+        return best
+
+    def lookup(self, query, postings, keys):
+        """用倒排表取候选并校验子串，返回命中的编号列表（用于目录）"""
+        candidates = self.rarest(query, postings)
+        if candidates is None:
+            candidates = range(len(keys))
+        return [i for i in candidates if query in keys[i]]
+
+    def search(self, query):
+        """返回文件名或目录路径包含 query 的行号集合（不区分大小写）"""
+        query = query.casefold()
+        with self.lock:
+            if self.indexed < len(self.name_keys):
+                self._index_rows(len(self.name_keys))
+            return self._search(query)
+
+    def _search(self, query):
+        cached = self.cache.get(query)
+        if cached is not None:
+            self.cache.move_to_end(query)
+            self.last_query = query
+            return cached
+
+        rarest = self.rarest(query, self.name_postings)
+        candidates = rarest if rarest is not None else range(self.indexed)
+        previous = self.cache.get(self.last_query) if self.last_query else None
+        if previous is not None and self.last_query in query and len(previous) < len(candidates):
+            # 查询只是在上次基础上变长：候选范围不超过上次的结果
+            candidates = previous
+        name_keys = self.name_keys
+        result = {row for row in candidates if query in name_keys[row]}
+        if self.match_paths:
+            for dir_id in self.lookup(query, self.dir_postings, self.dir_keys):
+                result.update(self.dir_rows[dir_id])
+
+        self.cache[query] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        self.last_query = query
+        return result
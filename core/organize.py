@@ -0,0 +1,376 @@
+"""按规则批量整理文件（移动/复制），支持预演、校验、日志续做与回滚"""
+import errno
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fnmatch import fnmatchcase
+
+from core.duplicates import full_hash
+from core.file_types import FILE_TYPES, TYPE_ALIASES, extensions_for
+from core.walker import DOC_EXTENSIONS, make_record
+
+ACTIONS = ("move", "copy")
+VERIFY_MODES = ("size", "hash")
+
+# 整理日志默认目录（每次执行一个 JSON Lines 文件）
+DEFAULT_JOURNAL_DIR = "organize_journals"
+
+# 跨设备复制时的临时文件后缀，校验通过后才改名为目标文件
+PART_SUFFIX = ".part"
+
+
+class Rule:
+    """一条整理规则
+
+    规则以字典描述，例如把根目录 X 下两年前的 .xls 移到 archive/年份/：
+        {"root": "X", "types": ["excel"], "extensions": [".xls"], "older_than_days": 730,
+         "action": "move", "target": "archive/{year}/"}
+    target 为相对根目录（或绝对）的目录模板，可用 {year} {month} {ext}（按修改时间）。
+    types 为分类简称或分类名，extensions 为扩展名，name 为文件名通配符，均可省略。
+    """
+
+    def __init__(self, spec):
+        self.root = os.path.normpath(spec["root"])
+        self.prefix = os.path.normcase(os.path.join(self.root, ""))
+        self.target = spec["target"]
+        self.action = spec.get("action", "move")
+        if self.action not in ACTIONS:
+            raise ValueError(f"未知的整理动作: {self.action}")
+        extensions = DOC_EXTENSIONS
+        if spec.get("types"):
+            categories = [TYPE_ALIASES.get(name.lower(), name) for name in spec["types"]]
+            unknown = [name for name in categories if name not in FILE_TYPES]
+            if unknown:
+                raise ValueError(f"未知的文件类型: {', '.join(unknown)}")
+            extensions = extensions_for(categories, extensions)
+        if spec.get("extensions"):
+            extensions = extensions & {ext.lower() for ext in spec["extensions"]}
+        self.extensions = extensions
+        self.name = spec.get("name")
+        self.older_than_days = spec.get("older_than_days")
+        self.newer_than_days = spec.get("newer_than_days")
+
+    def matches(self, record, now):
+        if not os.path.normcase(os.path.normpath(record["path"])).startswith(self.prefix):
+            return False
+        if record["type"].lower() not in self.extensions:
+            return False
+        if self.name and not fnmatchcase(record["name"].lower(), self.name.lower()):
+            return False
+        age_days = (now - record["mtime"]) / 86400
+        if self.older_than_days is not None and age_days < self.older_than_days:
+            return False
+        if self.newer_than_days is not None and age_days > self.newer_than_days:
+            return False
+        return True
+
+    def destination(self, record):
+        modified = datetime.fromtimestamp(record["mtime"])
+        directory = self.target.format(
+            year=modified.strftime("%Y"),
+            month=modified.strftime("%m"),
+            ext=record["type"].lstrip(".").lower()
+        )
+        return os.path.join(self.root, directory, record["name"])
+
+
+def load_rules(path):
+    """读取规则文件：规则列表，或 {"rules": [...]}"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+    return [Rule(spec) for spec in data]
+
+
+def _unique(path, taken):
+    """目标已存在或已被本次计划占用时，在文件名后加 (2)、(3)…"""
+    base, ext = os.path.splitext(path)
+    candidate = path
+    number = 2
+    while os.path.normcase(candidate) in taken or os.path.lexists(candidate):
+        candidate = f"{base} ({number}){ext}"
+        number += 1
+    return candidate
+
+
+def _same_file(record, path):
+    """目标是否为同一文件此前的副本（copy2 会保留修改时间）"""
+    try:
+        stats = os.stat(path)
+    except OSError:
+        return False
+    return stats.st_size == record["size"] and stats.st_mtime == record["mtime"]
+
+
+def plan_operations(rules, records, now=None):
+    """生成整理计划（不做任何修改），每个文件只应用第一条匹配的规则"""
+    now = time.time() if now is None else now
+    plan = []
+    taken = set()
+    for record in records:
+        for rule in rules:
+            if not rule.matches(record, now):
+                continue
+            destination = rule.destination(record)
+            if os.path.normcase(destination) == os.path.normcase(os.path.normpath(record["path"])):
+                # 已在目标位置
+                break
+            if rule.action == "copy" and _same_file(record, destination):
+                # 之前已复制过且未变化
+                break
+            destination = _unique(destination, taken)
+            taken.add(os.path.normcase(destination))
+            plan.append({
+                "action": rule.action,
+                "src": record["path"],
+                "dst": destination,
+                "size": record["size"],
+                "mtime": record["mtime"]
+            })
+            break
+    return plan
+
+
+def describe(plan):
+    """计划摘要，例如 "移动 12 个、复制 3 个文件，共 45.6MB\""""
+    moves = sum(1 for op in plan if op["action"] == "move")
+    total = sum(op["size"] for op in plan)
+    return f"移动 {moves} 个、复制 {len(plan) - moves} 个文件，共 {total / 1024 / 1024:.1f}MB"
+
+
+def _device(path):
+    """返回路径（或其最近的已存在上级目录）所在设备"""
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.stat(path).st_dev
+
+
+def _rename_no_replace(src, dst):
+    """改名，但绝不覆盖已存在的目标（POSIX 的 rename 会静默覆盖）"""
+    if os.name == "nt":
+        # Windows 下目标存在时 rename 抛出 FileExistsError
+        os.rename(src, dst)
+        return
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError:
+        # 文件系统不支持硬链接（如 FAT、部分网络共享）时退回检查后改名
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, "目标文件已存在", dst) from None
+        os.rename(src, dst)
+        return
+    os.remove(src)
+
+
+class Organizer:
+    """执行整理计划
+
+    同一设备上的移动直接改名；跨设备的移动和所有复制先写入临时文件，
+    按大小或哈希校验后再改名为目标文件，移动时最后才删除源文件。复制在有界线程池中
+    并行进行。任何情况下都不覆盖已存在的目标文件。
+
+    每项操作开始前在日志中记为 started，完成后记为 done，中断后可用 resume 续做、
+    rollback 回滚。只有 resume 时、日志中停在 started 的操作才会把已存在的目标
+    视为上次完成的结果，且要求内容哈希一致。
+    """
+
+    def __init__(self, workers=4, verify="size"):
+        if verify not in VERIFY_MODES:
+            raise ValueError(f"未知的校验方式: {verify}")
+        self.workers = workers
+        self.verify = verify
+        self.lock = threading.Lock()
+
+    def run(self, plan, journal_path, on_done=None, on_error=None):
+        """执行新计划，返回 (完成数, 失败数)
+
+        on_done(op) 与 on_error(op, error) 在工作线程中调用。
+        """
+        directory = os.path.dirname(journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(journal_path, "x", encoding="utf-8") as journal:
+            journal.write(json.dumps({"plan": plan, "created": time.time()}, ensure_ascii=False) + "\n")
+        return self._execute(plan, range(len(plan)), journal_path, on_done, on_error)
+
+    def resume(self, journal_path, on_done=None, on_error=None):
+        """续做日志中尚未完成的操作（已回滚或回滚到一半的不再执行）"""
+        plan, states = read_journal(journal_path)
+        pending = [
+            i for i in range(len(plan))
+            if states.get(i) not in ("done", "rolled_back", "rollback_started", "rollback_failed")
+        ]
+        interrupted = {i for i in pending if states.get(i) == "started"}
+        return self._execute(plan, pending, journal_path, on_done, on_error, interrupted)
+
+    def rollback(self, journal_path, on_done=None, on_error=None):
+        """按相反顺序撤销日志中已完成的操作，返回 (撤销数, 失败数)
+
+        on_done(op) 收到的 op 已把 src/dst 对调，表示本次撤销实际发生的改动。
+        """
+        plan, states = read_journal(journal_path)
+        done = failed = 0
+        with open(journal_path, "a", encoding="utf-8") as journal:
+            for i in reversed(range(len(plan))):
+                if states.get(i) not in ("done", "rollback_started", "rollback_failed"):
+                    continue
+                # 上次回滚到一半中断或失败的操作，已存在的原位置文件可能正是回滚的结果
+                resuming = states.get(i) != "done"
+                op = plan[i]
+                self._log(journal, i, "rollback_started")
+                try:
+                    if op["action"] == "move":
+                        reverse = dict(op, src=op["dst"], dst=op["src"])
+                        self._move(reverse, resuming)
+                    else:
+                        reverse = dict(op, action="remove", src=op["dst"], dst=None)
+                        try:
+                            os.remove(op["dst"])
+                        except FileNotFoundError:
+                            if not resuming:
+                                raise
+                except OSError as e:
+                    failed += 1
+                    self._log(journal, i, "rollback_failed", str(e))
+                    if on_error is not None:
+                        on_error(op, e)
+                    continue
+                done += 1
+                self._log(journal, i, "rolled_back")
+                if on_done is not None:
+                    on_done(reverse)
+        return done, failed
+
+    def _execute(self, plan, indices, journal_path, on_done, on_error, interrupted=()):
+        """执行 indices 中的操作；interrupted 为上次开始后未完成的操作序号"""
+        counts = [0, 0]
+        with open(journal_path, "a", encoding="utf-8") as journal:
+
+            def apply(i):
+                op = plan[i]
+                with self.lock:
+                    self._log(journal, i, "started")
+                try:
+                    if op["action"] == "move":
+                        self._move(op, i in interrupted)
+                    else:
+                        self._copy(op, i in interrupted)
+                except OSError as e:
+                    with self.lock:
+                        counts[1] += 1
+                        self._log(journal, i, "failed", str(e))
+                    if on_error is not None:
+                        on_error(op, e)
+                    return
+                with self.lock:
+                    counts[0] += 1
+                    self._log(journal, i, "done")
+                if on_done is not None:
+                    on_done(op)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(apply, indices))
+        return counts[0], counts[1]
+
+    def _log(self, journal, index, status, error=None):
+        entry = {"op": index, "status": status}
+        if error is not None:
+            entry["error"] = error
+        journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        journal.flush()
+
+    def _move(self, op, resuming=False):
+        """resuming 表示该操作上次已开始但未完成，目标存在时可能是上次的结果"""
+        src, dst = op["src"], op["dst"]
+        if os.path.lexists(dst):
+            if not resuming:
+                raise FileExistsError(f"目标文件已存在: {dst}")
+            if not os.path.lexists(src):
+                # 改名已完成但未来得及写日志；目标须与计划中的文件一致
+                if _matches(op, dst):
+                    return
+                raise FileExistsError(f"目标文件已存在且与源文件不一致: {dst}")
+            if os.path.samefile(src, dst) or self._identical(src, dst):
+                # 建立硬链接后、或跨设备复制完成后未来得及删除源文件
+                os.remove(src)
+                return
+            raise FileExistsError(f"目标文件已存在且与源文件不一致: {dst}")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if _device(src) == _device(dst):
+            _rename_no_replace(src, dst)
+            return
+        self._copy(op)
+        os.remove(src)
+
+    def _copy(self, op, resuming=False):
+        src, dst = op["src"], op["dst"]
+        if os.path.lexists(dst):
+            # 上次复制已完成（改名是校验通过后的最后一步）
+            if resuming and os.path.exists(src) and self._identical(src, dst):
+                return
+            raise FileExistsError(f"目标文件已存在: {dst}")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        part = dst + PART_SUFFIX
+        try:
+            shutil.copy2(src, part)
+            if not self._verified(src, part):
+                raise OSError(f"复制后校验失败: {src}")
+            _rename_no_replace(part, dst)
+        except BaseException:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+
+    def _verified(self, src, dst):
+        if os.path.getsize(src) != os.path.getsize(dst):
+            return False
+        return self.verify != "hash" or full_hash(src) == full_hash(dst)
+
+    def _identical(self, src, dst):
+        """续做时判断已存在的目标是否为源文件的完整副本，总是比较内容哈希"""
+        return os.path.getsize(src) == os.path.getsize(dst) and full_hash(src) == full_hash(dst)
+
+
+def _matches(op, path):
+    """文件大小与修改时间是否与计划中记录的一致（改名与 copy2 都保留修改时间）"""
+    try:
+        stats = os.stat(path)
+    except OSError:
+        return False
+    return stats.st_size == op["size"] and stats.st_mtime == op["mtime"]
+
+
+def read_journal(journal_path):
+    """读取日志，返回 (计划, {操作序号: 最后状态})"""
+    with open(journal_path, encoding="utf-8") as journal:
+        plan = json.loads(journal.readline())["plan"]
+        states = {}
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 中断时写了一半的最后一行
+                continue
+            states[entry["op"]] = entry["status"]
+    return plan, states
+
+
+def new_journal_path(directory=DEFAULT_JOURNAL_DIR):
+    return os.path.join(directory, datetime.now().strftime("organize_%Y%m%d_%H%M%S.jsonl"))
+
+
+def destination_record(op):
+    """为操作完成后的目标文件构造文件记录（用于增量更新列表）"""
+    path = op["dst"]
+    name = os.path.basename(path)
+    return make_record(path, name, os.path.splitext(name)[1], os.stat(path))
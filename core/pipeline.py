@@ -0,0 +1,119 @@
+"""搜索结果投递管道：工作线程批量推送，Tk 主线程按帧预算分批处理"""
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+
+class BatchWriter:
+    """工作线程侧的缓冲写入器，攒满一批再推入管道"""
+
+    def __init__(self, pipeline, batch_size):
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.batch = []
+
+    def put(self, msg_type, data):
+        self.batch.append((msg_type, data))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.pipeline.put_batch(self.batch)
+            self.batch = []
+
+
+class ResultPipeline:
+    """在 Tk 主线程中按帧预算处理工作线程推送的消息
+
+    工作线程只调用 put/put_batch（线程安全），handler(msg_type, data) 始终在主线程
+    通过 root.after 调用，每个周期最多处理 max_rows 条 "file" 消息且不超过
+    frame_budget 秒，积压时尽快让出事件循环后继续处理。
+    提供 metrics 时记录消息积压（ui.queue）、每个周期耗时（ui.tick）与平均每行耗时（ui.insert）。
+    """
+
+    def __init__(self, root, handler, max_rows=2000, frame_budget=0.012, interval=30, batch_size=500,
+                 metrics=None):
+        self.root = root
+        self.handler = handler
+        self.max_rows = max_rows
+        self.frame_budget = frame_budget
+        self.interval = interval
+        self.batch_size = batch_size
+        self.metrics = metrics
+        self.messages = deque()
+        self.lock = threading.Lock()
+        self.after_id = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """重置统计（每次搜索开始时调用）"""
+        with self.lock:
+            self.peak_depth = 0
+            self.rows = 0
+            self.busy_time = 0.0
+            self.started = time.perf_counter()
+
+    def writer(self):
+        """为一个工作线程创建批量写入器"""
+        return BatchWriter(self, self.batch_size)
+
+    def put(self, msg_type, data):
+        self.put_batch([(msg_type, data)])
+
+    def put_batch(self, messages):
+        with self.lock:
+            self.messages.extend(messages)
+            depth = len(self.messages)
+            if depth > self.peak_depth:
+                self.peak_depth = depth
+        if self.metrics is not None:
+            self.metrics.observe("ui.queue", depth, "count")
+
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.root.after(self.interval, self._tick)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def _tick(self):
+        start = time.perf_counter()
+        deadline = start + self.frame_budget
+        rows = 0
+        messages = self.messages
+        metrics = self.metrics
+        try:
+            with metrics.profile() if metrics is not None and messages else nullcontext():
+                while messages and rows < self.max_rows:
+                    msg_type, data = messages.popleft()
+                    self.handler(msg_type, data)
+                    if msg_type == "file":
+                        rows += 1
+                        # 每 64 行检查一次时间，避免频繁计时
+                        if not rows & 63 and time.perf_counter() > deadline:
+                            break
+        finally:
+            elapsed = time.perf_counter() - start
+            self.rows += rows
+            self.busy_time += elapsed
+            if metrics is not None and rows:
+                metrics.count("ui.rows", rows)
+                metrics.observe("ui.tick", elapsed)
+                metrics.observe("ui.insert", elapsed / rows)
+            # 仍有积压时尽快继续，否则按常规间隔轮询
+            self.after_id = self.root.after(1 if messages else self.interval, self._tick)
+
+    def stats(self):
+        """返回投递统计：已处理行数、每秒行数、主线程耗时与队列峰值深度"""
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "rows_per_sec": self.rows / elapsed if elapsed > 0 else 0.0,
+            "busy_time": self.busy_time,
+            "peak_depth": self.peak_depth,
+            "pending": len(self.messages)
+        }
@@ -0,0 +1,181 @@
+"""扫描排除规则：在遍历时剪掉不需要的子目录，并在 stat 前后过滤文件
+
+规则保存在配置的 "scan_rules" 中，按根目录给出，"*" 为所有根目录的默认值
+（根目录自己的规则逐项覆盖默认值）：
+    "scan_rules": {
+        "*": {"exclude_dirs": ["node_modules", ".git", "*备份*"], "skip_hidden": true, "skip_temp": true},
+        "D:/共享/项目": {"max_depth": 3, "min_size": 1024, "modified_after": "2020-01-01"}
+    }
+exclude_dirs   子目录通配符；含 "/" 时匹配相对根目录的路径，否则匹配目录名
+include        文件名通配符，给出时只保留匹配的文件
+exclude        文件名通配符
+max_depth      最大下探层数，0 表示只列根目录本身
+min_size / max_size                字节数
+modified_after / modified_before   "YYYY-MM-DD" 或时间戳
+skip_hidden    跳过隐藏目录（以 "." 开头，Windows 下带隐藏或系统属性）
+skip_temp      跳过 Office 锁文件（~$ 开头）等临时文件
+follow_links   下探指向目录的符号链接、目录联接和卷装载点（默认不下探）
+one_filesystem 不进入与根目录不在同一设备上的目录（挂载的其它磁盘或网络共享）
+通配符不区分大小写。
+"""
+import json
+import os
+import re
+import stat
+from datetime import datetime
+from fnmatch import translate
+
+RULE_KEYS = frozenset({
+    "exclude_dirs", "include", "exclude", "max_depth", "min_size", "max_size",
+    "modified_after", "modified_before", "skip_hidden", "skip_temp", "follow_links", "one_filesystem"
+})
+
+# Office 打开文档时的锁文件、LibreOffice 的锁文件
+TEMP_PREFIXES = ("~$", ".~lock.")
+
+# Windows 下的隐藏与系统属性（其它平台 stat 结果中没有该字段）
+_HIDDEN_ATTRIBUTES = getattr(stat, "FILE_ATTRIBUTE_HIDDEN", 2) | getattr(stat, "FILE_ATTRIBUTE_SYSTEM", 4)
+
+
+def _compile(patterns):
+    """把一组通配符合并为一个正则的 match 方法，没有通配符时返回 None"""
+    if not patterns:
+        return None
+    return re.compile("|".join(translate(pattern.casefold()) for pattern in patterns)).match
+
+
+def _timestamp(value, name):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 应为 YYYY-MM-DD 或时间戳: {value!r}") from None
+
+
+class ScanRules:
+    """一个根目录编译后的规则，供遍历器在列目录时调用"""
+
+    def __init__(self, root, spec):
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"未知的扫描规则: {', '.join(sorted(unknown))}")
+        self.root = root
+        # 子目录路径去掉该前缀即为相对路径（根目录可能以分隔符结尾）
+        self.prefix_length = len(os.path.join(root, ""))
+        # 规则原文，写入索引，规则变化时整个根目录重新列出
+        self.fingerprint = json.dumps(spec, sort_keys=True, ensure_ascii=False)
+
+        dir_patterns = spec.get("exclude_dirs") or []
+        self.exclude_dir_name = _compile([p for p in dir_patterns if "/" not in p])
+        self.exclude_dir_path = _compile([p.strip("/") for p in dir_patterns if "/" in p])
+        self.include_name = _compile(spec.get("include"))
+        self.exclude_name = _compile(spec.get("exclude"))
+        self.max_depth = spec.get("max_depth")
+        self.skip_hidden = bool(spec.get("skip_hidden"))
+        self.skip_temp = bool(spec.get("skip_temp"))
+        self.follow_links = bool(spec.get("follow_links"))
+        self.one_filesystem = bool(spec.get("one_filesystem"))
+        self.min_size = spec.get("min_size")
+        self.max_size = spec.get("max_size")
+        self.modified_after = _timestamp(spec.get("modified_after"), "modified_after")
+        self.modified_before = _timestamp(spec.get("modified_before"), "modified_before")
+        self.filters_stats = any(value is not None for value in (
+            self.min_size, self.max_size, self.modified_after, self.modified_before
+        ))
+
+    def allow_dir(self, entry):
+        """是否下探该子目录（DirEntry）"""
+        relative = entry.path[self.prefix_length:]
+        if self.max_depth is not None and relative.count(os.sep) >= self.max_depth:
+            return False
+        name = entry.name
+        if self.skip_hidden:
+            if name.startswith("."):
+                return False
+            # Windows 下目录项自带属性，不产生额外系统调用
+            if getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0) & _HIDDEN_ATTRIBUTES:
+                return False
+        if self.exclude_dir_name is not None and self.exclude_dir_name(name.casefold()):
+            return False
+        if self.exclude_dir_path is not None and self.exclude_dir_path(relative.replace(os.sep, "/").casefold()):
+            return False
+        return True
+
+    def covers(self, path):
+        """遍历根目录时是否会下探到其下的目录 path 并完整遍历它的子树
+
+        逐层按 allow_dir 的规则判断；设有 max_depth 时子树会被截断，总是返回 False。
+        """
+        if self.max_depth is not None:
+            return False
+        parts = path[self.prefix_length:].split(os.sep)
+        current = self.root
+        for depth, name in enumerate(parts):
+            current = os.path.join(current, name)
+            if self.skip_hidden:
+                if name.startswith("."):
+                    return False
+                try:
+                    if getattr(os.stat(current, follow_symlinks=False), "st_file_attributes", 0) & _HIDDEN_ATTRIBUTES:
+                        return False
+                except OSError:
+                    return False
+            if self.exclude_dir_name is not None and self.exclude_dir_name(name.casefold()):
+                return False
+            if self.exclude_dir_path is not None and self.exclude_dir_path("/".join(parts[:depth + 1]).casefold()):
+                return False
+        if self.one_filesystem:
+            try:
+                return os.stat(path).st_dev == os.stat(self.root).st_dev
+            except OSError:
+                return False
+        return True
+
+    def allow_name(self, name):
+        """按文件名判断（在 stat 之前）"""
+        if self.skip_temp and name.startswith(TEMP_PREFIXES):
+            return False
+        if self.include_name is None and self.exclude_name is None:
+            return True
+        folded = name.casefold()
+        if self.include_name is not None and not self.include_name(folded):
+            return False
+        return self.exclude_name is None or not self.exclude_name(folded)
+
+    def allow_stats(self, stats):
+        """按大小与修改时间判断"""
+        if self.min_size is not None and stats.st_size < self.min_size:
+            return False
+        if self.max_size is not None and stats.st_size > self.max_size:
+            return False
+        if self.modified_after is not None and stats.st_mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and stats.st_mtime >= self.modified_before:
+            return False
+        return True
+
+
+class RuleSet:
+    """配置中的全部规则，按根目录取出编译后的 ScanRules"""
+
+    def __init__(self, config_rules=None):
+        config_rules = config_rules or {}
+        self.default = dict(config_rules.get("*", {}))
+        self.specs = {
+            os.path.normcase(os.path.normpath(root)): spec
+            for root, spec in config_rules.items() if root != "*"
+        }
+        self.compiled = {}
+        # 提前编译一次，配置有误时立即报告
+        ScanRules("", self.default)
+        for root, spec in self.specs.items():
+            ScanRules(root, {**self.default, **spec})
+
+    def for_root(self, root):
+        """返回根目录的 ScanRules，没有任何规则时返回 None"""
+        rules = self.compiled.get(root)
+        if rules is None and root not in self.compiled:
+            spec = {**self.default, **self.specs.get(os.path.normcase(os.path.normpath(root)), {})}
+            rules = self.compiled[root] = ScanRules(root, spec) if spec else None
+        return rules
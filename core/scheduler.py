@@ -0,0 +1,295 @@
+"""多根目录扫描调度：有界工作线程池，按子目录拆分任务并限制每个设备的并发"""
+import itertools
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from core.incremental import IncrementalScanner
+from core.walker import DOC_EXTENSIONS
+
+# 任务优先级，数值小的先处理：新添加的目录先于普通搜索，后台刷新最后
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+
+class ScanJob:
+    """一个根目录的扫描任务
+
+    callback(msg_type, data) 在工作线程中调用，消息与搜索线程一致：
+    ("file", 记录)、("remove", 路径列表)、("error", 消息)，最后总是 ("done", 根目录)。
+    每次写检查点前发送 ("checkpoint", 根目录)：此前送出的结果即将被记为已索引，
+    下次续做时不会再次送出，缓冲结果的消费者须在此时全部送出。
+    同一任务的回调不会并发。取消的任务不再回调，也不写回索引（已写入的检查点保留）。
+    """
+
+    def __init__(self, job_id, root, callback, device, force_dirs=(), rules=None, priority=PRIORITY_NORMAL,
+                 resume=True):
+        self.id = job_id
+        self.root = root
+        self.callback = callback
+        self.device = device
+        self.force_dirs = force_dirs
+        self.rules = rules
+        self.priority = priority
+        self.resume = resume
+        self.state = None  # 处理根目录时由 IncrementalScanner.begin 创建
+        self.stack = []  # 待处理的目录（后进先出，深度优先，待处理目录数较少）
+        self.running = set()  # 正在处理的目录
+        self.pending = 0  # 已排队或正在处理的目录数
+        self.error = None
+        self.cancelled = False
+        self.paused = False
+        self.finished = False
+        self.last_checkpoint = time.monotonic()
+        # 写检查点与最终写回索引互斥
+        self.checkpoint_lock = threading.Lock()
+
+    def on_change(self, kind, record):
+        # 在 state.lock 内调用，同一任务的 "file" 消息不会并发
+        if not self.cancelled:
+            self.callback("file", record)
+
+
+class ScanScheduler:
+    """所有根目录共用一个有界线程池，目录是最小调度单位
+
+    每个目录读取完后其子目录重新排队，一个很大的根目录也能由多个线程同时处理。
+    任务按根目录所在设备（st_dev）分组，每个设备同时处理的目录数不超过
+    per_device，避免几十个根目录同时压在同一块磁盘或同一台 SMB 服务器上。
+    空闲线程总是先取优先级最高的任务中的目录，同一优先级先取较空闲设备上、较早提交的任务。
+
+    每隔 checkpoint_interval 秒把任务已完成的部分和待访问的目录写入索引，
+    程序退出或任务被取消后，再次提交同一根目录时从检查点继续（None 表示不写检查点）。
+    """
+
+    def __init__(self, index, extensions=DOC_EXTENSIONS, workers=8, per_device=4, on_error=None, metrics=None,
+                 checkpoint_interval=30.0):
+        self.scanner = IncrementalScanner(index, extensions, on_error, metrics)
+        self.metrics = metrics
+        self.workers = max(1, workers)
+        self.per_device = max(1, per_device)
+        self.checkpoint_interval = checkpoint_interval
+        self.condition = threading.Condition()
+        self.devices = {}  # 设备号 -> 该设备上未完成的任务列表
+        self.active = {}  # 设备号 -> 正在处理的目录数
+        self.jobs = {}  # 任务号 -> 未完成的任务
+        self.ids = itertools.count(1)
+        self.threads = []
+        self.closed = False
+
+    def submit(self, root, callback, force_dirs=(), rules=None, priority=PRIORITY_NORMAL, resume=True):
+        """提交一个根目录扫描，返回 ScanJob（job.id 用于取消、暂停和继续）
+
+        rules 为该根目录的 ScanRules；resume 时如有检查点则从检查点继续。
+        """
+        try:
+            device = os.stat(root).st_dev
+        except OSError:
+            # 根目录无法访问时仍走正常流程，由工作线程报告错误
+            device = None
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("扫描调度器已关闭")
+            job = ScanJob(next(self.ids), root, callback, device, force_dirs, rules, priority, resume)
+            self.jobs[job.id] = job
+            self.devices.setdefault(device, []).append(job)
+            self._push(job, [root])
+            # 一个根目录也会拆成多个目录任务，第一次提交时就启动全部工作线程
+            while len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._worker, daemon=True)
+                self.threads.append(thread)
+                thread.start()
+            self.condition.notify_all()
+        return job
+
+    def cancel(self, job_id=None):
+        """取消一个任务，未指定时取消所有未完成的任务（开始新一轮刷新时调用）
+
+        已开始的任务先写一次检查点，下次提交同一根目录时可以继续。
+        """
+        with self.condition:
+            jobs = self._select(job_id)
+        # 先写检查点再标记取消：标记后处理完的目录不再把子目录排队
+        for job in jobs:
+            self._checkpoint(job, wait=True)
+        with self.condition:
+            for job in jobs:
+                job.cancelled = True
+                job.pending -= len(job.stack)
+                job.stack.clear()
+                # 仍有目录在处理中的任务由工作线程在处理完后丢弃
+                if not job.pending:
+                    self._discard(job)
+
+    def pause(self, job_id=None):
+        """暂停一个或全部任务：不再分配新的目录，正在处理的目录照常完成
+
+        暂停时写一次检查点，消费者随之送出缓冲的结果，暂停期间退出也不丢失进度。
+        """
+        with self.condition:
+            jobs = self._select(job_id)
+            for job in jobs:
+                job.paused = True
+        for job in jobs:
+            self._checkpoint(job, wait=True)
+
+    def resume(self, job_id=None):
+        with self.condition:
+            for job in self._select(job_id):
+                job.paused = False
+            self.condition.notify_all()
+
+    def status(self):
+        """返回未完成任务的概况列表，按调度顺序排列"""
+        with self.condition:
+            return [
+                {"id": job.id, "root": job.root, "priority": job.priority, "paused": job.paused,
+                 "queued": len(job.stack), "running": len(job.running)}
+                for job in sorted(self.jobs.values(), key=lambda job: (job.priority, job.id))
+            ]
+
+    def busy(self):
+        """是否还有未完成的任务"""
+        with self.condition:
+            return bool(self.jobs)
+
+    def shutdown(self):
+        """取消所有任务（写下检查点）并让工作线程退出"""
+        self.cancel()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def _select(self, job_id):
+        """按任务号取出任务（须持有 self.condition）"""
+        if job_id is None:
+            return list(self.jobs.values())
+        job = self.jobs.get(job_id)
+        return [job] if job is not None else []
+
+    def _discard(self, job):
+        """从调度中去掉任务（须持有 self.condition）"""
+        if self.jobs.pop(job.id, None) is not None:
+            self.devices[job.device].remove(job)
+            if not self.devices[job.device]:
+                del self.devices[job.device]
+
+    def _push(self, job, directories):
+        """把目录压入任务的待处理栈（须持有 self.condition）"""
+        if directories:
+            job.pending += len(directories)
+            # 逆序压栈，按目录列出顺序处理
+            job.stack.extend(reversed(directories))
+            if self.metrics is not None:
+                self.metrics.observe("scan.queue", sum(len(queued.stack) for queued in self.jobs.values()), "count")
+
+    def _next_task(self):
+        """取出一个不超过设备并发上限的目录（须持有 self.condition）"""
+        best = None
+        best_key = None
+        for device, jobs in self.devices.items():
+            active = self.active.get(device, 0)
+            if active >= self.per_device:
+                continue
+            for job in jobs:
+                if job.stack and not job.paused:
+                    key = (job.priority, active, job.id)
+                    if best_key is None or key < best_key:
+                        best, best_key = job, key
+        if best is None:
+            return None
+        self.active[best.device] = self.active.get(best.device, 0) + 1
+        directory = best.stack.pop()
+        best.running.add(directory)
+        return best, directory
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                task = self._next_task()
+                while task is None:
+                    if self.closed:
+                        return
+                    self.condition.wait()
+                    task = self._next_task()
+
+            job, directory = task
+            subdirs = ()
+            if not job.cancelled:
+                try:
+                    with self.metrics.profile() if self.metrics is not None else nullcontext():
+                        resumed = None
+                        if job.state is None:
+                            job.state = self.scanner.begin(
+                                job.root, job.on_change, job.force_dirs, job.rules, job.resume
+                            )
+                            # 从检查点继续时不列出根目录，直接排入检查点中待访问的目录
+                            resumed = job.state.frontier
+                        subdirs = resumed if resumed is not None else self.scanner.visit(job.state, directory)
+                except Exception as e:
+                    # 子目录的错误已在 visit 中处理，到这里的都是根目录或索引的错误
+                    job.error = e
+
+            with self.condition:
+                self.active[job.device] -= 1
+                job.pending -= 1
+                job.running.discard(directory)
+                if not job.cancelled and job.error is None:
+                    self._push(job, subdirs)
+                finished = job.pending == 0 and job.id in self.jobs
+                if finished:
+                    self._discard(job)
+                self.condition.notify_all()
+            if finished and not job.cancelled:
+                self._finish(job)
+            elif (self.checkpoint_interval is not None and job.state is not None
+                  and time.monotonic() - job.last_checkpoint >= self.checkpoint_interval):
+                self._checkpoint(job)
+
+    def _checkpoint(self, job, wait=False):
+        """把任务目前的结果与待访问的目录写入索引"""
+        if job.state is None or job.error is not None or self.checkpoint_interval is None:
+            return
+        # 另一个线程正在写时跳过（取消时则等它写完再写最后一次）
+        if not job.checkpoint_lock.acquire(blocking=wait):
+            return
+        try:
+            # 已取消的任务待访问列表已清空，不能再覆盖取消时写下的检查点
+            if job.finished or job.cancelled:
+                return
+            job.last_checkpoint = time.monotonic()
+            # 同时持有两把锁，快照中的每个目录要么已处理完且子目录已排队，要么仍在待访问列表中
+            with self.condition:
+                frontier = list(job.running) + job.stack[::-1]
+                progress = self.scanner.snapshot(job.state)
+            # 先让消费者送出快照中的结果，再把它们记为已索引，否则停止后缓冲中的结果会丢失
+            # （与 on_change 一样在 state.lock 内回调，同一任务的回调不会并发）
+            with job.state.lock:
+                if not job.cancelled:
+                    if progress.removed:
+                        job.callback("remove", progress.removed)
+                    job.callback("checkpoint", job.root)
+            try:
+                self.scanner.save_checkpoint(job.state, frontier, progress)
+            except Exception as e:
+                print(f"保存扫描检查点 {job.root} 时出错: {e}")
+        finally:
+            job.checkpoint_lock.release()
+
+    def _finish(self, job):
+        """汇总并写回索引，然后报告完成"""
+        with job.checkpoint_lock:
+            job.finished = True
+            if job.error is None:
+                try:
+                    delta = self.scanner.finish(job.state)
+                    if delta.removed:
+                        job.callback("remove", delta.removed)
+                except Exception as e:
+                    job.error = e
+        if job.error is not None:
+            job.callback("error", f"搜索目录 {job.root} 时出错: {str(job.error)}")
+        # 出错时同样报告完成，保证进度能够结束
+        job.callback("done", job.root)
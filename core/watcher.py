@@ -0,0 +1,328 @@
+"""文件系统监控：把新增、删除和修改实时推送到文件列表
+
+监控后端只负责报告"哪个根目录下的哪个目录有变化"，变化的目录在一段静默期后
+合并为一次增量扫描（IncrementalScanner），结果以与搜索相同的消息协议回调：
+("file", 记录) 表示新增或修改，("remove", 路径列表) 表示删除。
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from core.incremental import IncrementalScanner
+from core.walker import DOC_EXTENSIONS
+
+
+# 轮询的默认间隔（秒）；没有变化的根目录逐次加倍，最长为间隔的 MAX_POLL_BACKOFF 倍
+POLL_INTERVAL = 60.0
+MAX_POLL_BACKOFF = 10
+
+
+class PollingBackend:
+    """轮询后备方案：定期对每个根目录执行一次增量扫描
+
+    每个根目录单独计时：扫描没有发现变化时间隔加倍（最长 max_interval），发现变化后恢复为 interval。
+    网络共享上每次轮询都要重新读取所有目录的修改时间，长时间不变的目录不宜频繁轮询。
+    """
+    name = "polling"
+
+    def __init__(self, interval=POLL_INTERVAL, max_interval=None):
+        self.interval = interval
+        self.max_interval = max_interval if max_interval is not None else interval * MAX_POLL_BACKOFF
+        self.condition = threading.Condition()
+        self.delays = {}  # 根目录 -> 当前间隔
+        self.due = {}  # 根目录 -> 下次轮询的时刻（monotonic）
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def start(self, roots, notify):
+        now = time.monotonic()
+        with self.condition:
+            self.delays = {root: self.interval for root in roots}
+            self.due = {root: now + self.interval for root in roots}
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, args=(notify,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def scanned(self, root, changed):
+        """监控器扫描完一个根目录后调用，按是否发现变化调整该根目录的轮询间隔"""
+        with self.condition:
+            if root not in self.delays:
+                return
+            delay = self.interval if changed else min(self.delays[root] * 2, self.max_interval)
+            self.delays[root] = delay
+            self.due[root] = time.monotonic() + delay
+            self.condition.notify_all()
+
+    def _run(self, notify):
+        while not self.stop_event.is_set():
+            with self.condition:
+                now = time.monotonic()
+                due = [root for root, at in self.due.items() if at <= now]
+                if not due:
+                    self.condition.wait(min(self.due.values(), default=now + self.interval) - now)
+                    continue
+                # 扫描完成后由 scanned 重新计时；未调用时按当前间隔继续轮询
+                for root in due:
+                    self.due[root] = now + self.delays[root]
+            for root in due:
+                notify(root, None)
+
+
+class InotifyBackend:
+    """Linux inotify 后端，精确报告发生变化的目录"""
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o0004000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                  | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    _libc = None
+
+    def __init__(self):
+        self.fd = None
+        self.watches = {}  # wd -> (根目录, 目录路径)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    @classmethod
+    def _load_libc(cls):
+        if cls._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            cls._libc = libc
+        return cls._libc
+
+    @classmethod
+    def available(cls):
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            cls._load_libc()
+        except (OSError, AttributeError):
+            return False
+        return True
+
+    def start(self, roots, notify):
+        """为所有根目录递归添加监控；监控数超出系统上限时抛出 OSError"""
+        libc = self._load_libc()
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        try:
+            for root in roots:
+                self._add_tree(root, root)
+        except OSError:
+            os.close(self.fd)
+            self.fd = None
+            raise
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, args=(list(roots), notify), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.watches.clear()
+
+    def _add_watch(self, root, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self.watches[wd] = (root, directory)
+
+    def _add_tree(self, root, directory):
+        """监控目录及其全部子目录"""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                self._add_watch(root, current)
+                with os.scandir(current) as entries:
+                    stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+            except (FileNotFoundError, PermissionError):
+                continue
+
+    def _run(self, roots, notify):
+        while not self.stop_event.is_set():
+            readable, _, _ = select.select([self.fd], [], [], 0.5)
+            if not readable:
+                continue
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(buffer, offset)
+                offset += self.EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    # 事件队列溢出，无法知道具体目录，交给增量扫描按修改时间判断
+                    for root in roots:
+                        notify(root, None)
+                    continue
+                watch = self.watches.get(wd)
+                if watch is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    del self.watches[wd]
+                    continue
+                root, directory = watch
+                notify(root, directory)
+                if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # 新建或移入的子目录需要继续监控（其内容由父目录的重新列出带出）
+                    subdir = os.path.join(directory, name)
+                    try:
+                        self._add_tree(root, subdir)
+                    except OSError as e:
+                        print(f"监控目录 {subdir} 失败: {e}")
+
+
+# 按优先级排列的监控后端，可追加自定义后端（需实现 available/start/stop）
+BACKENDS = [InotifyBackend, PollingBackend]
+
+
+def create_backend(name=None, poll_interval=POLL_INTERVAL):
+    """创建指定名称的后端，未指定时选择第一个可用的后端；轮询后端使用 poll_interval 秒的间隔"""
+    for backend_class in BACKENDS:
+        if name is not None and backend_class.name != name:
+            continue
+        if backend_class.available():
+            return PollingBackend(poll_interval) if backend_class is PollingBackend else backend_class()
+    if name is not None:
+        raise ValueError(f"监控后端不可用: {name}")
+    return PollingBackend(poll_interval)
+
+
+class DirectoryWatcher:
+    """监控一组根目录，合并突发事件后以增量形式回调 callback(msg_type, data)"""
+
+    def __init__(self, index, callback, extensions=DOC_EXTENSIONS, backend=None, debounce=1.0, on_error=None,
+                 rules=None, poll_interval=POLL_INTERVAL):
+        self.scanner = IncrementalScanner(index, extensions, on_error)
+        self.poll_interval = poll_interval  # 没有可用的事件后端、退回轮询时的间隔
+        self.rules = rules  # core.scan_rules.RuleSet，与搜索使用同一份规则
+        self.callback = callback
+        self.backend = backend
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.dirty = {}  # 根目录 -> 需要强制重新列出的目录集合
+        self.last_event = 0.0
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, roots):
+        """开始监控；首选后端启动失败（如超出监控数上限）时退回轮询"""
+        if self.backend is None:
+            self.backend = create_backend(poll_interval=self.poll_interval)
+        try:
+            self.backend.start(roots, self._notify)
+        except OSError as e:
+            print(f"{self.backend.name} 监控启动失败，改用轮询: {e}")
+            self.backend = PollingBackend(self.poll_interval)
+            self.backend.start(roots, self._notify)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+        if self.backend is not None:
+            self.backend.stop()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _notify(self, root, directory):
+        """后端回调：记录有变化的目录（directory 为 None 表示只按修改时间判断）"""
+        with self.lock:
+            dirs = self.dirty.setdefault(root, set())
+            if directory is not None:
+                dirs.add(directory)
+            self.last_event = time.monotonic()
+        self.wakeup.set()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wakeup.wait()
+            self.wakeup.clear()
+            # 等到事件静默 debounce 秒后再统一处理，合并突发的大量事件
+            while not self.stop_event.is_set():
+                with self.lock:
+                    remaining = self.last_event + self.debounce - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.stop_event.wait(remaining)
+            if self.stop_event.is_set():
+                break
+            with self.lock:
+                dirty, self.dirty = self.dirty, {}
+            for root, dirs in dirty.items():
+                self._flush(root, dirs)
+
+    def _flush(self, root, dirs):
+        try:
+            delta = self.scanner.scan(
+                root,
+                lambda kind, record: self.callback("file", record),
+                force_dirs=dirs,
+                rules=self.rules.for_root(root) if self.rules is not None else None
+            )
+            if delta.removed:
+                self.callback("remove", delta.removed)
+            # 轮询后端据此放慢或恢复对该根目录的轮询
+            scanned = getattr(self.backend, "scanned", None)
+            if scanned is not None:
+                scanned(root, bool(delta))
+        except Exception as e:
+            # 任何错误都不能结束监控线程，否则实时更新会无声无息地停止
+            try:
+                self.callback("error", f"监控目录 {root} 时出错: {str(e)}")
+            except Exception:
+                print(f"监控目录 {root} 时出错: {e}")
@@ -1,22 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import glob
-from datetime import datetime
-import win32com.client
-from win32com.shell import shell, shellcon
-import pythoncom
-from pathlib import Path
 import threading
-from queue import Queue
 import time
-import queue
-import urllib.request
-from win32gui import CreateRoundRectRgn, SetWindowRgn
 from ui.styles import StyleManager
 from ui.file_list import FileListManager
-from core.file_search import FileSearcher
 from core.config import ConfigManager
+from core.scheduler import PRIORITY_BACKGROUND, PRIORITY_HIGH, ScanScheduler
+from core.pipeline import ResultPipeline
+from core.file_model import FileListModel, format_size, format_time
+from core.file_types import FILE_TYPES
+from ui.virtual_list import VirtualList
+from core.file_index import FileIndex
+from core.metrics import Metrics
+from core.walker import collapse_roots
+# 查重、内容索引、文档属性、导出、打包、整理、监控等功能模块（及 pywin32）
+# 在首次使用时才导入，启动时只加载扫描与列表所需的模块
 
 class FileOrganizer:
     def __init__(self, root):
@@ -42,19 +41,16 @@ class FileOrganizer:
         self.main_frame = ttk.Frame(self.root)
         self.main_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
-        # 设置窗口圆角
+        # 设置窗口圆角（首次绘制后统一设置一次，见 schedule_rounded）
         self.root.overrideredirect(True)  # 移除默认的窗口边框
-        self.make_rounded()
+        self.rounded_after_id = None
+        self.rounded_size = None
         
         # 存储选择的目录
         self.selected_dirs = []
         
         # 支持的文件类型
-        self.file_types = {
-            "📝 Word文件": "*.doc*",
-            "📊 Excel文件": "*.xls*",
-            "📑 PPT文件": "*.ppt*"
-        }
+        self.file_types = FILE_TYPES
         
         # 创建自定义样式
         self.style_manager = StyleManager(self.colors)
@@ -78,15 +74,38 @@ class FileOrganizer:
         self.sort_column = None  # 当前排序的列
         self.sort_reverse = False  # 排序方向
         
-        # 添加文件列表存储
-        self.all_files = []  # 存储所有文件的ID
-        
         # 绑定窗口大小变化事件
         self.root.bind('<Configure>', lambda e: self.on_window_configure(e))
         
         # 初始化配置管理器
         self.config_manager = ConfigManager()
         
+        # 初始化持久化文件索引
+        self.file_index = FileIndex()
+        self.watcher = None  # 实时监控（可选）
+        
+        # 文档内容全文索引（勾选“搜索内容”后才打开）
+        self.content_index = None
+        self.content_indexing = False
+        self.closing = False
+        
+        # 文档属性（勾选“文档属性”后才创建并在后台读取）
+        self.metadata_enricher = None
+        
+        # 所有目录共用的扫描线程池，线程数、每个磁盘的并发数和检查点间隔可在配置中调整
+        self.scan_scheduler = ScanScheduler(
+            self.file_index,
+            workers=self.config_manager.config.get('scan_workers', 8),
+            per_device=self.config_manager.config.get('scan_per_device', 4),
+            on_error=lambda path, e: print(f"读取 {path} 时出错: {e}"),
+            metrics=self.metrics,
+            checkpoint_interval=self.config_manager.config.get('scan_checkpoint_interval', 30.0)
+        )
+        self.pending_dirs = set()
+        self.scan_jobs = {}  # 正在扫描的目录 -> 任务号
+        self.search_paused = False
+        self.scan_rules = None  # 每次搜索开始时从配置读取的排除规则（core.scan_rules.RuleSet）
+        
         # 设置窗口位置和大小
         size = self.config_manager.config['last_window_size']
         position = self.config_manager.config['last_window_position']
@@ -98,44 +117,113 @@ class FileOrganizer:
         # 绑定窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
+        # 窗口首次绘制后再设置圆角
+        self.schedule_rounded()
+        
     def setup_window(self):
         """设置窗口基本属性"""
         self.root.configure(bg=self.colors['bg'])  # 使用背景色
         self.root.overrideredirect(True)  # 移除默认的窗口边框
-        self.make_rounded()
         
     def init_components(self):
         """初始化组件"""
-        self.file_searcher = FileSearcher(self.handle_search_result)
+        # 文件列表数据模型，Treeview 只显示其中可见的行
+        self.file_model = FileListModel(self.file_types)
+        
+        # 搜索与监控线程批量推送结果，由主线程按帧预算分批插入
+        # 扫描与界面投递的性能指标
+        self.metrics = Metrics()
+        self.result_pipeline = ResultPipeline(self.root, self.handle_search_result, metrics=self.metrics)
+        self.result_pipeline.start()
         
     def handle_search_result(self, msg_type, data):
         """处理搜索结果的回调函数"""
         try:
             if msg_type == "file":
-                # 添加文件到列表
-                item_id = self.tree.insert("", tk.END, values=(
-                    self.get_file_icon(data["type"]),  # 添加文件图标
-                    data["name"],
-                    data["type"],
-                    data["size"],
-                    data["created"],
-                    data["modified"],
-                    data["path"]
-                ))
-                self.all_files.append(item_id)
+                # 添加或更新文件
+                self.add_file_item(data)
+                
+            elif msg_type == "remove":
+                # 移除已删除的文件（路径列表）
+                self.remove_file_items(data)
                 
             elif msg_type == "done":
+                # 忽略已取消的任务遗留的完成消息
+                if data not in self.pending_dirs:
+                    return
+                self.pending_dirs.discard(data)
+                self.scan_jobs.pop(data, None)
                 self.completed_dirs += 1
-                progress = f"正在搜索... ({self.completed_dirs}/{self.total_dirs})"
-                self.progress_var.set(progress)
+                if not self.pending_dirs:
+                    self.finish_search()
+                elif not self.search_paused:
+                    self.progress_var.set(f"正在搜索... ({self.completed_dirs}/{self.total_dirs})")
+                
+            elif msg_type == "metadata":
+                # 后台读到了新的文档属性，刷新可见行
+                self.file_list.schedule_refresh()
+                
+            elif msg_type == "content_progress":
+                if not getattr(self, 'searching', False):
+                    self.progress_var.set(data)
+                
+            elif msg_type == "content_done":
+                self.content_indexing = False
+                if not getattr(self, 'searching', False):
+                    self.progress_var.set(data)
+                # 新提取的内容可能命中当前的搜索词
+                if self.search_var.get():
+                    self.apply_search()
+                
+            elif msg_type == "export_progress":
+                done, total = data
+                self.progress_bar.configure(value=done)
+                self.progress_var.set(f"正在导出... ({done}/{total})")
+                
+            elif msg_type == "export_done":
+                self.exporting = False
+                self.progress_bar.pack_forget()
+                self.progress_bar.configure(mode='indeterminate', value=0)
+                self.progress_var.set(data)
+                
+            elif msg_type == "pack_progress":
+                # 打包期间开始的搜索占用了进度条和状态栏
+                if not getattr(self, 'searching', False):
+                    done, total = data
+                    self.progress_bar.configure(value=done * 100 / total if total else 100)
+                    self.progress_var.set(f"正在打包... ({self.get_file_size(done)}/{self.get_file_size(total)})")
                 
-                if self.completed_dirs >= self.total_dirs:
-                    self.progress_bar.stop()
+            elif msg_type == "pack_done":
+                self.packer = None
+                if getattr(self, 'searching', False):
+                    messagebox.showinfo("打包", data)
+                else:
                     self.progress_bar.pack_forget()
-                    self.progress_var.set(f"搜索完成，共找到 {len(self.tree.get_children())} 个文件")
-                    self.searching = False
-                    # 启用文件类型选择
-                    self.file_type_combo.configure(state="readonly")
+                    self.progress_bar.configure(mode='indeterminate', value=0)
+                    self.progress_var.set(data)
+                
+            elif msg_type == "organize_plan":
+                self.confirm_organize(data)
+                
+            elif msg_type == "organize_done":
+                self.organizing = False
+                self.progress_bar.stop()
+                self.progress_bar.pack_forget()
+                self.progress_var.set(data)
+                
+            elif msg_type == "duplicate_progress":
+                self.progress_var.set(data)
+                
+            elif msg_type == "duplicates":
+                self.progress_bar.stop()
+                self.progress_bar.pack_forget()
+                self.finding_duplicates = False
+                if data:
+                    from ui.duplicate_window import DuplicateWindow
+                    self.progress_var.set(f"找到 {len(data)} 组重复文件")
+                    DuplicateWindow(self.root, data, self.get_file_size, self.colors)
+                else:
+                    self.progress_var.set("没有发现重复文件")
                 
             elif msg_type == "error":
                 messagebox.showerror("错误", data)
@@ -210,6 +298,46 @@ class FileOrganizer:
             command=self.remove_directory
         ).pack(pady=5, fill=tk.X)
         
+        # 查找重复文件按钮
+        ttk.Button(
+            left_frame,
+            text="🧬 查找重复",
+            style='Rounded.TButton',
+            command=self.find_duplicates
+        ).pack(pady=5, fill=tk.X)
+        
+        # 按规则整理按钮
+        ttk.Button(
+            left_frame,
+            text="🗂️ 按规则整理",
+            style='Rounded.TButton',
+            command=self.organize_files
+        ).pack(pady=5, fill=tk.X)
+        
+        # 导出当前列表按钮
+        ttk.Button(
+            left_frame,
+            text="📤 导出列表",
+            style='Rounded.TButton',
+            command=self.export_view
+        ).pack(pady=5, fill=tk.X)
+        
+        # 打包选中（或当前列表中）的文件
+        ttk.Button(
+            left_frame,
+            text="📦 打包归档",
+            style='Rounded.TButton',
+            command=self.pack_files
+        ).pack(pady=5, fill=tk.X)
+        
+        # 导出扫描性能指标按钮
+        ttk.Button(
+            left_frame,
+            text="📊 性能数据",
+            style='Rounded.TButton',
+            command=self.dump_metrics
+        ).pack(pady=5, fill=tk.X)
+        
         # 创建右侧面板
         right_frame = ttk.Frame(self.main_frame)
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=20, pady=5)
@@ -230,6 +358,7 @@ class FileOrganizer:
         ).pack(side=tk.LEFT)
         
         self.search_var = tk.StringVar()
+        self.search_after_id = None  # 搜索防抖定时器
         self.search_var.trace('w', self.on_search_change)  # 绑定变化事件
         
         self.search_entry = ttk.Entry(
@@ -261,6 +390,52 @@ class FileOrganizer:
         )
         self.file_type_combo.pack(side=tk.LEFT)
         
+        # 实时监控开关
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            control_frame,
+            text="👀 实时监控",
+            variable=self.watch_var,
+            command=self.update_watcher
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 内容搜索开关
+        self.content_var = tk.BooleanVar(value=False)
+        self.content_check = ttk.Checkbutton(
+            control_frame,
+            text="📄 搜索内容",
+            variable=self.content_var,
+            command=self.toggle_content_search
+        )
+        self.content_check.pack(side=tk.LEFT, padx=5)
+        
+        # 文档属性开关
+        self.metadata_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            control_frame,
+            text="🏷️ 文档属性",
+            variable=self.metadata_var,
+            command=self.toggle_metadata
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 逐文件计时开关（记录每个文件 stat 的耗时，默认关闭以免拖慢扫描）
+        self.stat_timing_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            control_frame,
+            text="⏱️ 逐文件计时",
+            variable=self.stat_timing_var,
+            command=lambda: setattr(self.metrics, 'detailed', self.stat_timing_var.get())
+        ).pack(side=tk.LEFT, padx=5)
+        
+        # 性能分析开关（cProfile + tracemalloc，关闭时写出报告）
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            control_frame,
+            text="🩺 性能分析",
+            variable=self.profile_var,
+            command=self.toggle_profiling
+        ).pack(side=tk.LEFT, padx=5)
+        
         # 进度显示
         self.progress_var = tk.StringVar(value="💝 准备就绪")
         self.progress_label = ttk.Label(
@@ -278,6 +453,22 @@ class FileOrganizer:
             style='Custom.Horizontal.TProgressbar'
         )
         
+        # 搜索进行中才显示的暂停与停止按钮
+        self.search_controls = ttk.Frame(control_frame)
+        self.pause_button = ttk.Button(
+            self.search_controls,
+            text="⏸ 暂停",
+            style='Rounded.TButton',
+            command=self.toggle_pause_search
+        )
+        self.pause_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(
+            self.search_controls,
+            text="⏹ 停止",
+            style='Rounded.TButton',
+            command=self.stop_search
+        ).pack(side=tk.LEFT, padx=2)
+        
         # 创建滚动条容器
         scroll_frame = ttk.Frame(right_frame)
         scroll_frame.pack(fill=tk.BOTH, expand=True)
@@ -285,7 +476,7 @@ class FileOrganizer:
         # 文件列表
         self.tree = ttk.Treeview(
             scroll_frame,
-            columns=("图标", "名称", "类型", "大小", "创建时间", "修改时间", "路径"),
+            columns=("图标", "名称", "类型", "大小", "创建时间", "修改时间", "标题", "作者", "修改者", "页数", "路径"),
             show="headings",
             style="Rounded.Treeview"
         )
@@ -298,12 +489,17 @@ class FileOrganizer:
             "大小": ("📦 大小", 100),
             "创建时间": ("📅 创建时间", 150),
             "修改时间": ("🕒 修改时间", 150),
+            "标题": ("🏷️ 标题", 120),
+            "作者": ("👤 作者", 80),
+            "修改者": ("✏️ 修改者", 80),
+            "页数": ("📃 页数", 50),
             "路径": ("📂 路径", 300)
         }
+        # 文档属性列（由后台读取填充，不参与排序）
+        self.metadata_columns = ("标题", "作者", "修改者", "页数")
         
-        # 添加垂直滚动条
-        y_scrollbar = ttk.Scrollbar(scroll_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=y_scrollbar.set)
+        # 添加垂直滚动条（由虚拟列表按模型行数驱动）
+        y_scrollbar = ttk.Scrollbar(scroll_frame, orient=tk.VERTICAL)
         
         # 添加水平滚动条
         x_scrollbar = ttk.Scrollbar(scroll_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
@@ -320,10 +516,12 @@ class FileOrganizer:
         
         # 设置列和绑定事件
         for col, (text, width) in self.columns.items():
-            if col != "图标":  # 图标列不需要排序功能
+            if col != "图标" and col not in self.metadata_columns:  # 图标列和属性列不需要排序功能
                 self.tree.heading(col, text=text, command=lambda c=col: self.sort_treeview(c))
-            else:
+            elif col == "图标":
                 self.tree.heading(col, text="")  # 图标列不显示标题
+            else:
+                self.tree.heading(col, text=text)
             self.tree.column(col, width=width, minwidth=20, stretch=False)  # 禁用自动拉伸
         
         # 绑定列宽调整事件
@@ -345,16 +543,22 @@ class FileOrganizer:
         # 绑定双击事件
         self.tree.bind('<Double-Button-1>', self.open_file)
         
+        # 虚拟列表：只为可见行创建条目
+        self.file_list = VirtualList(self.tree, y_scrollbar, self.file_model, self.get_row_values)
+        
     def load_saved_directories(self):
-        """加载保存的目录并开始搜索"""
+        """加载保存的目录，先从索引显示文件，再在后台校对磁盘"""
         directories = self.config_manager.get_directories()
         for directory in directories:
             if os.path.exists(directory):
                 self.selected_dirs.append(directory)
                 self.dir_listbox.insert(tk.END, directory)
         
-        # 如果有保存的目录，开始搜索
+        # 如果有保存的目录，先显示索引内容，再开始校对搜索
         if self.selected_dirs:
+            for record in self.file_index.load(self.selected_dirs):
+                self.add_file_item(record)
+            self.warm_search_index()
             self.refresh_files()
     
     def add_directory(self):
@@ -370,18 +574,59 @@ class FileOrganizer:
         if selection:
             index = selection[0]
             directory = self.selected_dirs[index]
+            _, nested = collapse_roots(self.selected_dirs, self.scan_rules)
             self.selected_dirs.pop(index)
             self.dir_listbox.delete(index)
             self.config_manager.remove_directory(directory)  # 从配置中移除
-            self.refresh_files()
+            # 停止该目录的扫描（其余目录照常），再移除该目录独有的文件
+            self.cancel_scan(directory)
+            self.remove_file_items(self.file_index.remove_root(directory))
+            # 原本由该目录一并扫描的子目录需要单独扫描
+            uncovered = [d for d in collapse_roots(self.selected_dirs, self.scan_rules)[0] if d in nested]
+            if uncovered:
+                self.start_search(uncovered)
+            elif getattr(self, 'searching', False) and not self.pending_dirs:
+                self.finish_search()
+            else:
+                self.update_watcher()
             
     def get_file_size(self, size_bytes):
         """将文件大小转换为人类可读格式"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024:
-                return f"{size_bytes:.2f}{unit}"
-            size_bytes /= 1024
-        return f"{size_bytes:.2f}TB"
+        return format_size(size_bytes)
+    
+    def add_file_item(self, record):
+        """把文件记录添加到列表，路径已存在时就地更新"""
+        self.file_model.upsert(record)
+        self.file_list.schedule_refresh()
+    
+    def remove_file_items(self, paths):
+        """从列表中批量移除指定路径的文件"""
+        if self.file_model.remove(paths):
+            self.file_list.schedule_refresh()
+    
+    def get_row_values(self, row):
+        """生成某一行的显示内容（只在该行可见时调用）"""
+        model = self.file_model
+        file_type = model.types[row]
+        path = model.paths[row]
+        metadata = ("", "", "", "")
+        if self.metadata_var.get() and self.metadata_enricher is not None:
+            values = self.metadata_enricher.get(path, model.mtimes[row])
+            if values is None:
+                # 可见行优先读取，读完后刷新列表
+                self.metadata_enricher.request(path, model.mtimes[row])
+            else:
+                metadata = tuple("" if value is None else value for value in values)
+        return (
+            self.get_file_icon(file_type),  # 添加文件图标
+            model.names[row],
+            file_type,
+            self.get_file_size(model.sizes[row]),
+            format_time(model.ctimes[row]),
+            format_time(model.mtimes[row]),
+            *metadata,
+            path
+        )
     
     def sort_treeview(self, col):
         """根据列头排序"""
@@ -392,25 +637,13 @@ class FileOrganizer:
             self.sort_column = col
             self.sort_reverse = False
         
-        # 获取所有项目
-        items = [(self.tree.set(item, col), item) for item in self.tree.get_children("")]
-        
-        # 根据不同列类型进行排序
-        if col in ["创建时间", "修改时间"]:
-            items.sort(key=lambda x: datetime.strptime(x[0], "%Y-%m-%d %H:%M"), reverse=self.sort_reverse)
-        elif col == "大小":
-            def convert_size(size_str):
-                units = {'B': 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3, 'TB': 1024**4}
-                number = float(size_str[:-2])
-                unit = size_str[-2:]
-                return number * units[unit]
-            items.sort(key=lambda x: convert_size(x[0]), reverse=self.sort_reverse)
-        else:
-            items.sort(key=lambda x: x[0].lower(), reverse=self.sort_reverse)
-        
-        # 重新插入排序后的项目
-        for index, (val, item) in enumerate(items):
-            self.tree.move(item, "", index)
+        # 在模型上按原始值排序
+        sort_fields = {
+            "名称": "name", "类型": "type", "大小": "size",
+            "创建时间": "ctime", "修改时间": "mtime", "路径": "path"
+        }
+        self.file_model.sort(sort_fields[col], self.sort_reverse)
+        self.file_list.reset()
         
         # 更新列头显示
         for column in ["名称", "类型", "大小", "创建时间", "修改时间", "路径"]:
@@ -425,218 +658,169 @@ class FileOrganizer:
 
     def filter_files(self):
         """根据选择的文件类型筛选当前列表"""
-        print("\n=== 开始筛选文件 ===")
-        
         # 获取选择的文件类型
         selected_type = self.file_type_var.get()
-        print(f"选择的文件类型: {selected_type}")
-        
-        if selected_type == "✨ 全部":
-            selected_type = "全部"
-        
-        print(f"总文件数: {len(self.all_files)}")
-        
-        # 先将所有项目重新附加到树中
-        for item in self.all_files:
-            try:
-                self.tree.reattach(item, "", "end")
-            except:
-                try:
-                    self.tree.move(item, "", "end")
-                except:
-                    print(f"无法重新附加项目: {item}")
-        
-        # 如果不是"全部"，则隐藏不匹配的文件
-        if selected_type != "全部":
-            print(f"\n开始按类型 {selected_type} 筛选...")
-            hidden_count = 0
-            shown_count = 0
-            
-            for item in self.all_files:
-                try:
-                    values = self.tree.item(item)['values']
-                    if not values:
-                        print(f"警告: 项目 {item} 没有值")
-                        continue
-                    
-                    file_type = values[2].lower()  # 获取文件类型（第三列）
-                    print(f"检查文件: {values[1]}, 类型: {file_type}")
-                    
-                    should_show = False
-                    # 根据文件扩展名判断类型
-                    if selected_type == "📝 Word文件" and file_type in [".doc", ".docx"]:
-                        should_show = True
-                    elif selected_type == "📊 Excel文件" and file_type in [".xls", ".xlsx"]:
-                        should_show = True
-                    elif selected_type == "📑 PPT文件" and file_type in [".ppt", ".pptx"]:
-                        should_show = True
-                    
-                    if should_show:
-                        shown_count += 1
-                        print(f"  显示文件: {values[1]}")
-                    else:
-                        hidden_count += 1
-                        print(f"  隐藏文件: {values[1]}")
-                        self.tree.detach(item)
-                except Exception as e:
-                    print(f"处理项目时出错: {e}")
-            
-            print(f"\n筛选结果:")
-            print(f"显示的文件数: {shown_count}")
-            print(f"隐藏的文件数: {hidden_count}")
-        
-        print("\n=== 筛选完成 ===")
-
-    def process_search_results(self):
-        """处理搜索结果队列"""
-        try:
-            while True:
-                if not hasattr(self, 'search_queue') or not hasattr(self, 'searching'):
-                    break
-                    
-                if not self.searching:
-                    break
-                    
-                try:
-                    msg_type, data = self.search_queue.get_nowait()
-                    
-                    if msg_type == "file":
-                        # 添加文件到列表
-                        stats = os.stat(data)
-                        file_type = os.path.splitext(data)[1]
-                        file_info = {
-                            "path": data,
-                            "name": os.path.basename(data),
-                            "type": file_type,
-                            "size": self.get_file_size(stats.st_size),
-                            "created": datetime.fromtimestamp(stats.st_ctime).strftime("%Y-%m-%d %H:%M"),
-                            "modified": datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M")
-                        }
-                        item_id = self.tree.insert("", tk.END, values=(
-                            self.get_file_icon(file_type),  # 添加文件图标
-                            file_info["name"],
-                            file_info["type"],
-                            file_info["size"],
-                            file_info["created"],
-                            file_info["modified"],
-                            file_info["path"]
-                        ))
-                        self.all_files.append(item_id)
-                        
-                    elif msg_type == "done":
-                        self.completed_dirs += 1
-                        progress = f"正在搜索... ({self.completed_dirs}/{self.total_dirs})"
-                        self.progress_var.set(progress)
-                        
-                    elif msg_type == "error":
-                        messagebox.showerror("错误", data)
-                        
-                except queue.Empty:
-                    pass
-                    
-                if self.completed_dirs >= self.total_dirs:
-                    self.progress_bar.stop()
-                    self.progress_bar.pack_forget()
-                    self.progress_var.set(f"搜索完成，共找到 {len(self.tree.get_children())} 个文件")
-                    self.searching = False
-                    # 启用文件类型选择
-                    self.file_type_combo.configure(state="readonly")
-                    break
-                    
-                self.root.update()
-                time.sleep(0.01)
-                
-        except Exception as e:
-            messagebox.showerror("错误", f"处理搜索结果时出错: {str(e)}")
-        finally:
-            self.searching = False
-            self.progress_bar.stop()
-            self.progress_bar.pack_forget()
-            # 确保控件被重新启用
-            self.file_type_combo.configure(state="readonly")
+        # "全部" 不是分类名称，模型会当作不筛选
+        self.file_model.set_type_filter(selected_type)
+        self.file_list.reset()
 
     def refresh_files(self):
-        """清空列表并重新搜索所有目录"""
-        # 清空现有项目和存储
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.all_files.clear()
-        
+        """增量刷新所有目录，只把新增、修改和删除的文件应用到列表（后台优先级）"""
         if not self.selected_dirs:
             return
-            
-        # 准备搜索
-        self.searching = True
-        self.completed_dirs = 0
-        self.total_dirs = len(self.selected_dirs)
-        self.search_queue = Queue()
         
-        # 禁用文件类型选择
-        self.file_type_combo.configure(state="disabled")
-        
-        # 显示进度条
-        self.progress_var.set("正在搜索...")
-        self.progress_bar.pack(side=tk.LEFT, padx=5)
-        self.progress_bar.start(10)
-        
-        # 搜索所有支持的文件类型
-        patterns = ["doc", "docx", "xls", "xlsx", "ppt", "pptx"]
+        self.start_search(self.selected_dirs, PRIORITY_BACKGROUND)
+    
+    def start_search(self, directories, priority=PRIORITY_HIGH):
+        """把目录提交给扫描线程池，结果经由管道交给主线程
+        
+        已有搜索在进行时只追加尚未在扫描的目录，不打断其它目录；
+        上次中断的扫描从检查点继续。
+        """
+        # 排除规则与目录一起保存在配置中，每次搜索重新读取
+        from core.scan_rules import RuleSet
+        try:
+            self.scan_rules = RuleSet(self.config_manager.config.get('scan_rules', {}))
+        except ValueError as e:
+            messagebox.showerror("错误", f"扫描规则有误: {str(e)}")
+            return
         
-        # 为每个目录启动搜索线程
-        search_threads = []
-        for directory in self.selected_dirs:
-            thread = threading.Thread(
-                target=self.search_files_thread,
-                args=(directory, patterns, self.search_queue),
-                daemon=True
-            )
-            search_threads.append(thread)
-            thread.start()
+        # 位于其它已选目录之下的目录由外层目录一并扫描，其自己的索引记录不再保留
+        # （外层目录的规则会排除它、或它有自己的规则时仍单独扫描）
+        _, nested = collapse_roots(self.selected_dirs, self.scan_rules)
+        for directory in nested:
+            self.cancel_scan(directory)
+            self.file_index.remove_root(directory)
+        directories = [d for d in directories if d not in nested and d not in self.pending_dirs]
+        if not directories:
+            if getattr(self, 'searching', False) and not self.pending_dirs:
+                self.finish_search()
+            return
         
-        # 启动结果处理
-        process_thread = threading.Thread(
-            target=self.process_search_results,
-            daemon=True
-        )
-        process_thread.start()
-
-    def search_files_thread(self, directory, patterns, search_queue):
-        """在线程中执行文件搜索"""
-        try:
-            for pattern in patterns:
-                for file in Path(directory).rglob(f"*.{pattern}"):
-                    try:
-                        file_path = str(file)
-                        stats = os.stat(file_path)
-                        search_queue.put(("file", file_path))
-                    except Exception as e:
-                        print(f"处理文件 {file_path} 时出错: {e}")
-                        continue
+        if not getattr(self, 'searching', False):
+            # 搜索期间暂停监控，避免与搜索同时改写索引
+            self.stop_watcher()
             
-            # 搜索完成
-            search_queue.put(("done", directory))
+            # 准备搜索
+            self.searching = True
+            self.search_paused = False
+            self.completed_dirs = 0
+            self.total_dirs = 0
+            self.result_pipeline.reset_stats()
+            self.metrics.reset()
             
-        except Exception as e:
-            search_queue.put(("error", f"搜索目录 {directory} 时出错: {str(e)}"))
+            # 禁用文件类型选择
+            self.file_type_combo.configure(state="disabled")
+            
+            # 显示进度条和暂停、停止按钮
+            self.progress_var.set("正在搜索...")
+            self.progress_bar.configure(mode='indeterminate', value=0)
+            self.progress_bar.pack(side=tk.LEFT, padx=5)
+            self.progress_bar.start(10)
+            self.pause_button.configure(text="⏸ 暂停")
+            self.search_controls.pack(side=tk.LEFT, padx=5)
+        
+        self.total_dirs += len(directories)
+        self.pending_dirs.update(directories)
+        for directory in directories:
+            job = self.scan_scheduler.submit(
+                directory, self.scan_reporter(), rules=self.scan_rules.for_root(directory), priority=priority
+            )
+            self.scan_jobs[directory] = job.id
+            if self.search_paused:
+                self.scan_scheduler.pause(job.id)
+    
+    def cancel_scan(self, directory):
+        """取消某个目录正在进行的扫描（已完成的部分保留在检查点中）"""
+        job_id = self.scan_jobs.pop(directory, None)
+        if job_id is None:
+            return
+        self.scan_scheduler.cancel(job_id)
+        self.pending_dirs.discard(directory)
+        self.total_dirs -= 1
+    
+    def toggle_pause_search(self):
+        """暂停或继续所有扫描任务，正在读取的目录会先读完"""
+        if not getattr(self, 'searching', False):
+            return
+        self.search_paused = not self.search_paused
+        if self.search_paused:
+            self.scan_scheduler.pause()
+            self.progress_bar.stop()
+            self.pause_button.configure(text="▶ 继续")
+            self.progress_var.set(f"搜索已暂停 ({self.completed_dirs}/{self.total_dirs})")
+        else:
+            self.scan_scheduler.resume()
+            self.progress_bar.start(10)
+            self.pause_button.configure(text="⏸ 暂停")
+            self.progress_var.set(f"正在搜索... ({self.completed_dirs}/{self.total_dirs})")
+    
+    def stop_search(self):
+        """停止所有扫描，已找到的文件保留，下次刷新时从检查点继续"""
+        if not getattr(self, 'searching', False):
+            return
+        self.scan_scheduler.cancel()
+        self.scan_jobs.clear()
+        self.pending_dirs.clear()
+        self.finish_search(stopped=True)
+    
+    def finish_search(self, stopped=False):
+        """所有目录扫描完成（或被停止）后恢复界面并启动后续任务"""
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
+        self.search_controls.pack_forget()
+        self.searching = False
+        self.search_paused = False
+        # 扫描与结果投递的指标显示在状态栏，完整数据可用“性能数据”按钮保存
+        summary = self.metrics.summary()
+        if stopped:
+            message = f"搜索已停止，已找到 {len(self.file_model)} 个文件，下次刷新时继续"
+        else:
+            message = f"搜索完成，共找到 {len(self.file_model)} 个文件"
+        self.progress_var.set(message + (f"（{summary}）" if summary else ""))
+        # 启用文件类型选择
+        self.file_type_combo.configure(state="readonly")
+        self.warm_search_index()
+        self.update_content_index()
+        self.backfill_metadata()
+        self.update_watcher()
+
+    def scan_reporter(self):
+        """为一个根目录的扫描创建回调：批量写入管道，写检查点前和完成时立即送出"""
+        writer = self.result_pipeline.writer()
+        
+        def report(msg_type, data):
+            if msg_type == "checkpoint":
+                # 检查点会把已送出的结果记为已索引，停止或暂停后不会再次送出
+                writer.flush()
+                return
+            writer.put(msg_type, data)
+            if msg_type == "done":
+                writer.flush()
+        return report
+
+    def schedule_rounded(self, delay=100):
+        """合并短时间内的多次圆角请求（启动、缩放、最大化），窗口尺寸稳定后只设置一次"""
+        if self.rounded_after_id is not None:
+            self.root.after_cancel(self.rounded_after_id)
+        self.rounded_after_id = self.root.after(delay, self.make_rounded)
 
     def make_rounded(self):
-        """创建圆角窗口"""
+        """创建圆角窗口（由 schedule_rounded 在事件循环中调用，此时尺寸已是最新）"""
+        self.rounded_after_id = None
         try:
-            # 确保窗口尺寸已更新
-            self.root.update_idletasks()
-            
-            # 获取实际窗口尺寸
+            # 获取实际窗口尺寸，未变化时（如只是移动窗口）无需重建区域
             width = self.root.winfo_width()
             height = self.root.winfo_height()
+            if (width, height) == self.rounded_size:
+                return
             
-            # 重新创建圆角区域
+            # 重新创建圆角区域，SetWindowRgn 会重绘窗口
             from win32gui import SetWindowRgn, CreateRoundRectRgn
             region = CreateRoundRectRgn(0, 0, width + 1, height + 1, 20, 20)  # 添加1像素避免边缘问题
             hwnd = self.root.winfo_id()
             SetWindowRgn(hwnd, region, True)
-            
-            # 刷新窗口
-            self.root.update_idletasks()
+            self.rounded_size = (width, height)
             
         except Exception as e:
             print(f"设置圆角窗口失败: {e}")
@@ -725,7 +909,7 @@ class FileOrganizer:
             self.is_maximized = False
         
         # 等待窗口大小更新完成后再设置圆角
-        self.root.after(100, self.make_rounded)
+        self.schedule_rounded()
 
     def on_click(self, event):
         """记录鼠标点击位置"""
@@ -802,8 +986,11 @@ class FileOrganizer:
             return
         
         try:
-            # 获取文件路径（在最后一列）
-            file_path = self.tree.item(item)['values'][-1]
+            # 获取条目当前显示的文件路径
+            row = self.file_list.row_at(item)
+            if row is None:
+                return
+            file_path = self.file_model.paths[row]
             print(f"正在打开文件: {file_path}")
             
             # 使用系统默认程序打开文件
@@ -819,72 +1006,388 @@ class FileOrganizer:
         """处理窗口大小变化事件"""
         if event.widget == self.root:
             # 避免过于频繁的更新
-            if hasattr(self, '_configure_timer'):
-                self.root.after_cancel(self._configure_timer)
-            self._configure_timer = self.root.after(100, self.make_rounded)
+            self.schedule_rounded()
 
-    def on_closing(self):
-        """窗口关闭时保存配置"""
-        self.config_manager.update_window_geometry(self.root.geometry())
-        self.root.quit()
+    def export_view(self):
+        """把当前列表（保持排序、类型筛选和搜索结果）导出为 CSV 或 XLSX"""
+        if getattr(self, 'exporting', False) or getattr(self, 'searching', False):
+            return
+        if not self.file_model.view:
+            messagebox.showinfo("提示", "当前列表为空，没有可导出的内容")
+            return
+        path = filedialog.asksaveasfilename(
+            title="导出文件列表",
+            defaultextension=".xlsx",
+            filetypes=[("Excel 工作簿", "*.xlsx"), ("CSV 文件", "*.csv")]
+        )
+        if not path:
+            return
+        # 只复制行号，记录在导出线程中按行读取
+        rows = list(self.file_model.view)
+        self.exporting = True
+        self.progress_bar.configure(mode='determinate', maximum=len(rows), value=0)
+        self.progress_bar.pack(side=tk.LEFT, padx=5)
+        threading.Thread(target=self.export_thread, args=(path, rows), daemon=True).start()
 
-    def search_directory(self, directory):
-        """搜索单个目录"""
-        # 准备搜索
-        self.searching = True
-        self.completed_dirs = 0
-        self.total_dirs = 1  # 只搜索一个目录
+    def export_thread(self, path, rows):
+        """在线程中逐行写出，定期报告进度"""
+        from core.export import open_writer
+        from core.metadata import METADATA_FIELDS
+        model = self.file_model
+        fields = ["name", "type", "size", "ctime", "mtime", "path"]
+        headers = ["文件名", "类型", "大小(字节)", "创建时间", "修改时间", "路径"]
+        with_metadata = self.metadata_var.get()
+        if with_metadata:
+            fields += list(METADATA_FIELDS)
+            headers += ["标题", "作者", "修改者", "页数"]
+        
+        message = f"已导出 {len(rows)} 个文件到 {path}"
+        try:
+            writer = open_writer(path, fields=fields, headers=headers)
+            try:
+                for done, row in enumerate(rows, 1):
+                    record = model.record(row)
+                    record["ctime"] = format_time(record["ctime"])
+                    record["mtime"] = format_time(record["mtime"])
+                    if with_metadata:
+                        values = self.metadata_enricher.get(model.paths[row], model.mtimes[row])
+                        record.update(zip(METADATA_FIELDS, values or (None,) * len(METADATA_FIELDS)))
+                    writer.write(record)
+                    if done % 5000 == 0:
+                        self.result_pipeline.put("export_progress", (done, len(rows)))
+            finally:
+                writer.close()
+        except Exception as e:
+            message = "导出失败"
+            self.result_pipeline.put("error", f"导出文件列表时出错: {str(e)}")
+        self.result_pipeline.put("export_done", message)
+
+    def pack_files(self):
+        """把选中的文件（未选中时为当前列表）打包为 zip；打包中再次点击可取消"""
+        if getattr(self, 'packer', None) is not None:
+            if messagebox.askyesno("取消打包", "正在打包，是否取消？"):
+                self.packer.cancel()
+            return
+        # 与导出、整理一样不在搜索时进行：打包与搜索共用进度条
+        if getattr(self, 'searching', False):
+            return
+        rows = self.file_list.selected_rows() or list(self.file_model.view)
+        if not rows:
+            messagebox.showinfo("提示", "当前列表为空，没有可打包的文件")
+            return
+        path = filedialog.asksaveasfilename(
+            title="打包归档",
+            defaultextension=".zip",
+            filetypes=[("ZIP 压缩包", "*.zip")]
+        )
+        if not path:
+            return
+        from core.archive import ZipPacker
+        paths = [self.file_model.paths[row] for row in rows]
+        self.packer = ZipPacker(path, workers=self.config_manager.config.get('pack_workers', 4))
+        self.progress_bar.configure(mode='determinate', maximum=100, value=0)
+        self.progress_bar.pack(side=tk.LEFT, padx=5)
+        self.progress_var.set(f"正在打包 {len(paths)} 个文件...")
+        threading.Thread(target=self.pack_thread, args=(self.packer, paths), daemon=True).start()
+
+    def pack_thread(self, packer, paths):
+        """在线程中打包，进度按字节节流后报告"""
+        from core.archive import PackCancelled
+        last = [0.0]
         
-        # 禁用文件类型选择
-        self.file_type_combo.configure(state="disabled")
+        def on_progress(done, total):
+            now = time.monotonic()
+            if now - last[0] >= 0.2 or done == total:
+                last[0] = now
+                self.result_pipeline.put("pack_progress", (done, total))
+        
+        def on_error(path, e):
+            print(f"打包 {path} 时出错: {e}")
+        
+        try:
+            stats = packer.pack(paths, on_progress, on_error)
+            message = (f"已打包 {stats['files']} 个文件到 {packer.path}"
+                       f"（{self.get_file_size(stats['bytes_in'])} → {self.get_file_size(stats['bytes_out'])}）")
+            if stats['errors']:
+                message += f"，{stats['errors']} 个文件无法读取"
+        except PackCancelled:
+            message = "打包已取消"
+        except Exception as e:
+            message = "打包失败"
+            self.result_pipeline.put("error", f"打包文件时出错: {str(e)}")
+        self.result_pipeline.put("pack_done", message)
+
+    def dump_metrics(self):
+        """把最近一次搜索的性能指标保存为 JSON"""
+        path = filedialog.asksaveasfilename(
+            title="保存性能数据",
+            defaultextension=".json",
+            filetypes=[("JSON 文件", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            self.metrics.dump(path)
+            self.progress_var.set(f"性能数据已保存到 {path}")
+        except Exception as e:
+            messagebox.showerror("错误", f"保存性能数据时出错: {str(e)}")
+
+    def toggle_profiling(self):
+        """开始或结束性能分析，结束时写出 cProfile 与内存分配报告"""
+        if self.profile_var.get():
+            self.metrics.start_profiling()
+            self.progress_var.set("性能分析已开启，刷新列表后再关闭即可生成报告")
+            return
+        try:
+            report = self.metrics.stop_profiling()
+            if report:
+                self.progress_var.set(f"性能分析报告已保存到 {report}")
+        except Exception as e:
+            messagebox.showerror("错误", f"生成性能分析报告时出错: {str(e)}")
+
+    def organize_files(self):
+        """按规则文件整理当前列表中的文件（先生成计划，确认后执行）"""
+        if getattr(self, 'organizing', False) or getattr(self, 'searching', False):
+            return
+        path = filedialog.askopenfilename(title="选择整理规则", filetypes=[("规则文件", "*.json")])
+        if not path:
+            return
+        from core.organize import load_rules, plan_operations
+        try:
+            rules = load_rules(path)
+        except Exception as e:
+            messagebox.showerror("错误", f"无法读取整理规则: {str(e)}")
+            return
+        model = self.file_model
+        records = [model.record(row) for row in model.rows.values()]
+        self.organizing = True
+        self.progress_var.set("正在生成整理计划...")
+        self.progress_bar.pack(side=tk.LEFT, padx=5)
+        self.progress_bar.start(10)
         
-        # 显示进度条
-        self.progress_var.set("正在搜索...")
+        def make_plan():
+            try:
+                self.result_pipeline.put("organize_plan", plan_operations(rules, records))
+            except Exception as e:
+                self.result_pipeline.put("error", f"生成整理计划时出错: {str(e)}")
+                self.result_pipeline.put("organize_done", "整理已取消")
+        threading.Thread(target=make_plan, daemon=True).start()
+
+    def confirm_organize(self, plan):
+        """显示计划摘要，确认后在后台执行"""
+        from core.organize import describe
+        if not plan:
+            self.result_pipeline.put("organize_done", "没有需要整理的文件")
+            return
+        preview = "\n".join(f"{op['src']} → {op['dst']}" for op in plan[:10])
+        if len(plan) > 10:
+            preview += f"\n……等 {len(plan)} 项"
+        if not messagebox.askyesno("确认整理", f"{describe(plan)}\n\n{preview}\n\n是否执行？"):
+            self.result_pipeline.put("organize_done", "整理已取消")
+            return
+        self.progress_var.set(f"正在整理... ({describe(plan)})")
+        threading.Thread(target=self.organize_thread, args=(plan,), daemon=True).start()
+
+    def organize_thread(self, plan):
+        """执行整理计划，把每项改动作为增量交给列表"""
+        from core.organize import Organizer, destination_record, new_journal_path
+        roots = [os.path.join(os.path.normcase(directory), "") for directory in self.selected_dirs]
+        writer = self.result_pipeline.writer()
+        lock = threading.Lock()
+        stale = []
+        
+        def on_done(op):
+            record = None
+            # 只显示仍在已选目录下的目标文件
+            if any(os.path.normcase(op["dst"]).startswith(root) for root in roots):
+                try:
+                    record = destination_record(op)
+                except OSError as e:
+                    # 文件已整理完成，只是无法加入列表；不能让异常中断其余结果的回传
+                    stale.append(op)
+                    print(f"读取整理后的文件 {op['dst']} 时出错: {e}")
+            with lock:
+                if op["action"] == "move":
+                    writer.put("remove", [op["src"]])
+                if record is not None:
+                    writer.put("file", record)
+        
+        def on_error(op, e):
+            print(f"整理 {op['src']} 时出错: {e}")
+        
+        journal = new_journal_path()
+        try:
+            done, failed = Organizer().run(plan, journal, on_done, on_error)
+            message = f"整理完成 {done} 项，失败 {failed} 项，日志 {journal}"
+            if stale:
+                message += f"，{len(stale)} 项未能刷新列表（请重新搜索）"
+        except Exception as e:
+            message = "整理失败"
+            writer.put("error", f"整理文件时出错: {str(e)}")
+        writer.put("organize_done", message)
+        writer.flush()
+
+    def find_duplicates(self):
+        """在后台按内容查找当前列表中的重复文件"""
+        if getattr(self, 'searching', False) or getattr(self, 'finding_duplicates', False):
+            return
+        model = self.file_model
+        records = [model.record(row) for row in model.rows.values()]
+        if not records:
+            return
+        self.finding_duplicates = True
+        self.progress_var.set("正在查找重复文件...")
         self.progress_bar.pack(side=tk.LEFT, padx=5)
         self.progress_bar.start(10)
+        threading.Thread(target=self.find_duplicates_thread, args=(records,), daemon=True).start()
+
+    def find_duplicates_thread(self, records):
+        """在线程中计算哈希并分组，结果经由管道交给主线程"""
+        stages = {"partial": "比较首尾内容", "full": "比较完整内容"}
         
-        # 搜索所有支持的文件类型
-        patterns = ["doc", "docx", "xls", "xlsx", "ppt", "pptx"]
+        def on_progress(stage, done, total):
+            if done % 200 == 0 or done == total:
+                self.result_pipeline.put("duplicate_progress", f"正在查找重复文件: {stages[stage]} ({done}/{total})")
         
-        # 启动搜索线程
-        thread = threading.Thread(
-            target=self.file_searcher.search_directory,
-            args=(directory, patterns),
-            daemon=True
+        from core.duplicates import DuplicateFinder
+        groups = []
+        try:
+            finder = DuplicateFinder(self.file_index)
+            groups = finder.find(records, on_progress)
+            stats = finder.stats
+            print(f"查找重复: {stats['files']} 个文件, 同大小候选 {stats['candidates']}, "
+                  f"缓存命中 {stats['cache_hits']}, 读取 {stats['bytes_read'] / 1024 / 1024:.1f}MB")
+        except Exception as e:
+            self.result_pipeline.put("error", f"查找重复文件时出错: {str(e)}")
+        self.result_pipeline.put("duplicates", groups)
+
+    def update_watcher(self):
+        """按开关状态启动或停止对已选目录的实时监控"""
+        self.stop_watcher()
+        if not self.watch_var.get() or not self.selected_dirs or getattr(self, 'searching', False):
+            return
+        from core.watcher import POLL_INTERVAL, DirectoryWatcher
+        patterns = ["doc", "docx", "xls", "xlsx", "ppt", "pptx"]
+        self.watcher = DirectoryWatcher(
+            self.file_index,
+            # 监控线程的结果经由同一管道交回主线程处理
+            self.result_pipeline.put,
+            extensions={f".{pattern}" for pattern in patterns},
+            on_error=lambda path, e: print(f"读取 {path} 时出错: {e}"),
+            rules=self.scan_rules,
+            poll_interval=self.config_manager.config.get('watch_poll_interval', POLL_INTERVAL)
         )
-        thread.start()
+        self.watcher.start(collapse_roots(self.selected_dirs, self.scan_rules)[0])
+    
+    def stop_watcher(self):
+        """停止实时监控"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+    
+    def on_closing(self):
+        """窗口关闭时保存配置"""
+        self.config_manager.update_window_geometry(self.root.geometry())
+        self.closing = True
+        if self.metrics.profiling:
+            self.metrics.stop_profiling()
+        if getattr(self, 'packer', None) is not None:
+            self.packer.cancel()
+        if self.metadata_enricher is not None:
+            self.metadata_enricher.stop()
+        self.stop_watcher()
+        self.scan_scheduler.shutdown()
+        self.result_pipeline.stop()
+        self.file_index.close()
+        if self.content_index is not None:
+            self.content_index.close()
+        self.root.quit()
+
+    def search_directory(self, directory):
+        """搜索单个新添加的目录（优先于正在进行的后台刷新）"""
+        self.start_search([directory], PRIORITY_HIGH)
 
     def on_search_change(self, *args):
-        """处理搜索框内容变化"""
-        search_text = self.search_var.get().lower()
-        
-        # 获取当前显示的所有项目
-        all_items = self.tree.get_children("")
-        
-        if not search_text:
-            # 如果搜索框为空，恢复所有项目
-            for item in self.all_files:
+        """处理搜索框内容变化（防抖：停止输入 150 毫秒后再搜索）"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(150, self.apply_search)
+    
+    def apply_search(self):
+        """在模型上执行名称搜索"""
+        self.search_after_id = None
+        self.file_model.set_query(self.search_var.get())
+        self.file_list.reset()
+    
+    def toggle_content_search(self):
+        """开启或关闭文档内容搜索"""
+        if self.content_var.get():
+            if self.content_index is None:
+                import sqlite3
+                from core.content_index import ContentIndex
                 try:
-                    self.tree.reattach(item, "", "end")
-                except:
-                    try:
-                        self.tree.move(item, "", "end")
-                    except:
-                        pass
+                    self.content_index = ContentIndex()
+                except (RuntimeError, sqlite3.Error) as e:
+                    # 缺少三元组分词时内容搜索不可用，禁用开关
+                    self.content_var.set(False)
+                    self.content_check.configure(state=tk.DISABLED)
+                    messagebox.showwarning("警告", f"无法启用内容搜索: {str(e)}")
+                    return
+            self.file_model.content_search = self.content_index.search
+            self.update_content_index()
+        else:
+            self.file_model.content_search = None
+        self.apply_search()
+    
+    def update_content_index(self):
+        """在后台为新增或修改过的文档提取内容"""
+        if not self.content_var.get() or self.content_indexing:
             return
+        model = self.file_model
+        records = [model.record(row) for row in model.rows.values()]
+        self.content_indexing = True
+        threading.Thread(target=self.content_index_thread, args=(records,), daemon=True).start()
+    
+    def content_index_thread(self, records):
+        """在线程中更新内容索引（提取在进程池中进行）"""
+        def on_progress(done, total):
+            self.result_pipeline.put("content_progress", f"正在索引文档内容... ({done}/{total})")
         
-        # 遍历所有项目进行搜索
-        for item in all_items:
-            values = self.tree.item(item)['values']
-            if not values:
-                continue
-            
-            # 获取文件名（第二列，因为第一列是图标）
-            filename = values[1].lower()
-            
-            # 如果文件名不包含搜索文本，则隐藏该项目
-            if search_text not in filename:
-                self.tree.detach(item)
+        message = "内容索引已更新"
+        try:
+            count, failed = self.content_index.update(records, on_progress, lambda: self.closing)
+            if count:
+                message = f"内容索引已更新，提取了 {count} 个文档"
+            if failed:
+                message += f"，{failed} 个文档无法读取（下次更新时重试）"
+        except Exception as e:
+            message = f"更新内容索引时出错: {str(e)}"
+        self.result_pipeline.put("content_done", message)
+    
+    def toggle_metadata(self):
+        """开启或关闭文档属性读取"""
+        if self.metadata_var.get():
+            if self.metadata_enricher is None:
+                from core.metadata import MetadataEnricher
+                self.metadata_enricher = MetadataEnricher(
+                    self.file_index,
+                    on_ready=lambda paths: self.result_pipeline.put("metadata", paths)
+                )
+            self.metadata_enricher.start()
+            self.backfill_metadata()
+        elif self.metadata_enricher is not None:
+            self.metadata_enricher.stop()
+        self.file_list.refresh()
+    
+    def backfill_metadata(self):
+        """把全部文件加入后台读取队列（优先级低于可见行）"""
+        if self.metadata_var.get():
+            model = self.file_model
+            self.metadata_enricher.backfill(model.record(row) for row in model.rows.values())
+    
+    def warm_search_index(self):
+        """在后台线程为新入库的文件补建搜索索引"""
+        threading.Thread(target=self.file_model.search_index.catch_up, daemon=True).start()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,8 +1,19 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-from file_organizer import FileOrganizer
+import sys
 
 if __name__ == "__main__":
+    # 打包后内容索引的进程池子进程会重新执行本文件，必须在解析参数之前交给 multiprocessing 处理
+    from multiprocessing import freeze_support
+    freeze_support()
+
+    # 带参数运行时进入命令行模式（如 scan），不创建窗口
+    if len(sys.argv) > 1:
+        from core.cli import main
+        sys.exit(main())
+    
+    # 界面相关模块只在图形模式下导入
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+    from file_organizer import FileOrganizer
     root = tk.Tk()
           
     # 尝试加载Azure主题
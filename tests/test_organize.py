@@ -0,0 +1,222 @@
+"""整理引擎：计划 → 执行 → 中断后续做 → 回滚，以及目标已存在时绝不删除源文件
+
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from core import organize
+from core.organize import Organizer, Rule, plan_operations, read_journal
+from core.walker import make_record
+
+
+class Crash(BaseException):
+    """模拟进程在操作中途被杀死（不是 OSError，不会被当作普通失败记录）"""
+
+
+def record(path):
+    name = os.path.basename(path)
+    return make_record(path, name, os.path.splitext(name)[1], os.stat(path))
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class OrganizeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.journal = os.path.join(self.root, "journal", "organize.jsonl")
+        self.report = os.path.join(self.root, "报告.docx")
+        self.sheet = os.path.join(self.root, "表格.xlsx")
+        write(self.report, "report")
+        write(self.sheet, "sheet")
+
+    def plan(self, action="move"):
+        rules = [Rule({"root": self.root, "target": "archive/{ext}/", "action": action})]
+        return plan_operations(rules, [record(self.report), record(self.sheet)])
+
+    def target(self, path):
+        ext = os.path.splitext(path)[1].lstrip(".")
+        return os.path.join(self.root, "archive", ext, os.path.basename(path))
+
+    def cross_device(self):
+        """让源目录与 archive 看起来位于不同设备，走复制、校验、删除源文件的路径"""
+        archive = os.path.join(self.root, "archive")
+        return mock.patch.object(organize, "_device", lambda path: 2 if path.startswith(archive) else 1)
+
+    def test_plan_does_not_touch_files(self):
+        plan = self.plan()
+        self.assertEqual([op["dst"] for op in plan], [self.target(self.report), self.target(self.sheet)])
+        self.assertTrue(os.path.exists(self.report))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "archive")))
+
+    def test_run_moves_and_journals(self):
+        done, failed = Organizer(workers=1).run(self.plan(), self.journal)
+        self.assertEqual((done, failed), (2, 0))
+        self.assertFalse(os.path.exists(self.report))
+        self.assertEqual(read(self.target(self.report)), "report")
+        _, states = read_journal(self.journal)
+        self.assertEqual(states, {0: "done", 1: "done"})
+
+    def test_run_refuses_destination_created_after_planning(self):
+        plan = self.plan()
+        # 确认计划之后，目标位置出现了另一个同样大小的文件
+        write(self.target(self.report), "REPORT")
+        errors = []
+        done, failed = Organizer(workers=1).run(plan, self.journal, on_error=lambda op, e: errors.append(e))
+        self.assertEqual((done, failed), (1, 1))
+        self.assertIsInstance(errors[0], FileExistsError)
+        self.assertEqual(read(self.report), "report")
+        self.assertEqual(read(self.target(self.report)), "REPORT")
+
+    def test_run_refuses_destination_cross_device(self):
+        plan = self.plan()
+        write(self.target(self.report), "REPORT")
+        with self.cross_device():
+            done, failed = Organizer(workers=1).run(plan, self.journal)
+        self.assertEqual((done, failed), (1, 1))
+        self.assertEqual(read(self.report), "report")
+        self.assertEqual(read(self.target(self.report)), "REPORT")
+
+    def test_copy_refuses_existing_destination(self):
+        plan = self.plan("copy")
+        write(self.target(self.sheet), "SHEET")
+        done, failed = Organizer(workers=1).run(plan, self.journal)
+        self.assertEqual((done, failed), (1, 1))
+        self.assertEqual(read(self.target(self.sheet)), "SHEET")
+
+    def test_resume_after_crash_before_source_removed(self):
+        plan = self.plan()
+        remove = os.remove
+
+        def crash_on_source(path):
+            if path == self.report:
+                raise Crash()
+            remove(path)
+
+        # 跨设备复制并校验完成后、删除源文件前中断
+        with self.cross_device(), mock.patch.object(organize.os, "remove", crash_on_source):
+            with self.assertRaises(Crash):
+                Organizer(workers=1).run(plan, self.journal)
+        self.assertTrue(os.path.exists(self.report))
+        self.assertTrue(os.path.exists(self.target(self.report)))
+        _, states = read_journal(self.journal)
+        self.assertEqual(states[0], "started")
+
+        # 另一项操作未受影响，已在第一次执行中完成
+        self.assertEqual(states[1], "done")
+        with self.cross_device():
+            done, failed = Organizer(workers=1).resume(self.journal)
+        self.assertEqual((done, failed), (1, 0))
+        self.assertFalse(os.path.exists(self.report))
+        self.assertFalse(os.path.exists(self.sheet))
+        self.assertEqual(read(self.target(self.report)), "report")
+        self.assertEqual(read(self.target(self.sheet)), "sheet")
+
+    def test_resume_after_crash_between_link_and_unlink(self):
+        plan = self.plan()
+        remove = os.remove
+
+        def crash_on_source(path):
+            if path == self.report:
+                raise Crash()
+            remove(path)
+
+        with mock.patch.object(organize.os, "remove", crash_on_source):
+            with self.assertRaises(Crash):
+                Organizer(workers=1).run(plan, self.journal)
+        self.assertTrue(os.path.samefile(self.report, self.target(self.report)))
+        done, failed = Organizer(workers=1).resume(self.journal)
+        self.assertEqual((done, failed), (1, 0))
+        self.assertFalse(os.path.exists(self.report))
+        self.assertEqual(read(self.target(self.report)), "report")
+
+    def test_resume_keeps_source_when_destination_differs(self):
+        plan = self.plan()
+        with mock.patch.object(Organizer, "_move", side_effect=Crash()):
+            with self.assertRaises(Crash):
+                Organizer(workers=1).run(plan, self.journal)
+        # 中断后目标位置出现了内容不同但大小相同的文件
+        write(self.target(self.report), "REPORT")
+        done, failed = Organizer(workers=1).resume(self.journal)
+        self.assertEqual((done, failed), (1, 1))
+        self.assertEqual(read(self.report), "report")
+        self.assertEqual(read(self.target(self.report)), "REPORT")
+
+    def test_resume_does_not_trust_ops_that_never_started(self):
+        plan = self.plan()
+        # 日志中只有计划，没有任何 started 记录
+        write(self.journal, json.dumps({"plan": plan, "created": 0}) + "\n")
+        write(self.target(self.report), "report")
+        done, failed = Organizer(workers=1).resume(self.journal)
+        self.assertEqual((done, failed), (1, 1))
+        self.assertTrue(os.path.exists(self.report))
+
+    def test_rollback_restores_sources(self):
+        Organizer(workers=1).run(self.plan(), self.journal)
+        done, failed = Organizer(workers=1).rollback(self.journal)
+        self.assertEqual((done, failed), (2, 0))
+        self.assertEqual(read(self.report), "report")
+        self.assertEqual(read(self.sheet), "sheet")
+        self.assertFalse(os.path.exists(self.target(self.report)))
+        _, states = read_journal(self.journal)
+        self.assertEqual(states, {0: "rolled_back", 1: "rolled_back"})
+        # 已回滚的操作不再续做
+        self.assertEqual(Organizer(workers=1).resume(self.journal), (0, 0))
+
+    def test_rollback_resumes_after_crash(self):
+        Organizer(workers=1).run(self.plan(), self.journal)
+        remove = os.remove
+        moved = self.target(self.sheet)
+
+        def crash_on_moved(path):
+            if path == moved:
+                raise Crash()
+            remove(path)
+
+        # 回滚时建立原位置的硬链接后、删除目标文件前中断
+        with mock.patch.object(organize.os, "remove", crash_on_moved):
+            with self.assertRaises(Crash):
+                Organizer(workers=1).rollback(self.journal)
+        _, states = read_journal(self.journal)
+        self.assertEqual(states[1], "rollback_started")
+        # 回滚到一半的操作不会被续做
+        self.assertEqual(Organizer(workers=1).resume(self.journal), (0, 0))
+        done, failed = Organizer(workers=1).rollback(self.journal)
+        self.assertEqual((done, failed), (2, 0))
+        self.assertEqual(read(self.sheet), "sheet")
+        self.assertFalse(os.path.exists(moved))
+
+    def test_rollback_removes_copies(self):
+        Organizer(workers=1).run(self.plan("copy"), self.journal)
+        self.assertEqual(read(self.target(self.sheet)), "sheet")
+        done, failed = Organizer(workers=1).rollback(self.journal)
+        self.assertEqual((done, failed), (2, 0))
+        self.assertTrue(os.path.exists(self.sheet))
+        self.assertFalse(os.path.exists(self.target(self.sheet)))
+
+    def test_rollback_refuses_occupied_source(self):
+        Organizer(workers=1).run(self.plan(), self.journal)
+        write(self.report, "new report")
+        done, failed = Organizer(workers=1).rollback(self.journal)
+        self.assertEqual((done, failed), (1, 1))
+        self.assertEqual(read(self.report), "new report")
+        self.assertEqual(read(self.target(self.report)), "report")
+
+
+if __name__ == "__main__":
+    unittest.main()
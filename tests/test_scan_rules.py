@@ -0,0 +1,51 @@
+"""重叠的根目录：外层根目录的规则会排除的根目录不合并，按自己的规则单独遍历
+
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.inventory import iter_documents
+from core.scan_rules import RuleSet
+from core.walker import collapse_roots
+
+
+class CollapseRootsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.outer = os.path.join(self.tmp, "共享")
+        self.nested = os.path.join(self.outer, "node_modules", "文档")
+        self.plain = os.path.join(self.outer, "项目", "文档")
+        for directory in (self.nested, self.plain):
+            os.makedirs(directory)
+            open(os.path.join(directory, "报告.docx"), "w").close()
+        self.roots = [self.outer, self.nested, self.plain]
+
+    def test_without_rules_nested_roots_are_collapsed(self):
+        kept, nested = collapse_roots(self.roots)
+        self.assertEqual(kept, [self.outer])
+        self.assertEqual(nested, {self.nested: self.outer, self.plain: self.outer})
+
+    def test_root_pruned_by_outer_rules_is_kept(self):
+        rules = RuleSet({"*": {"exclude_dirs": ["node_modules"]}})
+        kept, nested = collapse_roots(self.roots, rules)
+        self.assertEqual(kept, [self.outer, self.nested])
+        self.assertEqual(nested, {self.plain: self.outer})
+        # 被排除的子目录本身选为根目录时，其中的文件仍被列出
+        paths = {record["path"] for record in iter_documents(self.roots, rules=rules)}
+        self.assertIn(os.path.join(self.nested, "报告.docx"), paths)
+        self.assertEqual(len(paths), 2)
+
+    def test_outer_max_depth_or_own_rules_keep_root(self):
+        rules = RuleSet({self.outer: {"max_depth": 5}})
+        self.assertEqual(collapse_roots(self.roots, rules)[0], self.roots)
+        rules = RuleSet({self.plain: {"min_size": 1}})
+        self.assertEqual(collapse_roots(self.roots, rules)[0], [self.outer, self.plain])
+
+
+if __name__ == "__main__":
+    unittest.main()
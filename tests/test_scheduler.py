@@ -0,0 +1,139 @@
+"""扫描调度：停止后再次提交同一根目录，列表最终包含全部文件（缓冲中的结果不丢失）
+
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from core import incremental
+from core.file_index import FileIndex
+from core.file_model import FileListModel
+from core.pipeline import BatchWriter
+from core.scheduler import ScanScheduler
+
+
+class ModelPipeline:
+    """代替 ResultPipeline：把批量消息直接应用到列表模型（界面线程的角色）"""
+
+    def __init__(self, model):
+        self.model = model
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.done = threading.Event()
+
+    def put_batch(self, messages):
+        with self.lock:
+            for msg_type, data in messages:
+                if msg_type == "file":
+                    self.model.upsert(data)
+                    self.rows += 1
+                elif msg_type == "remove":
+                    self.model.remove(data)
+                elif msg_type == "done":
+                    self.done.set()
+
+
+def reporter(pipeline, batch_size=64):
+    """与界面的 scan_reporter 相同：写检查点前和完成时送出缓冲的结果"""
+    writer = BatchWriter(pipeline, batch_size)
+
+    def report(msg_type, data):
+        if msg_type == "checkpoint":
+            writer.flush()
+            return
+        writer.put(msg_type, data)
+        if msg_type == "done":
+            writer.flush()
+    return report
+
+
+class CancelResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.root = os.path.join(self.tmp, "tree")
+        self.expected = set()
+        for d in range(60):
+            directory = os.path.join(self.root, f"d{d // 8}", f"sub{d}")
+            os.makedirs(directory)
+            for f in range(50):
+                path = os.path.join(directory, f"file{f}.docx")
+                open(path, "w").close()
+                self.expected.add(path)
+        self.index = FileIndex(os.path.join(self.tmp, "index.db"))
+        self.addCleanup(self.index.close)
+        scan_directory = incremental.scan_directory
+
+        def slow_scan_directory(directory, *rest):
+            time.sleep(0.005)
+            return scan_directory(directory, *rest)
+
+        patcher = mock.patch.object(incremental, "scan_directory", slow_scan_directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def paths(self, model):
+        return {model.record(row)["path"] for row in model.rows.values()}
+
+    def test_cancel_then_resubmit_delivers_every_file(self):
+        model = FileListModel()
+        pipeline = ModelPipeline(model)
+        scheduler = ScanScheduler(self.index, workers=2, per_device=2, checkpoint_interval=3600)
+        self.addCleanup(scheduler.shutdown)
+
+        # 每批 1000 条：停止时已找到的结果全都还在缓冲中，检查点却会把它们记为已索引
+        report = reporter(pipeline, batch_size=1000)
+        found = []
+        enough = threading.Event()
+
+        def callback(msg_type, data):
+            if msg_type == "file":
+                found.append(data)
+                if len(found) >= 300:
+                    enough.set()
+            report(msg_type, data)
+
+        job = scheduler.submit(self.root, callback)
+        self.assertTrue(enough.wait(10))
+        scheduler.cancel(job.id)
+        self.assertFalse(pipeline.done.is_set(), "扫描应在中途被停止")
+        self.assertIsNotNone(self.index.load_checkpoint(self.root))
+        indexed = {record["path"] for record in self.index.iter_records([self.root])}
+        self.assertLessEqual(indexed, self.paths(model))
+        self.assertLess(len(self.paths(model)), len(self.expected))
+
+        pipeline.done.clear()
+        scheduler.submit(self.root, reporter(pipeline))
+        self.assertTrue(pipeline.done.wait(30))
+        self.assertEqual(self.paths(model), self.expected)
+        self.assertEqual({record["path"] for record in self.index.iter_records([self.root])}, self.expected)
+
+    def test_pause_flushes_buffered_results(self):
+        model = FileListModel()
+        pipeline = ModelPipeline(model)
+        scheduler = ScanScheduler(self.index, workers=2, per_device=2, checkpoint_interval=3600)
+        self.addCleanup(scheduler.shutdown)
+
+        job = scheduler.submit(self.root, reporter(pipeline, batch_size=10000))
+        deadline = time.monotonic() + 10
+        while job.state is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        time.sleep(0.1)
+        scheduler.pause(job.id)
+        # 暂停时写检查点：索引中记为已有的文件都已送到列表（缓冲未攒满一批也一样）
+        indexed = {record["path"] for record in self.index.iter_records([self.root])}
+        self.assertTrue(indexed)
+        self.assertLessEqual(indexed, self.paths(model))
+        scheduler.resume(job.id)
+        self.assertTrue(pipeline.done.wait(30))
+        self.assertEqual(self.paths(model), self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
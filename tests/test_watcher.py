@@ -0,0 +1,49 @@
+"""轮询监控：没有变化的根目录逐次放慢轮询，发现变化后恢复
+
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+
+from core.watcher import PollingBackend
+
+
+class PollingBackoffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = PollingBackend(interval=0.02, max_interval=0.08)
+        self.addCleanup(self.backend.stop)
+        self.polled = threading.Event()
+        self.reported = threading.Event()
+
+    def notify(self, root, directory):
+        # 报告扫描结果之前不让轮询线程继续，间隔的变化与线程调度时机无关
+        self.polled.set()
+        self.reported.wait(5)
+        self.reported.clear()
+
+    def poll(self, changed):
+        """等到下一次轮询，报告扫描结果，返回报告后的间隔"""
+        self.assertTrue(self.polled.wait(5))
+        self.polled.clear()
+        self.backend.scanned("根目录", changed)
+        self.reported.set()
+        return self.backend.delays["根目录"]
+
+    def test_interval_backs_off_and_resets(self):
+        self.backend.start(["根目录"], self.notify)
+        self.assertEqual([self.poll(False) for _ in range(4)], [0.04, 0.08, 0.08, 0.08])
+        self.assertEqual(self.poll(True), 0.02)
+        self.assertEqual(self.poll(False), 0.04)
+
+    def test_stop_does_not_wait_for_next_poll(self):
+        backend = PollingBackend(interval=3600)
+        backend.start(["根目录"], lambda root, directory: None)
+        start = time.monotonic()
+        backend.stop()
+        self.assertLess(time.monotonic() - start, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""重复文件结果窗口：每组一个父节点，展开后列出各个副本"""
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from core.file_model import format_time
+
+
+class DuplicateWindow:
+    def __init__(self, parent, groups, format_size, colors):
+        self.paths = {}  # Treeview 条目 -> 文件路径
+        self.window = tk.Toplevel(parent)
+        self.window.title("🧬 重复文件")
+        self.window.geometry("900x500")
+        self.window.configure(bg=colors['bg'])
+
+        wasted = sum(group[0]["size"] * (len(group) - 1) for group in groups)
+        ttk.Label(
+            self.window,
+            text=f"共 {len(groups)} 组重复文件，删除多余副本可节省 {format_size(wasted)}",
+            font=('微软雅黑', 10),
+            foreground=colors['text_color']
+        ).pack(fill=tk.X, padx=10, pady=5)
+
+        frame = ttk.Frame(self.window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.tree = ttk.Treeview(frame, columns=("大小", "修改时间"), style="Rounded.Treeview")
+        self.tree.heading("#0", text="📂 路径")
+        self.tree.heading("大小", text="📦 大小")
+        self.tree.heading("修改时间", text="🕒 修改时间")
+        self.tree.column("#0", width=600)
+        self.tree.column("大小", width=100)
+        self.tree.column("修改时间", width=150)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 子节点只在展开时插入，组数很多时窗口也能立即打开
+        self.groups = {}
+        for group in groups:
+            item = self.tree.insert(
+                "", tk.END,
+                text=f"{group[0]['name']} 等 {len(group)} 个副本",
+                values=(format_size(group[0]["size"]), "")
+            )
+            self.tree.insert(item, tk.END, text="")
+            self.groups[item] = group
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<Double-1>", self.open_file)
+
+    def on_open(self, event):
+        item = self.tree.focus()
+        group = self.groups.pop(item, None)
+        if group is None:
+            return
+        self.tree.delete(*self.tree.get_children(item))
+        for record in group:
+            child = self.tree.insert(
+                item, tk.END,
+                text=record["path"],
+                values=("", format_time(record["mtime"]))
+            )
+            self.paths[child] = record["path"]
+
+    def open_file(self, event):
+        """双击打开副本"""
+        path = self.paths.get(self.tree.identify('item', event.x, event.y))
+        if path is None:
+            return
+        try:
+            if os.path.exists(path):
+                os.startfile(path)
+            else:
+                messagebox.showerror("错误", f"文件不存在: {path}", parent=self.window)
+        except Exception as e:
+            messagebox.showerror("错误", f"无法打开文件: {str(e)}", parent=self.window)
@@ -0,0 +1,157 @@
+"""虚拟列表：Treeview 只保留可见区域的条目，滚动时复用条目显示模型中的不同行"""
+import tkinter as tk
+
+
+class VirtualList:
+    def __init__(self, tree, scrollbar, model, row_values):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.model = model
+        self.row_values = row_values  # 行号 -> 显示值元组，只对可见行调用
+        self.offset = 0  # 第一个可见行在 model.view 中的位置
+        self.slots = []  # 当前复用的 Treeview 条目
+        self.visible_rows = 1
+        self.row_height = 20
+        self.header_height = 25
+        self.selected = set()  # 选中的模型行号（滚出视口后仍保留）
+        self.refresh_pending = None
+
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind("<Configure>", self.on_configure, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        for key, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                           ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(key, lambda e, d=delta: self.move_focus(d))
+
+    def schedule_refresh(self):
+        """在空闲时刷新一次（合并同一轮事件中的多次数据变化）"""
+        if self.refresh_pending is None:
+            self.refresh_pending = self.tree.after_idle(self.refresh)
+
+    def refresh(self):
+        """模型视图变化后重新显示"""
+        if self.refresh_pending is not None:
+            self.tree.after_cancel(self.refresh_pending)
+            self.refresh_pending = None
+        self.render()
+
+    def reset(self):
+        """回到顶部并清除选择（排序、筛选条件变化时调用）"""
+        self.offset = 0
+        self.selected.clear()
+        self.refresh()
+
+    def render(self):
+        view = self.model.view
+        total = len(view)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        count = min(self.visible_rows, total - self.offset)
+
+        # 按需增减复用的条目
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert("", tk.END))
+        if len(self.slots) > count:
+            self.tree.delete(*self.slots[count:])
+            del self.slots[count:]
+
+        selection = []
+        for i, item in enumerate(self.slots):
+            row = view[self.offset + i]
+            self.tree.item(item, values=self.row_values(row))
+            if row in self.selected:
+                selection.append(item)
+        self.tree.selection_set(selection)
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + count) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.calibrate()
+
+    def calibrate(self):
+        """用第一行的实际位置校准行高和表头高度"""
+        if not self.slots:
+            return
+        bbox = self.tree.bbox(self.slots[0])
+        if bbox and (bbox[1], bbox[3]) != (self.header_height, self.row_height):
+            self.header_height, self.row_height = bbox[1], bbox[3]
+            self.on_configure()
+
+    def on_configure(self, event=None):
+        height = self.tree.winfo_height()
+        rows = max(1, (height - self.header_height) // max(1, self.row_height))
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def yview(self, *args):
+        """滚动条命令：moveto 比例或按行/页滚动"""
+        total = len(self.model.view)
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * total)
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll(amount * self.visible_rows if args[2] == "pages" else amount)
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.render()
+        return "break"
+
+    def on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_select(self, event=None):
+        """同步可见条目的选中状态到模型行（视口外的选择不受影响）"""
+        current = set(self.tree.selection())
+        view = self.model.view
+        for i, item in enumerate(self.slots):
+            row = view[self.offset + i]
+            if item in current:
+                self.selected.add(row)
+            else:
+                self.selected.discard(row)
+
+    def move_focus(self, delta):
+        """键盘移动焦点，必要时滚动视口"""
+        total = len(self.model.view)
+        if not total:
+            return "break"
+        focus = self.tree.focus()
+        index = self.offset + self.slots.index(focus) if focus in self.slots else self.offset
+        if delta == "page":
+            index += self.visible_rows
+        elif delta == "-page":
+            index -= self.visible_rows
+        elif delta == "home":
+            index = 0
+        elif delta == "end":
+            index = total - 1
+        else:
+            index += delta
+        index = max(0, min(index, total - 1))
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_rows:
+            self.offset = index - self.visible_rows + 1
+        self.selected = {self.model.view[index]}
+        self.render()
+        item = self.slots[index - self.offset]
+        self.tree.focus(item)
+        return "break"
+
+    def row_at(self, item):
+        """返回 Treeview 条目当前显示的模型行号"""
+        if item not in self.slots:
+            return None
+        return self.model.view[self.offset + self.slots.index(item)]
+
+    def selected_rows(self):
+        """返回仍然存在的选中行（按当前视图顺序）"""
+        alive = self.model.alive
+        selected = self.selected
+        return [row for row in self.model.view if row in selected and alive[row]]